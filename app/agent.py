@@ -1,46 +1,276 @@
-import json
-import os
-from app.rag_pipeline import get_cards_retriever
-from app.memory import get_conversation_memory
-from app.llm_agent import LLMAgent
+from itertools import islice
+import numpy as np
+from app.components import ComponentRegistry
+from app.embeddings import get_shared_embeddings
+from app.explanations import ExplanationService
+from app.explanation_cache import ExplanationCache
+from app.retrieval_cache import RetrievalCache
+from app.result_store import ResultStore
+from app.recommendation_cache import RecommendationCache
+from app.rescoring import SessionScores
+from app.profiles import profile_hash
+from app.scoring import top_k
+from app.query_planner import plan_query, retrieve_documents
+from app.config import RECOMMEND_BATCH_SIZE
+from app.catalog_store import DATA_DIR, CatalogStore
+from app.metrics import LLM_CALLS, LLM_ERRORS, LLM_LATENCY, RETRIEVER_LATENCY
+from app.tracing import span
+
+GOAL_CARDS = 5  # goal-based cards shown (more than spending, to show more goal matches)
+SPENDING_CARDS = 3
+MAX_RECOMMENDATIONS = 6
+
+def _load_retriever():
+    from app.rag_pipeline import get_cards_retriever
+    return get_cards_retriever()
+
+def _load_embeddings():
+    embeddings = get_shared_embeddings()
+    embeddings.model
+    return embeddings
+
+def _load_llm_agent():
+    from app.llm_agent import LLMAgent
+    return LLMAgent()
+
+def _load_memory():
+    from app.memory import get_conversation_memory
+    return get_conversation_memory()
+
+def _index_version():
+    from app.rag_pipeline import index_version
+    return index_version()
 
 class CardAdvisor:
-    def __init__(self):
-        self.retriever = get_cards_retriever()
-        self.memory = get_conversation_memory()
-        self.cards_data = self._load_cards()
-        self.service_mapping = self._load_service_mapping()
-        self.apply_urls = self._load_apply_urls()
-        self.llm_agent = LLMAgent()
-    
-    def _load_cards(self):
-        data_path = os.path.join(os.path.dirname(__file__), "..", "data", "uae_cards.json")
-        with open(data_path, "r") as f:
-            return json.load(f)
-    
-    def _load_service_mapping(self):
-        data_path = os.path.join(os.path.dirname(__file__), "..", "data", "card_service_mapping.json")
-        try:
-            with open(data_path, "r") as f:
-                return json.load(f)
-        except:
-            return {"co_branded_cards": {}, "partner_benefits": {}}
+    def __init__(self, data_dir: str = DATA_DIR):
+        # Scoring tier: loaded eagerly, needs only the JSON data and NumPy.
+        # The store swaps in a new compiled snapshot when the data files change.
+        self.catalog_store = CatalogStore(data_dir)
+        self.catalog_store.on_swap(self._on_catalog_swap)
+        
+        # Retrieval and LLM tiers: built on first use or by warm_up()
+        self.components = ComponentRegistry()
+        self.components.register("retriever", _load_retriever)
+        self.components.register("embeddings", _load_embeddings)
+        self.components.register("llm", _load_llm_agent)
+        self.components.register("memory", _load_memory)
+        self.retrieval_cache = RetrievalCache(index_version=_index_version, embeddings=get_shared_embeddings())
+        
+        self.explanation_cache = ExplanationCache()
+        self.result_store = ResultStore()
+        self.recommendation_cache = RecommendationCache()
+        self.session_scores = SessionScores()
+        self.explainer = ExplanationService(
+            lambda: self.llm_agent,
+            cache=self.explanation_cache,
+            card_hash=lambda name: self.catalog.card_hash(name)
+        )
     
-    def _load_apply_urls(self):
-        data_path = os.path.join(os.path.dirname(__file__), "..", "data", "card_apply_urls.json")
-        try:
-            with open(data_path, "r") as f:
-                data = json.load(f)
-                return data.get("cards", {})
-        except:
-            return {}
-    
-    def recommend(self, user_profile: dict) -> dict:
-        salary = user_profile.get("salary", 0)
-        goals = user_profile.get("goals", [])
+    @property
+    def snapshot(self):
+        return self.catalog_store.snapshot
+    
+    @property
+    def catalog_version(self) -> str:
+        return self.catalog_store.snapshot.version
+    
+    @property
+    def cards_data(self) -> list:
+        return self.snapshot.cards_data
+    
+    @property
+    def service_mapping(self) -> dict:
+        return self.snapshot.service_mapping
+    
+    @property
+    def apply_urls(self) -> dict:
+        return self.snapshot.apply_urls
+    
+    @property
+    def catalog(self):
+        return self.snapshot.catalog
+    
+    @property
+    def engine(self):
+        return self.snapshot.engine
+    
+    @property
+    def retriever(self):
+        return self.components.get("retriever")
+    
+    @property
+    def llm_agent(self):
+        return self.components.get("llm")
+    
+    @property
+    def memory(self):
+        return self.components.get("memory")
+    
+    @property
+    def ready(self) -> bool:
+        return self.components.is_ready()
+    
+    def warm_up(self, components: list = None):
+        """Load the retriever, embedding model and LLM client (or just `components`) now instead of on first use."""
+        self.components.warm_up(components)
+        if self.components.is_ready("retriever"):
+            self.retriever.get_relevant_documents("credit card warm-up")
+    
+    def warm_up_in_background(self):
+        self.components.warm_up_in_background()
+    
+    def health(self) -> dict:
+        """Readiness of each tier; scoring is always ready once the advisor exists."""
+        return {"scoring": {"ready": True}, **self.components.status()}
+    
+    def reopen_after_fork(self):
+        """Reopen per-process resources in a freshly forked worker."""
+        # The retriever holds a SQLite-backed Chroma client; a worker must open its own
+        self.components.reset("retriever")
+        get_shared_embeddings().reopen()
+        self.explanation_cache.reopen()
+        self.result_store.reopen()
+        self.explainer.restart()
+        self.watch_catalog()
+    
+    def watch_catalog(self):
+        """Start polling the data directory for catalog changes."""
+        self.catalog_store.watch()
+    
+    def _on_catalog_swap(self, snapshot):
+        # Re-sync the vector index for edited cards, if the retriever is in use
+        if self.components.is_ready("retriever"):
+            from app.rag_pipeline import sync_vectorstore
+            sync_vectorstore(self.retriever.vectorstore)
+    
+    def recommend(self, user_profile: dict, defer_explanations: bool = False, session_id: str = None) -> dict:
+        """Recommend cards for one profile.
+        
+        With defer_explanations=True the scores are returned straight away and the
+        top cards are explained in the background. Poll the returned
+        explanation_id with get_explanations(). The shown cards and the profile
+        are kept under the returned result_id for filter_result().
+        
+        Equivalent profiles (see canonical_profile) are scored once per catalog
+        version; explanations are still produced per request. With a session_id,
+        a miss rescores only the terms that changed since the session's last
+        profile (see prime_session()).
+        """
+        snapshot = self.snapshot
+        key = (profile_hash(user_profile), snapshot.version)
+        with span("recommendation_cache") as cache_span:
+            scored = self.recommendation_cache.get(key)
+            cache_span.set_attribute("hit", scored is not None)
+        if scored is None:
+            if session_id:
+                scored = self._score_session(user_profile, snapshot, session_id)
+            else:
+                scored = self._score_chunk([user_profile], snapshot)[0]
+            self.recommendation_cache.set(key, scored)
         
-        goal_cards = self._get_goal_based_cards(user_profile) if goals else []
-        spending_cards = self._get_spending_based_cards(user_profile)
+        result = self._copy_scored(scored)
+        if defer_explanations:
+            with span("explanations.start"):
+                result["explanation_id"] = self.explainer.start(result["recommendations"][:3], user_profile)
+        else:
+            self._explain(result, user_profile)
+        result["result_id"] = self.result_store.put(result["recommendations"], profile=user_profile,
+                                                    catalog_version=snapshot.version)
+        return result
+    
+    def prime_session(self, session_id: str, user_profile: dict):
+        """Score a session's base profile, so the refined profile sent to recommend() rescores incrementally."""
+        snapshot = self.snapshot
+        with span("scoring.session", primed=True):
+            self.session_scores.score(session_id, snapshot.engine, user_profile)
+    
+    def get_explanations(self, explanation_id: str, timeout: float = 0) -> dict:
+        return self.explainer.poll(explanation_id, timeout=timeout)
+    
+    def recommend_batch(self, profiles, explain: bool = True, chunk_size: int = RECOMMEND_BATCH_SIZE):
+        """Recommend cards for many profiles, scoring each chunk as one profile x card matrix.
+        
+        Yields one result per profile in input order, so callers can stream results
+        while later profiles are still being read. With explain=False no LLM calls
+        are made and results carry no ai_explanation.
+        """
+        chunk = []
+        for profile in profiles:
+            chunk.append(profile)
+            if len(chunk) >= chunk_size:
+                yield from self._recommend_chunk(chunk, explain)
+                chunk = []
+        if chunk:
+            yield from self._recommend_chunk(chunk, explain)
+    
+    @staticmethod
+    def _copy_scored(scored: tuple) -> dict:
+        """Copy a cached (result, scores) pair's result down to the card dicts.
+        
+        A card listed in several places stays one object in the copy, so an
+        explanation added to a top card shows up in every list. Nested values
+        (rewards, reasons) are shared with the cache, as they are with the catalog.
+        """
+        result, _ = scored
+        copies = {}
+        
+        def copy_card(card):
+            copied = copies.get(id(card))
+            if copied is None:
+                copied = copies[id(card)] = dict(card)
+            return copied
+        
+        result = dict(result)
+        for key in ("recommendations", "goal_based", "spending_based", "top_choices"):
+            result[key] = [copy_card(card) for card in result[key]]
+        result["follow_up_questions"] = [dict(q) for q in result["follow_up_questions"]]
+        return result
+    
+    def _recommend_chunk(self, profiles: list, explain: bool) -> list:
+        # One snapshot for the whole chunk, so a concurrent catalog reload can't mix versions
+        results = []
+        for user_profile, (result, _) in zip(profiles, self._score_chunk(profiles, self.snapshot)):
+            if explain:
+                self._explain(result, user_profile)
+            results.append(result)
+        return results
+    
+    def _score_chunk(self, profiles: list, snapshot) -> list:
+        """(result without explanations, scores for ranking more candidates) per profile."""
+        with span("scoring", profiles=len(profiles)):
+            scored = snapshot.engine.score_batch(profiles)
+        
+        return [self._build_result(user_profile, goal_scored, spending_scored, values, snapshot)
+                for user_profile, (goal_scored, spending_scored, values) in zip(profiles, scored)]
+    
+    def _score_session(self, user_profile: dict, snapshot, session_id: str) -> tuple:
+        """Like _score_chunk for one profile, reusing the session's unchanged score terms."""
+        with span("scoring.session"):
+            goal_scored, spending_scored, values = self.session_scores.score(session_id, snapshot.engine, user_profile)
+        return self._build_result(user_profile, goal_scored, spending_scored, values, snapshot)
+    
+    def _build_result(self, user_profile: dict, goal_scored: dict, spending_scored: dict, values: dict, snapshot) -> tuple:
+        goals = user_profile.get("goals", [])
+        with span("cards.goal"):
+            goal_cards = self._goal_based_cards(goal_scored, values, snapshot) if goals else []
+        with span("cards.spending"):
+            spending_cards = self._spending_based_cards(user_profile, spending_scored, values, snapshot)
+        result = self._combine_recommendations(user_profile, goal_cards, spending_cards)
+        result["catalog_version"] = snapshot.version
+        scores = {"profile": user_profile, "goal": goal_scored, "spending": spending_scored, "values": values,
+                  "snapshot": snapshot}
+        return result, scores
+    
+    def _explain(self, result: dict, user_profile: dict):
+        """Add LLM explanations to the top 3 cards, generated concurrently under a deadline."""
+        top_cards = result["recommendations"][:3]
+        with span("explanations", cards=len(top_cards)):
+            explanations = self.explainer.explain(top_cards, user_profile)
+        for card, explanation in zip(top_cards, explanations):
+            card["ai_explanation"] = explanation
+    
+    def _combine_recommendations(self, user_profile: dict, goal_cards: list, spending_cards: list) -> dict:
+        goals = user_profile.get("goals", [])
         
         # Find cards that appear in both lists (top choices)
         goal_card_names = {card["card_name"] for card in goal_cards}
@@ -68,180 +298,125 @@ class CardAdvisor:
         # Sort by top choice status and score
         unique_recommendations.sort(key=lambda x: (x.get("is_top_choice", False), x["fit_score"]), reverse=True)
         
-        # Add LLM explanations to top 3 cards
-        for card in unique_recommendations[:3]:
-            card["ai_explanation"] = self.llm_agent.generate_card_explanation(card, user_profile)
-        
         # Generate follow-up questions if too many recommendations
-        follow_up_questions = self._generate_follow_up_questions(unique_recommendations, user_profile)
+        with span("follow_up_questions"):
+            follow_up_questions = self._generate_follow_up_questions(unique_recommendations, user_profile)
         
         return {
-            "recommendations": unique_recommendations[:6],
-            "goal_based": goal_cards[:5],
-            "spending_based": spending_cards[:3],
+            "recommendations": unique_recommendations[:MAX_RECOMMENDATIONS],
+            "goal_based": goal_cards[:GOAL_CARDS],
+            "spending_based": spending_cards[:SPENDING_CARDS],
             "top_choices": top_choices,
             "has_goals": len(goals) > 0,
             "follow_up_questions": follow_up_questions
         }
     
+    def _more_candidates(self, scores: dict, shown: list, keep=None):
+        """Eligible cards not shown (and passing keep), best fit first, as a goal card if they match a goal.
+        
+        Ranks card ids only; each card dict is built when the caller reaches it.
+        """
+        snapshot = scores["snapshot"]
+        names = snapshot.engine.names
+        ranked = []
+        if scores["profile"].get("goals", []):
+            goal_scored = scores["goal"]
+            ids = np.flatnonzero(goal_scored["candidates"])
+            ranked += [(i, "goal") for i in top_k(ids, goal_scored["score"][ids], None, self._matched_counts(goal_scored, ids, snapshot))]
+        ids = np.flatnonzero(scores["spending"]["candidates"])
+        ranked += [(i, "spending") for i in top_k(ids, scores["spending"]["score"][ids])]
+        
+        seen = {card["card_name"] for card in shown}
+        rest = []
+        for i, kind in ranked:
+            if names[i] not in seen:
+                seen.add(names[i])
+                rest.append((round(float(scores[kind]["score"][i]), 2), i, kind))
+        rest.sort(key=lambda x: x[0], reverse=True)
+        
+        for _, i, kind in rest:
+            if keep is not None and not keep(snapshot.cards_data[i]):
+                continue
+            if kind == "goal":
+                yield self._goal_card(i, scores["goal"], scores["values"], snapshot)
+            else:
+                yield self._spending_card(i, scores["profile"], scores["spending"], scores["values"], snapshot)
+    
     def _get_goal_based_cards(self, user_profile: dict) -> list:
-        salary = user_profile.get("salary", 0)
-        goals = user_profile.get("goals", [])
-        lifestyle = user_profile.get("lifestyle", {})
-        spend = user_profile.get("spend", {})
-        
-        # Deduplicate goals
-        goals = list(set(goals))
-        
-        scored_cards = []
-        co_branded = self.service_mapping.get("co_branded_cards", {})
+        snapshot = self.snapshot
+        goal_scored, _, values = snapshot.engine.score_batch([user_profile])[0]
+        return self._goal_based_cards(goal_scored, values, snapshot)
+    
+    def _goal_based_cards(self, scored: dict, values: dict, snapshot, limit: int = GOAL_CARDS) -> list:
+        """The best goal matches by (goals matched, fit score); only these get result dicts."""
+        ids = np.flatnonzero(scored["candidates"])
+        ranked = top_k(ids, scored["score"][ids], limit, self._matched_counts(scored, ids, snapshot))
+        return [self._goal_card(i, scored, values, snapshot) for i in ranked]
+    
+    @staticmethod
+    def _matched_counts(scored: dict, ids: np.ndarray, snapshot) -> np.ndarray:
+        """How many of the profile's goals each card matches."""
+        counts = np.zeros(len(ids), dtype=int)
+        for goal in scored["goals"]:
+            counts += snapshot.engine.goal_matches(goal)[ids]
+        return counts
+    
+    def _goal_card(self, i: int, scored: dict, values: dict, snapshot) -> dict:
+        goals = scored["goals"]
+        engine = snapshot.engine
+        card = snapshot.cards_data[i]
+        matched_goals = [goal for goal in goals if engine.goal_matches(goal)[i]]
         
-        for card in self.cards_data:
-            if card["min_salary"] > salary:
-                continue
-            
-            best_for = card.get("best_for", [])
-            matched_goals = []
-            
-            for goal in goals:
-                if any(goal.lower() in bf.lower() for bf in best_for):
-                    if goal not in matched_goals:  # Prevent duplicates
-                        matched_goals.append(goal)
-            
-            if len(matched_goals) == 0:
-                continue
-            
-            score = 0.5 + (len(matched_goals) * 0.15)
-            
-            # Enhanced scoring adjustments
-            if card["annual_fee"] == 0:
-                score += 0.05
-            
-            # Boost for international spenders
-            international_travel = spend.get("international_travel", 0)
-            if international_travel > 2000 and "international" in goals:
-                if "Amazon" in card["name"] or card["rewards"].get("international", 0) > 2:
-                    score += 0.2
-            
-            # Boost for domestic transport users
-            domestic_transport = spend.get("domestic_transport", 0)
-            if domestic_transport > 800 and any(g in goals for g in ["transport", "careem", "nol"]):
-                transport_benefits = any(tag in best_for for tag in ["careem", "transport", "nol", "salik"])
-                if transport_benefits:
-                    score += 0.15
-            
-            # Boost for online shoppers
-            online_spend = spend.get("online", 0)
-            if online_spend > 1500 and "online" in goals:
-                online_rate = card["rewards"].get("online", 0)
-                if online_rate >= 5:
-                    score += 0.25
-                elif online_rate >= 3:
-                    score += 0.15
-            
-            # Boost for entertainment seekers
-            if "entertainment" in goals:
-                if any(tag in best_for for tag in ["entertainment", "cinema", "vox", "dubai_mall"]):
-                    score += 0.2
-            
-            # Premium card boost for high earners
-            if salary >= 50000 and any(g in goals for g in ["premium", "luxury"]):
-                if card["annual_fee"] > 1000 or any(tag in best_for for tag in ["premium", "elite", "signature"]):
-                    score += 0.25
-            
-            # Strong boost for goal+spending alignment
-            if "online" in goals:
-                online_spend = spend.get("online", 0)
-                online_rate = card["rewards"].get("online", 0)
-                if online_spend > 2000 and online_rate >= 5:
-                    score += 0.3
-            
-            if "dining" in goals:
-                dining_spend = spend.get("dining", 0)
-                dining_rate = card["rewards"].get("dining", 0)
-                if dining_spend > 3000 and dining_rate >= 3:
-                    score += 0.3
-            
-            # Boost for high travel reward rates
-            if "travel" in goals or "miles" in goals:
-                travel_rate = card["rewards"].get("travel", 0)
-                international_rate = card["rewards"].get("international", 0)
-                best_rate = max(travel_rate, international_rate)
-                if best_rate >= 5:
-                    score += 0.2
-                elif best_rate >= 3:
-                    score += 0.1
-            
-            # Entry-level card boost for low salary
-            if salary <= 6000 and "no_fee" in goals:
-                if "Liv" in card["name"] or card["min_salary"] <= 5000:
-                    score += 0.15
-            lifestyle_match_name = None
-            for category, services in lifestyle.items():
-                for service_data in services:
-                    if isinstance(service_data, dict):
-                        service = service_data.get("service")
-                        usage_percent = service_data.get("usage_percent", 50)
-                    else:
-                        service = service_data
-                        usage_percent = 50
-                    
-                    if service in co_branded and co_branded[service]["card_name"] == card["name"]:
-                        score += 0.3 * (usage_percent / 100)  # Boost for lifestyle match
-                        lifestyle_match_name = service.replace("_", " ").title()
-            
-            reasons = self._generate_goal_reasons(card, matched_goals, card["annual_fee"], lifestyle_match_name)
-            value = self._estimate_value(card, user_profile)
-            
-            scored_cards.append({
-                "card_name": card["name"],
-                "bank": card["bank"],
-                "annual_fee": card["annual_fee"],
-                "min_salary": card["min_salary"],
-                "rewards": card.get("rewards", {}),
-                "best_for": card.get("best_for", []),
-                "fit_score": round(min(score, 1.0), 2),
-                "reasons": reasons,
-                "estimated_annual_value": value,
-                "recommendation_type": "goal",
-                "matched_goals": matched_goals,
-                "total_goals": len(goals),
-                "apply_url": self.apply_urls.get(card["name"], {}).get("apply_url", "")
-            })
+        reasons = self._generate_goal_reasons(card, matched_goals, card["annual_fee"], scored["lifestyle_match"].get(i))
+        value = engine.format_value(values, i)
         
-        scored_cards.sort(key=lambda x: (len(x["matched_goals"]), x["fit_score"]), reverse=True)
-        return scored_cards[:5]  # Return top 5 instead of 3 to show more goal matches
+        return {
+            "card_name": card["name"],
+            "bank": card["bank"],
+            "annual_fee": card["annual_fee"],
+            "min_salary": card["min_salary"],
+            "rewards": card.get("rewards", {}),
+            "best_for": card.get("best_for", []),
+            "fit_score": round(float(scored["score"][i]), 2),
+            "reasons": reasons,
+            "estimated_annual_value": value,
+            "recommendation_type": "goal",
+            "matched_goals": matched_goals,
+            "total_goals": len(goals),
+            "apply_url": snapshot.catalog.apply_url[i]
+        }
     
     def _get_spending_based_cards(self, user_profile: dict) -> list:
-        salary = user_profile.get("salary", 0)
-        
-        scored_cards = []
-        
-        for card in self.cards_data:
-            if card["min_salary"] > salary:
-                continue
-            
-            score, matches = self._calculate_score_with_lifestyle(card, user_profile)
-            reasons = self._generate_reasons_with_lifestyle(card, user_profile, matches)
-            value = self._estimate_value(card, user_profile)
-            
-            scored_cards.append({
-                "card_name": card["name"],
-                "bank": card["bank"],
-                "annual_fee": card["annual_fee"],
-                "min_salary": card["min_salary"],
-                "rewards": card.get("rewards", {}),
-                "best_for": card.get("best_for", []),
-                "fit_score": round(score, 2),
-                "reasons": reasons,
-                "estimated_annual_value": value,
-                "lifestyle_matches": matches,
-                "recommendation_type": "spending",
-                "apply_url": self.apply_urls.get(card["name"], {}).get("apply_url", "")
-            })
+        snapshot = self.snapshot
+        _, spending_scored, values = snapshot.engine.score_batch([user_profile])[0]
+        return self._spending_based_cards(user_profile, spending_scored, values, snapshot)
+    
+    def _spending_based_cards(self, user_profile: dict, scored: dict, values: dict, snapshot, limit: int = SPENDING_CARDS) -> list:
+        """The best spending matches by fit score; only these get result dicts."""
+        ids = np.flatnonzero(scored["candidates"])
+        return [self._spending_card(i, user_profile, scored, values, snapshot) for i in top_k(ids, scored["score"][ids], limit)]
+    
+    def _spending_card(self, i: int, user_profile: dict, scored: dict, values: dict, snapshot) -> dict:
+        engine = snapshot.engine
+        card = snapshot.cards_data[i]
+        matches = engine.build_matches(scored, i)
+        reasons = self._generate_reasons_with_lifestyle(card, user_profile, matches)
+        value = engine.format_value(values, i)
         
-        scored_cards.sort(key=lambda x: x["fit_score"], reverse=True)
-        return scored_cards[:3]
+        return {
+            "card_name": card["name"],
+            "bank": card["bank"],
+            "annual_fee": card["annual_fee"],
+            "min_salary": card["min_salary"],
+            "rewards": card.get("rewards", {}),
+            "best_for": card.get("best_for", []),
+            "fit_score": round(float(scored["score"][i]), 2),
+            "reasons": reasons,
+            "estimated_annual_value": value,
+            "lifestyle_matches": matches,
+            "recommendation_type": "spending",
+            "apply_url": snapshot.catalog.apply_url[i]
+        }
     
     def _generate_goal_reasons(self, card: dict, matched_goals: list, annual_fee: int = 0, lifestyle_match: str = None) -> list:
         reasons = []
@@ -281,158 +456,6 @@ class CardAdvisor:
         
         return reasons[:4]
     
-    def _calculate_score_with_lifestyle(self, card: dict, profile: dict) -> tuple:
-        score = 0.5
-        matches = []
-        
-        lifestyle = profile.get("lifestyle", {})
-        co_branded = self.service_mapping.get("co_branded_cards", {})
-        partner_benefits = self.service_mapping.get("partner_benefits", {})
-        spend = profile.get("spend", {})
-        goals = profile.get("goals", [])
-        salary = profile.get("salary", 0)
-        
-        for category, services in lifestyle.items():
-            for service_data in services:
-                if isinstance(service_data, dict):
-                    service = service_data.get("service")
-                    usage_percent = service_data.get("usage_percent", 50)
-                else:
-                    service = service_data
-                    usage_percent = 50
-                
-                if service in co_branded:
-                    if co_branded[service]["card_name"] == card["name"]:
-                        boost = 0.3 * (usage_percent / 100)
-                        score += boost
-                        matches.append({
-                            "type": "co_branded",
-                            "service": service,
-                            "usage": usage_percent,
-                            "benefit": co_branded[service]["benefit"]
-                        })
-                
-                if service in partner_benefits:
-                    if card["name"] in partner_benefits[service]:
-                        boost = 0.15 * (usage_percent / 100)
-                        score += boost
-                        matches.append({
-                            "type": "partner",
-                            "service": service,
-                            "usage": usage_percent,
-                            "benefit": f"Special benefits at {service}"
-                        })
-        
-        # Enhanced scoring adjustments
-        online_spend = spend.get("online", 0)
-        international_travel = spend.get("international_travel", 0)
-        domestic_transport = spend.get("domestic_transport", 0)  # ride-hailing, metro, etc
-        total_spend = sum(spend.values()) or 1
-        
-        # Boost for high online spenders
-        if online_spend > 1500:
-            online_rate = card["rewards"].get("online", 0)
-            if online_rate >= 5:
-                score += 0.2
-                matches.append({
-                    "type": "high_online",
-                    "service": "online_shopping",
-                    "usage": int((online_spend / total_spend) * 100),
-                    "benefit": f"{online_rate}% on online spending ({online_spend} AED/month)"
-                })
-        
-        # Boost for international travelers (flights, hotels, foreign spending)
-        if international_travel > 2000:
-            intl_rate = card["rewards"].get("international", card["rewards"].get("travel", 0))
-            if intl_rate >= 2.5 or "Amazon" in card["name"]:
-                score += 0.15
-                matches.append({
-                    "type": "international_travel",
-                    "service": "international_travel",
-                    "usage": int((international_travel / total_spend) * 100),
-                    "benefit": f"Enhanced rewards on international travel & foreign spending"
-                })
-        
-        # Boost for domestic transport users (Careem, RTA, etc)
-        if domestic_transport > 800:
-            transport_benefits = any(tag in card.get("best_for", []) for tag in ["careem", "transport", "nol", "salik"])
-            if transport_benefits:
-                score += 0.1
-                matches.append({
-                    "type": "domestic_transport",
-                    "service": "ride_hailing_transport",
-                    "usage": int((domestic_transport / total_spend) * 100),
-                    "benefit": f"Benefits for ride-hailing and local transport"
-                })
-        
-        # Entry-level card boost
-        if salary <= 6000 and card["annual_fee"] == 0 and card["min_salary"] <= 5000:
-            if "Liv" in card["name"] or "WIO" in card["name"]:
-                score += 0.1
-        
-        # Entertainment boost
-        entertainment_spend = spend.get("dining", 0) + spend.get("online", 0)
-        if entertainment_spend > 2000:
-            best_for = card.get("best_for", [])
-            if any(tag in best_for for tag in ["entertainment", "cinema", "vox", "dubai_mall", "namshi"]):
-                score += 0.1
-        
-        groceries = lifestyle.get("groceries", [])
-        for service_data in groceries:
-            if isinstance(service_data, dict):
-                service = service_data.get("service")
-                usage = service_data.get("usage_percent", 0)
-                if service == "amazon_fresh" and usage >= 50:
-                    if card["name"] == "Amazon.ae Credit Card":
-                        score += 0.2
-                        matches.append({
-                            "type": "high_usage",
-                            "service": "amazon_fresh",
-                            "usage": usage,
-                            "benefit": f"You use Amazon Fresh {usage}% for groceries - 6% cashback applies!"
-                        })
-        
-        rewards = card.get("rewards", {})
-        misc_spend = spend.get("miscellaneous", 0)
-        
-        reward_values = list(rewards.values())
-        is_general_rewards = len(set(reward_values)) == 1 and len(reward_values) >= 5
-        
-        if misc_spend > 0 and misc_spend / total_spend > 0.3 and is_general_rewards:
-            general_rate = reward_values[0] if reward_values else 0
-            if general_rate >= 2.0:
-                score += 0.25
-                matches.append({
-                    "type": "general_rewards",
-                    "service": "miscellaneous",
-                    "usage": int((misc_spend / total_spend) * 100),
-                    "benefit": f"Flat {general_rate}% on all spending including miscellaneous ({int(misc_spend)} AED/month)"
-                })
-        
-        for category, amount in spend.items():
-            if amount > 0 and category not in ["miscellaneous", "utilities", "remittances"]:
-                reward_rate = rewards.get(category, 0)
-                if reward_rate > 0:
-                    weight = amount / total_spend
-                    score += weight * (reward_rate / 5) * 0.2
-        
-        if misc_spend > 0:
-            misc_reward = rewards.get("miscellaneous", 0)
-            if misc_reward == 0 and is_general_rewards:
-                misc_reward = reward_values[0]
-            if misc_reward > 0:
-                weight = misc_spend / total_spend
-                score += weight * (misc_reward / 5) * 0.2
-        
-        best_for = card.get("best_for", [])
-        goal_matches = sum(1 for g in goals if any(g.lower() in bf.lower() for bf in best_for))
-        score += min(goal_matches * 0.1, 0.15)
-        
-        if card["annual_fee"] == 0:
-            score += 0.05
-        
-        return min(score, 1.0), matches
-        
     def _generate_follow_up_questions(self, recommendations: list, profile: dict) -> list:
         """Generate follow-up questions to help users filter recommendations."""
         if len(recommendations) <= 3:
@@ -485,39 +508,77 @@ class CardAdvisor:
     
     def filter_recommendations(self, recommendations: list, filter_type: str, choice: str, **kwargs) -> list:
         """Filter recommendations based on user's follow-up answers."""
-        filtered = []
+        keep = self._filter_predicate(filter_type, choice, **kwargs)
+        filtered = [r for r in recommendations if keep(r)]
         
+        # If filter is too strict, return top 3 from original
+        if len(filtered) == 0:
+            return recommendations[:3]
+        
+        return filtered
+    
+    @staticmethod
+    def _filter_predicate(filter_type: str, choice: str, **kwargs):
+        """Test for one follow-up answer. Only reads annual_fee, rewards and best_for, so it works on catalog cards too."""
         if filter_type == "annual_fee":
             if "no annual fee" in choice.lower():
-                filtered = [r for r in recommendations if r["annual_fee"] == 0]
-            else:
-                filtered = [r for r in recommendations if r["annual_fee"] > 0]
+                return lambda r: r["annual_fee"] == 0
+            return lambda r: r["annual_fee"] > 0
         
-        elif filter_type == "spending_focus":
+        if filter_type == "spending_focus":
             category = kwargs.get("category")
             if "yes" in choice.lower() and category:
-                filtered = [r for r in recommendations if r.get("rewards", {}).get(category, 0) >= 2.0]
-            else:
-                filtered = [r for r in recommendations if len([v for v in r.get("rewards", {}).values() if v >= 2.0]) >= 3]
+                return lambda r: r.get("rewards", {}).get(category, 0) >= 2.0
+            return lambda r: len([v for v in r.get("rewards", {}).values() if v >= 2.0]) >= 3
         
-        elif filter_type == "brand_loyalty":
+        if filter_type == "brand_loyalty":
+            brands = ["amazon", "noon", "carrefour", "lulu", "adnoc"]
             if "yes" in choice.lower():
-                filtered = [r for r in recommendations if any(tag in r.get("best_for", []) for tag in ["amazon", "noon", "carrefour", "lulu", "adnoc"])]
-            else:
-                filtered = [r for r in recommendations if not any(tag in r.get("best_for", []) for tag in ["amazon", "noon", "carrefour", "lulu", "adnoc"])]
+                return lambda r: any(tag in r.get("best_for", []) for tag in brands)
+            return lambda r: not any(tag in r.get("best_for", []) for tag in brands)
         
-        elif filter_type == "premium_benefits":
+        if filter_type == "premium_benefits":
             if "yes" in choice.lower():
-                filtered = [r for r in recommendations if r["annual_fee"] > 500 or any(tag in r.get("best_for", []) for tag in ["premium", "airport_lounge", "concierge"])]
-            else:
-                filtered = [r for r in recommendations if r["annual_fee"] <= 500]
+                return lambda r: r["annual_fee"] > 500 or any(tag in r.get("best_for", []) for tag in ["premium", "airport_lounge", "concierge"])
+            return lambda r: r["annual_fee"] <= 500
         
-        # If filter is too strict, return top 3 from original
+        return lambda r: False
+    
+    def filter_result(self, result_id: str, filter_type: str, choice: str, **kwargs):
+        """Filter a stored result's shown cards, then the other eligible cards by fit.
+        
+        Only the cards returned get result dicts. Returns None if the result is
+        unknown or expired.
+        """
+        entry = self.result_store.get(result_id)
+        if entry is None:
+            return None
+        shown = entry["candidates"]
+        keep = self._filter_predicate(filter_type, choice, **kwargs)
+        filtered = [card for card in shown if keep(card)][:MAX_RECOMMENDATIONS]
+        if len(filtered) < MAX_RECOMMENDATIONS:
+            scores = self._stored_scores(entry)
+            filtered += islice(self._more_candidates(scores, shown, keep), MAX_RECOMMENDATIONS - len(filtered))
+        
+        # If filter is too strict, return the top 3 candidates
         if len(filtered) == 0:
-            return recommendations[:3]
-        
+            return shown[:3] + list(islice(self._more_candidates(scores, shown), max(3 - len(shown), 0)))
         return filtered
     
+    def _stored_scores(self, entry: dict) -> dict:
+        """Scores behind a stored result, from the recommendation cache or rescored.
+        
+        Another worker may have scored it. If the catalog changed since, the
+        profile is rescored against the current one.
+        """
+        user_profile = entry["profile"]
+        scored = self.recommendation_cache.get((profile_hash(user_profile), entry["catalog_version"]))
+        if scored is None:
+            snapshot = self.snapshot
+            scored = self._score_chunk([user_profile], snapshot)[0]
+            self.recommendation_cache.set((profile_hash(user_profile), snapshot.version), scored)
+        return scored[1]
+    
     def _generate_reasons_with_lifestyle(self, card: dict, profile: dict, matches: list) -> list:
         reasons = []
         
@@ -555,68 +616,26 @@ class CardAdvisor:
         
         return reasons[:4]
     
-    def _estimate_value(self, card: dict, profile: dict) -> str:
-        spend = profile.get("spend", {})
-        lifestyle = profile.get("lifestyle", {})
-        rewards = card.get("rewards", {})
-        
-        reward_values = list(rewards.values())
-        is_general_rewards = len(set(reward_values)) == 1 and len(reward_values) >= 5
-        general_rate = reward_values[0] if is_general_rewards and reward_values else 0
-        
-        co_branded = self.service_mapping.get("co_branded_cards", {})
-        card_co_brand_service = None
-        for service, info in co_branded.items():
-            if info["card_name"] == card["name"]:
-                card_co_brand_service = service
-                break
-        
-        total_rewards = 0
-        excluded_spend = 0
-        has_lifestyle_data = len(lifestyle) > 0
-        
-        for category, amount in spend.items():
-            category_lifestyle = lifestyle.get(self._get_lifestyle_category_key(category), [])
-            
-            # Only apply exclusion logic if user provided lifestyle data for this category
-            if category_lifestyle and card_co_brand_service:
-                user_services = [s.get("service") if isinstance(s, dict) else s for s in category_lifestyle]
-                
-                # Exclude spend if card is co-branded but user doesn't use that service
-                if card_co_brand_service not in user_services:
-                    excluded_spend += amount
-                    continue
-            
-            if category in rewards:
-                total_rewards += amount * 12 * rewards[category] / 100
-            elif is_general_rewards and category in ["miscellaneous", "utilities", "remittances"]:
-                total_rewards += amount * 12 * general_rate / 100
-        
-        net_value = total_rewards - card["annual_fee"]
-        
-        exclusion_note = ""
-        if excluded_spend > 0 and has_lifestyle_data:
-            exclusion_note = f" (excludes {int(excluded_spend)} AED/month at non-partner merchants)"
-        elif not has_lifestyle_data and card_co_brand_service:
-            exclusion_note = " (assumes all spending at partner merchants)"
-        
-        if net_value > 0:
-            return f"approx. {int(net_value)} AED net benefit annually{exclusion_note}"
-        else:
-            return f"approx. {int(total_rewards)} AED rewards (minus {card['annual_fee']} AED fee){exclusion_note}"
-    
-    def _get_lifestyle_category_key(self, spend_category: str) -> str:
-        mapping = {
-            "groceries": "groceries",
-            "online": "online_shopping",
-            "fuel": "fuel_stations",
-            "entertainment": "entertainment",
-            "international_travel": "airlines"
-        }
-        return mapping.get(spend_category, "")
-    
     def chat_turn(self, user_message: str, user_profile: dict = None) -> str:
-        docs = self.retriever.get_relevant_documents(user_message)
+        # Push salary, fee and bank constraints down as metadata filters before the vector search
+        with span("chat.plan_query"):
+            where = plan_query(user_message, user_profile)
+        with span("chat.retrieval", filtered=where is not None):
+            docs = self.retrieval_cache.get_or_retrieve(
+                user_message,
+                lambda query: self._retrieve(query, where),
+                scope=where
+            )
         context = "\n".join([doc.page_content[:500] for doc in docs[:3]])
         
-        return self.llm_agent.answer_question(user_message, context, user_profile)
+        LLM_CALLS.labels("chat").inc()
+        try:
+            with span("chat.llm"), LLM_LATENCY.labels("chat").time():
+                return self.llm_agent.answer_question(user_message, context, user_profile)
+        except Exception:
+            LLM_ERRORS.labels("chat").inc()
+            raise
+    
+    def _retrieve(self, query: str, where: dict = None) -> list:
+        with RETRIEVER_LATENCY.time():
+            return retrieve_documents(self.retriever, query, where=where)
@@ -0,0 +1,204 @@
+"""
+Usage analytics
+The API records recommend, filter, chat and apply-click events with track(),
+which only appends to an in-memory ring buffer. A background thread writes the
+buffer in batches to an append-only NDJSON log. get_metrics() reads rolling
+aggregates that are updated incrementally from new log lines (or straight from
+the buffer when no log is configured), so a dashboard refresh never rescans
+the event history
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+import numpy as np
+from app.config import ANALYTICS_PATH, ANALYTICS_BUFFER_SIZE, ANALYTICS_FLUSH_INTERVAL
+
+EVENT_TYPES = ("recommend", "filter", "chat", "apply_click")
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class RollingAggregates:
+    """Dashboard metrics maintained event by event."""
+
+    def __init__(self, max_sessions: int = 10000, latency_window: int = 1000):
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.total_sessions = 0
+        self.converted_sessions = 0
+        self.recommend_events = 0
+        self.cards_recommended = 0
+        self.apply_clicks = 0
+        self.card_counts = Counter()
+        self.card_clicks = Counter()
+        self.goal_counts = Counter()
+        self.event_counts = Counter()
+        self.latencies = {event_type: deque(maxlen=latency_window) for event_type in EVENT_TYPES}
+
+    def _session(self, session_id: str) -> dict:
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = {"session_id": session_id, "salary": None, "goals": [], "cards_recommended": 0, "applied": False}
+            self.sessions[session_id] = session
+            self.total_sessions += 1
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def apply(self, event: dict):
+        event_type = event.get("type")
+        self.event_counts[event_type] += 1
+        if event.get("latency_ms") is not None and event_type in self.latencies:
+            self.latencies[event_type].append(event["latency_ms"])
+
+        # Sessions are the ones that got recommendations; filter and chat calls may come without one
+        if event_type == "recommend":
+            session = self._session(event.get("session_id") or "anonymous")
+            cards = event.get("cards", [])
+            self.recommend_events += 1
+            self.cards_recommended += len(cards)
+            self.card_counts.update(cards)
+            self.goal_counts.update(event.get("goals", []))
+            session["salary"] = event.get("salary")
+            session["goals"] = event.get("goals", [])
+            session["cards_recommended"] = len(cards)
+        elif event_type == "apply_click":
+            self.apply_clicks += 1
+            self.card_clicks[event.get("card_name")] += 1
+            session = self.sessions.get(event.get("session_id") or "anonymous")
+            if session is not None and not session["applied"]:
+                session["applied"] = True
+                self.converted_sessions += 1
+
+    def metrics(self, top: int = 10, recent: int = 20) -> dict:
+        latency = {}
+        for event_type, window in self.latencies.items():
+            if window:
+                p50, p95, p99 = np.percentile(list(window), [50, 95, 99])
+                latency[event_type] = {"p50": round(float(p50), 1), "p95": round(float(p95), 1), "p99": round(float(p99), 1)}
+        return {
+            "total_sessions": self.total_sessions,
+            "conversion_rate": round(self.converted_sessions / self.total_sessions * 100, 1) if self.total_sessions else 0,
+            "avg_recommendations": round(self.cards_recommended / self.recommend_events, 1) if self.recommend_events else 0,
+            "total_apply_clicks": self.apply_clicks,
+            "top_cards": [
+                {"card_name": name, "count": count, "click_rate": round(self.card_clicks[name] / count * 100, 1)}
+                for name, count in self.card_counts.most_common(top)
+            ],
+            "recent_sessions": [dict(s) for s in reversed(list(self.sessions.values())[-recent:])],
+            "goal_frequencies": dict(self.goal_counts.most_common()),
+            "events": dict(self.event_counts),
+            "latency_ms": latency
+        }
+
+
+class AnalyticsTracker:
+    """Non-blocking event recorder with rolling dashboard aggregates.
+
+    Several API workers can append to the same log; a tracker that only reads
+    it (like dashboard_simple.py) tails the new lines on each get_metrics().
+    An empty path keeps everything in memory.
+    """
+
+    def __init__(self, path: str = ANALYTICS_PATH, buffer_size: int = ANALYTICS_BUFFER_SIZE,
+                 flush_interval: float = ANALYTICS_FLUSH_INTERVAL):
+        self.path = path or None
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.aggregates = RollingAggregates()
+        self.lock = threading.Lock()
+        self.offset = 0
+        self.pid = None
+        self.flush_thread = None
+        self.stop_event = threading.Event()
+
+    def track(self, event_type: str, session_id: str = None, latency_ms: float = None, **fields):
+        """Record an event; never blocks on I/O. When the buffer is full the oldest event is dropped."""
+        event = {"ts": time.time(), "type": event_type, "session_id": session_id, "latency_ms": latency_ms, **fields}
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(event)
+        if self.pid != os.getpid():
+            self._start()
+
+    def _start(self):
+        # Threads don't survive a fork: each process gets its own flusher
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.stop_event.clear()
+            self.flush_thread = threading.Thread(target=self._flush_loop, name="analytics-flush", daemon=True)
+            self.flush_thread.start()
+
+    def _flush_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[WARN] Analytics flush failed: {e}")
+
+    def _drain(self) -> list:
+        events = []
+        while True:
+            try:
+                events.append(self.buffer.popleft())
+            except IndexError:
+                return events
+
+    def flush(self):
+        """Write buffered events to the log in one append (or fold them in directly without a log)."""
+        events = self._drain()
+        if not events:
+            return
+        if self.path is None:
+            with self.lock:
+                for event in events:
+                    self.aggregates.apply(event)
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One O_APPEND write per batch, so lines from several workers never interleave
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, "".join(json.dumps(event) + "\n" for event in events).encode())
+        finally:
+            os.close(fd)
+
+    def _tail(self):
+        """Fold complete lines appended to the log since the last read into the aggregates."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self.aggregates.apply(json.loads(line))
+            except ValueError:
+                continue
+        self.offset += end
+
+    def get_metrics(self) -> dict:
+        self.flush()
+        with self.lock:
+            if self.path is not None:
+                self._tail()
+            metrics = self.aggregates.metrics()
+        metrics["dropped_events"] = self.dropped
+        return metrics
+
+    def stop(self):
+        self.stop_event.set()
+        self.flush()
@@ -1,12 +1,123 @@
-from flask import Flask, request, jsonify
+import json
+import time
+from collections import deque
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 from app.agent import CardAdvisor
+from app.analytics import AnalyticsTracker, new_session_id
 from app.question_generator import generate_questions, enrich_profile_with_answers
+from app.profiles import normalize_age, normalize_employment_type, normalize_goals
+from app.embeddings import get_shared_embeddings
+from app.metrics import CONTENT_TYPE, HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, registry
+from app.tracing import tracer
 
 app = Flask(__name__)
 CORS(app)
 
 advisor = CardAdvisor()
+analytics = AnalyticsTracker()
+
+def _cache_lookups():
+    """(hits, misses) per cache for the cache metrics."""
+    stats = {
+        'explanation': advisor.explanation_cache.stats(),
+        'recommendation': advisor.recommendation_cache.stats(),
+        'retrieval': advisor.retrieval_cache.stats(),
+        'embedding': get_shared_embeddings().stats()
+    }
+    return {
+        name: (s['hits'] + s.get('disk_hits', 0) + s.get('semantic_hits', 0), s['misses'])
+        for name, s in stats.items()
+    }
+
+registry.callback('cache_hits_total', 'Cache hits by cache', 'counter', ('cache',),
+                  lambda: {(name,): hits for name, (hits, _) in _cache_lookups().items()})
+registry.callback('cache_misses_total', 'Cache misses by cache', 'counter', ('cache',),
+                  lambda: {(name,): misses for name, (_, misses) in _cache_lookups().items()})
+registry.ratio('cache_hit_ratio', 'Cache hits / lookups', 'cache_hits_total', 'cache_misses_total')
+registry.callback('recommendation_cache_evictions_total', 'Recommendation cache entries evicted by the size bound',
+                  'counter', (), lambda: {(): advisor.recommendation_cache.stats()['evictions']})
+registry.callback('catalog_info', 'Active catalog version', 'gauge', ('version',),
+                  lambda: {(advisor.catalog_version,): 1}, aggregate='max')
+registry.callback('catalog_cards', 'Cards in the active catalog', 'gauge', (),
+                  lambda: {(): len(advisor.cards_data)}, aggregate='max')
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_IN_FLIGHT.labels(g.endpoint).inc()
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_start' in g:
+        HTTP_REQUESTS.labels(g.endpoint, request.method, response.status_code).inc()
+        HTTP_LATENCY.labels(g.endpoint).observe(time.perf_counter() - g.request_start)
+    return response
+
+@app.teardown_request
+def end_request_metrics(exc):
+    if 'endpoint' in g:
+        HTTP_IN_FLIGHT.labels(g.endpoint).dec()
+
+@app.before_request
+def start_trace():
+    g.trace = tracer.start_trace(f"{request.method} {request.path}", **{'http.method': request.method, 'http.route': request.path})
+
+@app.after_request
+def add_catalog_version(response):
+    """Report the catalog version on every response (recommend results also carry it in the body)."""
+    response.headers['X-Catalog-Version'] = advisor.catalog_version
+    return response
+
+@app.after_request
+def add_server_timing(response):
+    """Summarize the request's traced stages in a Server-Timing header."""
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace.root.set_attribute('http.status_code', response.status_code)
+        tracer.finish(trace)
+        response.headers['Server-Timing'] = trace.server_timing()
+    return response
+
+def _client_session_id(data):
+    """Session id the client sent (body or X-Session-Id header), or None."""
+    session_id = request.headers.get('X-Session-Id') or (data.get('session_id') if isinstance(data, dict) else None)
+    return str(session_id) if session_id else None
+
+def _session_id(data) -> str:
+    """Client-supplied session id, or a new one."""
+    return _client_session_id(data) or new_session_id()
+
+def _elapsed_ms() -> float:
+    return round((time.perf_counter() - g.request_start) * 1000, 2) if 'request_start' in g else None
+
+def build_profile(data):
+    """Build a scoring profile from a request payload, or None if it is invalid."""
+    if not isinstance(data, dict) or 'salary' not in data:
+        return None
+    
+    profile = {
+        'salary': data.get('salary'),
+        'spend': data.get('spend', {}),
+        'goals': normalize_goals(data.get('goals', [])),
+        'lifestyle': data.get('lifestyle', {})
+    }
+    # Optional eligibility fields, checked against the detailed card rules
+    try:
+        if data.get('age') is not None:
+            profile['age'] = normalize_age(data['age'])
+        if data.get('employment_type'):
+            profile['employment_type'] = normalize_employment_type(data['employment_type'])
+    except ValueError:
+        return None
+    
+    # Enrich profile with questionnaire answers if provided
+    questionnaire_answers = data.get('questionnaire_answers')
+    if questionnaire_answers:
+        profile = enrich_profile_with_answers(profile, questionnaire_answers)
+    
+    return profile
 
 @app.route('/api/generate-questions', methods=['POST'])
 def generate_questions_endpoint():
@@ -17,22 +128,11 @@ def generate_questions_endpoint():
         if not data or 'salary' not in data or 'spend' not in data:
             return jsonify({'error': 'Invalid input'}), 400
         
-        # Handle goals as object or array
-        goals = data.get('goals', [])
-        if isinstance(goals, dict):
-            goals = [k for k, v in goals.items() if v]
-        
-        # Map camelCase goal names to snake_case
-        goal_mapping = {
-            'travelMiles': 'travel',
-            'noAnnualFee': 'no_fee',
-            'airportLounge': 'airport_lounge',
-            'diningRewards': 'dining',
-            'premiumBenefits': 'premium',
-            'fuelSavings': 'fuel',
-            'onlineShopping': 'online'
-        }
-        goals = [goal_mapping.get(g, g) for g in goals]
+        profile = build_profile(data)
+        if profile is None:
+            return jsonify({'error': 'Invalid input'}), 400
+        
+        goals = normalize_goals(data.get('goals', []))
         
         result = generate_questions(
             data.get('salary'),
@@ -41,6 +141,10 @@ def generate_questions_endpoint():
             goals
         )
         
+        # Score the base profile now, so the answers only rescore what they change
+        result['session_id'] = _session_id(data)
+        advisor.prime_session(result['session_id'], profile)
+        
         return jsonify(result), 200
         
     except Exception as e:
@@ -48,7 +152,11 @@ def generate_questions_endpoint():
 
 @app.route('/api/recommend', methods=['POST'])
 def recommend():
-    """API endpoint to get card recommendations."""
+    """API endpoint to get card recommendations.
+    
+    Pass ?explanations=deferred to get scores immediately; the top cards are
+    explained in the background and fetched from /api/explanations/<explanation_id>.
+    """
     try:
         data = request.json
         
@@ -56,62 +164,142 @@ def recommend():
         if not data or 'salary' not in data:
             return jsonify({'error': 'Invalid input'}), 400
         
-        # Handle goals as object or array
-        goals = data.get('goals', [])
-        if isinstance(goals, dict):
-            # Convert {"cashback": true, "no_fee": true} to ["cashback", "no_fee"]
-            goals = [k for k, v in goals.items() if v]
-        
-        # Map camelCase goal names to snake_case
-        goal_mapping = {
-            'travelMiles': 'travel',
-            'noAnnualFee': 'no_fee',
-            'airportLounge': 'airport_lounge',
-            'diningRewards': 'dining',
-            'premiumBenefits': 'premium',
-            'fuelSavings': 'fuel',
-            'onlineShopping': 'online'
-        }
-        goals = [goal_mapping.get(g, g) for g in goals]
-        
-        profile = {
-            'salary': data.get('salary'),
-            'spend': data.get('spend', {}),
-            'goals': goals,
-            'lifestyle': data.get('lifestyle', {})
-        }
-        
-        # Enrich profile with questionnaire answers if provided
         questionnaire_answers = data.get('questionnaire_answers')
         if questionnaire_answers:
             print(f"[DEBUG] Questionnaire answers received: {questionnaire_answers}")
-            profile = enrich_profile_with_answers(profile, questionnaire_answers)
+        
+        profile = build_profile(data)
+        if profile is None:
+            return jsonify({'error': 'Invalid input'}), 400
+        
+        if questionnaire_answers:
             print(f"[DEBUG] Enriched profile - Goals: {profile.get('goals')}, Lifestyle: {list(profile.get('lifestyle', {}).keys())}")
         
         # Get recommendations
-        result = advisor.recommend(profile)
+        defer = request.args.get('explanations', '').lower() == 'deferred'
+        # Only a session the client carries over (e.g. from generate-questions) is rescored incrementally
+        client_session_id = _client_session_id(data)
+        result = advisor.recommend(profile, defer_explanations=defer, session_id=client_session_id)
+        session_id = client_session_id or new_session_id()
+        
+        result['session_id'] = session_id
+        analytics.track('recommend', session_id, _elapsed_ms(),
+                        salary=profile.get('salary'), goals=profile.get('goals', []), spend=profile.get('spend', {}),
+                        cards=[card['card_name'] for card in result['recommendations']],
+                        top_choices=[card['card_name'] for card in result['top_choices']])
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/explanations/<explanation_id>', methods=['GET'])
+def get_explanations(explanation_id):
+    """Fetch deferred explanations. ?wait=N long-polls up to N seconds for pending ones."""
+    try:
+        timeout = min(float(request.args.get('wait', 0)), 30)
+        result = advisor.get_explanations(explanation_id, timeout=timeout)
+        
+        if result is None:
+            return jsonify({'error': 'Unknown or expired explanation_id'}), 404
         
         return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl')
+
+def _read_batch_payloads():
+    """Yield profile payloads from an NDJSON stream or a JSON array body."""
+    if request.mimetype in NDJSON_MIMETYPES:
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('profiles')
+        if not isinstance(data, list):
+            raise ValueError('Expected a JSON array of profiles or an NDJSON stream')
+        yield from data
+
+@app.route('/api/recommend/batch', methods=['POST'])
+def recommend_batch():
+    """Score many profiles in one call and stream results back as NDJSON.
+    
+    Accepts a JSON array (or {"profiles": [...]}) or an application/x-ndjson body
+    with one profile per line. Each output line carries the input "index".
+    Pass ?explain=false to skip LLM explanations for a pure scoring pass.
+    """
+    explain = request.args.get('explain', 'true').lower() not in ('0', 'false', 'no')
+    payloads = _read_batch_payloads()
+    if request.mimetype not in NDJSON_MIMETYPES:
+        # JSON bodies are parsed up front so a bad payload still gets a 400
+        try:
+            payloads = list(payloads)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        indices = deque()
+        errors = deque()
+        
+        def valid_profiles():
+            for index, data in enumerate(payloads):
+                profile = build_profile(data)
+                if profile is None:
+                    errors.append({'index': index, 'error': 'Invalid input'})
+                    continue
+                indices.append(index)
+                yield profile
+        
+        try:
+            for result in advisor.recommend_batch(valid_profiles(), explain=explain):
+                index = indices.popleft()
+                while errors and errors[0]['index'] < index:
+                    yield json.dumps(errors.popleft()) + '\n'
+                yield json.dumps({'index': index, **result}) + '\n'
+            while errors:
+                yield json.dumps(errors.popleft()) + '\n'
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/filter', methods=['POST'])
 def filter_recommendations():
-    """API endpoint to filter recommendations based on follow-up answers."""
+    """API endpoint to filter recommendations based on follow-up answers.
+    
+    Pass the result_id from /api/recommend to filter its full candidate set
+    server-side; posting the recommendations list itself is still accepted.
+    """
     try:
         data = request.json
         
+        result_id = data.get('result_id')
         recommendations = data.get('recommendations', [])
         filter_type = data.get('filter_type', '')
         choice = data.get('choice', '')
         category = data.get('category', '')
         
-        if not recommendations or not filter_type or not choice:
+        if not (result_id or recommendations) or not filter_type or not choice:
             return jsonify({'error': 'Missing required parameters'}), 400
         
         # Filter recommendations
-        filtered = advisor.filter_recommendations(recommendations, filter_type, choice, category=category)
+        if result_id:
+            filtered = advisor.filter_result(result_id, filter_type, choice, category=category)
+            if filtered is None:
+                return jsonify({'error': 'Unknown or expired result_id'}), 404
+        else:
+            filtered = advisor.filter_recommendations(recommendations, filter_type, choice, category=category)
+        analytics.track('filter', _client_session_id(data), _elapsed_ms(),
+                        filter_type=filter_type, choice=choice, results=len(filtered))
         
         return jsonify({'filtered_recommendations': filtered}), 200
         
@@ -129,20 +317,53 @@ def chat():
             return jsonify({'error': 'Message required'}), 400
         
         response = advisor.chat_turn(message, user_profile)
+        analytics.track('chat', _client_session_id(data), _elapsed_ms(), message_length=len(message))
         
         return jsonify({'response': response}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/track/apply', methods=['POST'])
+def track_apply():
+    """Record an Apply Now click. Accepts text/plain bodies so the frontend can use sendBeacon."""
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict) or not data.get('card_name') or not data.get('session_id'):
+        return jsonify({'error': 'session_id and card_name required'}), 400
+    analytics.track('apply_click', str(data['session_id']), card_name=data['card_name'])
+    return '', 204
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint."""
-    return jsonify({'status': 'healthy'}), 200
+    return jsonify({
+        'status': 'healthy',
+        'catalog_version': advisor.catalog_version,
+        'tiers': advisor.health(),
+        'explanation_cache': advisor.explanation_cache.stats(),
+        'retrieval_cache': advisor.retrieval_cache.stats(),
+        'recommendation_cache': advisor.recommendation_cache.stats(),
+        'session_scores': advisor.session_scores.stats(),
+        'result_store': advisor.result_store.stats()
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics, aggregated across threads and worker processes."""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 only once the retriever, embedding model and LLM client are loaded."""
+    if not advisor.ready:
+        return jsonify({'status': 'warming_up'}), 503
+    return jsonify({'status': 'ready'}), 200
 
 if __name__ == '__main__':
     import sys
     port = 5001  # Default to 5001
     if len(sys.argv) > 1 and sys.argv[1] == '--port' and len(sys.argv) > 2:
         port = int(sys.argv[2])
+    advisor.warm_up_in_background()
+    advisor.watch_catalog()
     app.run(debug=True, port=port)
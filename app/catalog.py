@@ -0,0 +1,150 @@
+"""
+Compiled card catalog index
+Built once from uae_cards.json, card_service_mapping.json, card_apply_urls.json
+and the eligibility rules in uae_cards_detailed.json, so scoring never scans the
+raw mapping dicts per request
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+from app.config import GOAL_CACHE_SIZE
+
+
+class GoalLookups:
+    """Small LRU of per-goal lookups (card ids or masks).
+
+    Goals are free text from clients, so the map is bounded and a goal that
+    matches no card is never stored.
+    """
+
+    def __init__(self, max_size: int = GOAL_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str, compute):
+        """Cached value for key, else compute(); compute() returns None when the goal matches nothing."""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                return value
+        value = compute()
+        if value is not None:
+            with self.lock:
+                self.entries[key] = value
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CatalogIndex:
+    """Lookup tables over the card catalog, keyed by card id (position in the cards list)."""
+
+    def __init__(self, cards: list, service_mapping: dict, apply_urls: dict, detailed_cards: list = None):
+        self.cards = cards
+        self.size = len(cards)
+        self.names = [card["name"] for card in cards]
+
+        self.card_ids = {}
+        for i, name in enumerate(self.names):
+            self.card_ids.setdefault(name, []).append(i)
+
+        # Content hash of each card record, so caches keyed on it go stale when the record changes
+        self.card_hashes = [
+            hashlib.sha1(json.dumps(card, sort_keys=True).encode()).hexdigest() for card in cards
+        ]
+
+        self.apply_url = [apply_urls.get(name, {}).get("apply_url", "") for name in self.names]
+
+        # Co-branded service -> card set, and each card's first co-branded service
+        co_branded = service_mapping.get("co_branded_cards", {})
+        partner_benefits = service_mapping.get("partner_benefits", {})
+        self.co_brand_benefit = {service: info["benefit"] for service, info in co_branded.items()}
+        self.service_cards = {service: self.cards_named([info["card_name"]]) for service, info in co_branded.items()}
+        self.partner_cards = {service: self.cards_named(names) for service, names in partner_benefits.items()}
+        self.card_co_brand_service = {}
+        for service, info in co_branded.items():
+            self.card_co_brand_service.setdefault(info["card_name"], service)
+        self.co_brand_service = [self.card_co_brand_service.get(name) for name in self.names]
+
+        # best_for tag -> card id posting lists, exact and lower-cased (for goal matching)
+        postings = {}
+        lower_postings = {}
+        for i, card in enumerate(cards):
+            for tag in card.get("best_for", []):
+                postings.setdefault(tag, set()).add(i)
+                lower_postings.setdefault(tag.lower(), set()).add(i)
+        self.tag_postings = {tag: np.array(sorted(ids), dtype=int) for tag, ids in postings.items()}
+        self.lower_tag_postings = {tag: np.array(sorted(ids), dtype=int) for tag, ids in lower_postings.items()}
+        self.tags = sorted(self.tag_postings)
+        self._goal_postings = GoalLookups()
+        self.no_cards = np.zeros(0, dtype=int)
+        self.no_cards.setflags(write=False)
+
+        # Cards sorted by min_salary: the cards a salary qualifies for are a prefix of
+        # salary_order, found with one binary search
+        min_salary = np.array([card["min_salary"] for card in cards], dtype=float)
+        self.salary_order = np.argsort(min_salary, kind="stable")
+        self.sorted_min_salary = min_salary[self.salary_order]
+
+        # Age range and employment type rules from the detailed records (matched by name).
+        # Cards without a record, or without a rule, accept everyone.
+        rules = {}
+        for record in detailed_cards or []:
+            rules.setdefault(record.get("name"), record.get("eligibility") or {})
+        eligibility = [rules.get(name, {}) for name in self.names]
+        self.age_min = np.array([rule.get("age_min", 0) for rule in eligibility], dtype=float)
+        self.age_max = np.array([rule.get("age_max", np.inf) for rule in eligibility], dtype=float)
+        self.open_employment = np.array([not rule.get("employment_type") for rule in eligibility], dtype=bool)
+        employment_ids = {}
+        for i, rule in enumerate(eligibility):
+            for employment_type in rule.get("employment_type") or []:
+                employment_ids.setdefault(employment_type, []).append(i)
+        self.employment_masks = {}
+        for employment_type, ids in employment_ids.items():
+            mask = self.open_employment.copy()
+            mask[ids] = True
+            self.employment_masks[employment_type] = mask
+
+    def cards_for_goal(self, goal: str) -> np.ndarray:
+        """Card ids with a best_for tag containing the goal (case-insensitive substring)."""
+        key = goal.lower()
+        ids = self._goal_postings.get(key, lambda: self._match_goal(key))
+        return self.no_cards if ids is None else ids
+
+    def _match_goal(self, key: str):
+        postings = [ids for tag, ids in self.lower_tag_postings.items() if key in tag]
+        return np.unique(np.concatenate(postings)) if postings else None
+
+    def salary_prefix(self, salary) -> int:
+        """How many cards, in salary_order, the salary meets the min_salary of."""
+        return int(np.searchsorted(self.sorted_min_salary, salary, side="right"))
+
+    def employment_mask(self, employment_type: str) -> np.ndarray:
+        """Cards open to the employment type (only unrestricted cards for an unknown type)."""
+        return self.employment_masks.get(employment_type, self.open_employment)
+
+    def eligible(self, salary, age=None, employment_type=None) -> np.ndarray:
+        """Card mask for one applicant: the salary prefix intersected with the age and employment bitsets."""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.salary_order[:self.salary_prefix(salary)]] = True
+        if age is not None:
+            mask &= (self.age_min <= age) & (age <= self.age_max)
+        if employment_type is not None:
+            mask &= self.employment_mask(employment_type)
+        return mask
+
+    def card_hash(self, name: str) -> str:
+        """Content hash of the named card's record ("" for unknown cards)."""
+        ids = self.card_ids.get(name)
+        return self.card_hashes[ids[0]] if ids else ""
+
+    def cards_named(self, names: list) -> np.ndarray:
+        """Card ids for the given card names (unknown names are skipped)."""
+        return np.array(sorted(i for name in names for i in self.card_ids.get(name, [])), dtype=int)
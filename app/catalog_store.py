@@ -0,0 +1,157 @@
+"""
+Hot-reloadable catalog snapshots
+Watches the data directory, compiles a new catalog version in the background
+and swaps it in atomically (read-copy-update): requests grab the current
+snapshot once and finish against it, whatever happens to the files meanwhile
+"""
+import hashlib
+import json
+import os
+import threading
+from app.catalog import CatalogIndex
+from app.config import CATALOG_WATCH_INTERVAL
+from app.scoring import ScoringEngine
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+CARDS_FILE = "uae_cards.json"
+SERVICE_MAPPING_FILE = "card_service_mapping.json"
+APPLY_URLS_FILE = "card_apply_urls.json"
+DETAILED_CARDS_FILE = "uae_cards_detailed.json"
+CATALOG_FILES = (CARDS_FILE, SERVICE_MAPPING_FILE, APPLY_URLS_FILE, DETAILED_CARDS_FILE)
+
+
+def _read(data_dir: str, filename: str):
+    try:
+        with open(os.path.join(data_dir, filename), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def validate_cards(cards) -> list:
+    """Raise ValueError unless every card has the fields scoring relies on."""
+    if not isinstance(cards, list) or not cards:
+        raise ValueError(f"{CARDS_FILE} must be a non-empty list of cards")
+    for i, card in enumerate(cards):
+        for field in ("name", "bank", "annual_fee", "min_salary"):
+            if field not in card:
+                raise ValueError(f"card {i} is missing '{field}'")
+        if not isinstance(card["annual_fee"], (int, float)) or not isinstance(card["min_salary"], (int, float)):
+            raise ValueError(f"card {card['name']!r} has a non-numeric annual_fee or min_salary")
+        rewards = card.get("rewards", {})
+        if not isinstance(rewards, dict) or not all(isinstance(r, (int, float)) for r in rewards.values()):
+            raise ValueError(f"card {card['name']!r} has invalid rewards")
+        if not isinstance(card.get("best_for", []), list):
+            raise ValueError(f"card {card['name']!r} has invalid best_for")
+    return cards
+
+
+class CatalogSnapshot:
+    """One compiled, never-mutated version of the catalog files."""
+
+    def __init__(self, cards: list, service_mapping: dict, apply_urls: dict, version: str,
+                 detailed_cards: list = None):
+        self.version = version
+        self.cards_data = cards
+        self.service_mapping = service_mapping
+        self.apply_urls = apply_urls
+        self.catalog = CatalogIndex(cards, service_mapping, apply_urls, detailed_cards)
+        self.engine = ScoringEngine(self.catalog)
+
+    @classmethod
+    def load(cls, data_dir: str = DATA_DIR) -> "CatalogSnapshot":
+        """Read, validate and compile the data files. Raises ValueError if they are invalid."""
+        raw = [_read(data_dir, filename) for filename in CATALOG_FILES]
+        if raw[0] is None:
+            raise ValueError(f"{CARDS_FILE} not found in {data_dir}")
+        version = hashlib.sha1(b"\0".join(r or b"" for r in raw)).hexdigest()[:12]
+
+        try:
+            cards = validate_cards(json.loads(raw[0]))
+            # A missing mapping / URL file means no co-brands / no apply URLs, as before
+            service_mapping = json.loads(raw[1]) if raw[1] else {"co_branded_cards": {}, "partner_benefits": {}}
+            apply_urls = json.loads(raw[2]).get("cards", {}) if raw[2] else {}
+            # Without detailed records only min_salary restricts eligibility
+            detailed_cards = json.loads(raw[3]) if raw[3] else []
+            if not isinstance(detailed_cards, list):
+                raise ValueError(f"{DETAILED_CARDS_FILE} must be a list of cards")
+            return cls(cards, service_mapping, apply_urls, version, detailed_cards)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid catalog data: {e!r}")
+
+
+class CatalogStore:
+    """Holds the active CatalogSnapshot and replaces it when the data files change.
+
+    Readers just take `store.snapshot`; the reference is swapped in one
+    assignment, so a reader never sees a half-built catalog. Invalid files
+    are logged and the previous snapshot stays active.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, interval: float = CATALOG_WATCH_INTERVAL):
+        self.data_dir = data_dir
+        self.interval = interval
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.watch_thread = None
+        self.signature = self._signature()
+        self.snapshot = CatalogSnapshot.load(data_dir)
+
+    def _signature(self) -> tuple:
+        signature = []
+        for filename in CATALOG_FILES:
+            try:
+                stat = os.stat(os.path.join(self.data_dir, filename))
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def on_swap(self, listener):
+        """Call listener(snapshot) after each new snapshot is activated."""
+        self.listeners.append(listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile if the files changed. Returns True if a new version was activated."""
+        with self.lock:
+            signature = self._signature()
+            if signature == self.signature and not force:
+                return False
+            try:
+                snapshot = CatalogSnapshot.load(self.data_dir)
+            except ValueError as e:
+                print(f"[WARN] Catalog reload rejected, keeping version {self.snapshot.version}: {e}")
+                self.signature = signature
+                return False
+            self.signature = signature
+            if snapshot.version == self.snapshot.version:
+                return False
+            previous = self.snapshot.version
+            self.snapshot = snapshot
+
+        print(f"✓ Catalog reloaded: version {previous} -> {snapshot.version} ({len(snapshot.cards_data)} cards)")
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"[WARN] Catalog reload listener failed: {e}")
+        return True
+
+    def _watch(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"[WARN] Catalog watcher error: {e}")
+
+    def watch(self):
+        """Poll the data files every `interval` seconds in a daemon thread (0 disables)."""
+        if self.interval <= 0 or (self.watch_thread is not None and self.watch_thread.is_alive()):
+            return
+        self.stop_event.clear()
+        self.watch_thread = threading.Thread(target=self._watch, name="catalog-watch", daemon=True)
+        self.watch_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
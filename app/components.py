@@ -0,0 +1,89 @@
+"""
+Lazy component registry
+Heavy dependencies (langchain, Chroma, the embedding model, the Groq client) are
+built on first use or by a background warmup thread, so the scoring endpoints
+boot without them
+"""
+import threading
+import time
+
+
+class LazyComponent:
+    """A value built by `factory` once, on first get(), safe to call from many threads."""
+
+    def __init__(self, name: str, factory):
+        self.name = name
+        self.factory = factory
+        self.value = None
+        self.ready = False
+        self.error = None
+        self.load_seconds = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.ready:
+            return self.value
+        with self.lock:
+            if not self.ready:
+                start = time.perf_counter()
+                try:
+                    self.value = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self.ready = True
+        return self.value
+
+    def status(self) -> dict:
+        status = {"ready": self.ready}
+        if self.load_seconds is not None:
+            status["load_ms"] = round(self.load_seconds * 1000, 1)
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class ComponentRegistry:
+    """Named lazy components, loadable together by warm_up()."""
+
+    def __init__(self):
+        self.components = {}
+        self.warmup_thread = None
+
+    def register(self, name: str, factory) -> LazyComponent:
+        self.components[name] = LazyComponent(name, factory)
+        return self.components[name]
+
+    def get(self, name: str):
+        return self.components[name].get()
+
+    def is_ready(self, name: str = None) -> bool:
+        if name is not None:
+            return self.components[name].ready
+        return all(component.ready for component in self.components.values())
+
+    def warm_up(self, names: list = None):
+        """Load the named components (all by default) in registration order; failures are recorded, not raised."""
+        for component in self.components.values():
+            if names is not None and component.name not in names:
+                continue
+            try:
+                component.get()
+            except Exception as e:
+                print(f"[WARN] Failed to load {component.name}: {e}")
+
+    def reset(self, name: str):
+        """Drop a component's value so the next get() builds it again (e.g. in a forked worker)."""
+        component = self.components[name]
+        self.components[name] = LazyComponent(name, component.factory)
+
+    def warm_up_in_background(self) -> threading.Thread:
+        if self.warmup_thread is None or not self.warmup_thread.is_alive():
+            self.warmup_thread = threading.Thread(target=self.warm_up, name="warmup", daemon=True)
+            self.warmup_thread.start()
+        return self.warmup_thread
+
+    def status(self) -> dict:
+        return {name: component.status() for name, component in self.components.items()}
@@ -6,3 +6,39 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
 CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./.chroma_db")
+RECOMMEND_BATCH_SIZE = int(os.getenv("RECOMMEND_BATCH_SIZE", "256"))
+EXPLANATION_WORKERS = int(os.getenv("EXPLANATION_WORKERS", "8"))
+EXPLANATION_DEADLINE = float(os.getenv("EXPLANATION_DEADLINE", "6"))
+EXPLANATION_JOB_TTL = float(os.getenv("EXPLANATION_JOB_TTL", "300"))
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", "10000"))
+EXPLANATION_CACHE_TTL = float(os.getenv("EXPLANATION_CACHE_TTL", str(7 * 24 * 3600)))
+EXPLANATION_CACHE_DB = os.getenv("EXPLANATION_CACHE_DB", "")
+RESULT_STORE_SIZE = int(os.getenv("RESULT_STORE_SIZE", "2000"))
+RESULT_STORE_TTL = float(os.getenv("RESULT_STORE_TTL", "1800"))
+RESULT_STORE_DB = os.getenv("RESULT_STORE_DB", "")  # shared by serve.py workers; serve.py uses a temp file by default
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "5000"))
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+SESSION_SCORES_SIZE = int(os.getenv("SESSION_SCORES_SIZE", "1000"))
+SESSION_SCORES_TTL = float(os.getenv("SESSION_SCORES_TTL", "1800"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./.embedding_cache.sqlite")
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_SIMILARITY = float(os.getenv("RETRIEVAL_CACHE_SIMILARITY", "0"))
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "5"))
+GOAL_CACHE_SIZE = int(os.getenv("GOAL_CACHE_SIZE", "256"))  # distinct goals memoized per catalog snapshot
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")  # OTLP/JSON lines file, or an OTLP/HTTP URL like http://localhost:4318/v1/traces
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1"))
+METRICS_DIR = os.getenv("METRICS_DIR", "")  # per-process metric shards; serve.py uses a temp dir by default
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+ANALYTICS_PATH = os.getenv("ANALYTICS_PATH", "./.analytics/events.ndjson")  # empty keeps analytics in memory
+ANALYTICS_BUFFER_SIZE = int(os.getenv("ANALYTICS_BUFFER_SIZE", "100000"))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "1"))
+ANALYTICS_ARCHIVE_DIR = os.getenv("ANALYTICS_ARCHIVE_DIR", "./.analytics/archive")
+ANALYTICS_ROLLUP_INTERVAL = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "10"))
+
+# Production server (serve.py)
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5001")
+SERVER_WORKERS = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "120"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
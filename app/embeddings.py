@@ -0,0 +1,102 @@
+"""
+Process-wide embedding provider
+Loads the sentence-transformer model at most once per process, and only on a
+cache miss. Vectors are cached on disk by text hash in SQLite
+"""
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from app.config import EMBEDDING_CACHE_PATH
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+class CachedEmbeddings:
+    """Embeddings interface (embed_documents / embed_query) backed by a text-hash -> vector cache."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, cache_path: str = EMBEDDING_CACHE_PATH):
+        self.model_name = model_name
+        self._model = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.cache_path = cache_path
+        self.db = None
+        self.reopen()
+
+    def reopen(self):
+        """Open a fresh SQLite connection (call in each worker after a fork)."""
+        if not self.cache_path:
+            return
+        self.db = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self.db.commit()
+
+    @property
+    def model(self):
+        """The HuggingFace model, loaded on first use."""
+        with self.lock:
+            if self._model is None:
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                self._model = HuggingFaceEmbeddings(
+                    model_name=self.model_name,
+                    model_kwargs={'device': 'cpu'},
+                    encode_kwargs={'normalize_embeddings': True}
+                )
+            return self._model
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [self._key(text) for text in texts]
+        vectors = {}
+        if self.db is not None and keys:
+            with self.lock:
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    rows = self.db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                    ).fetchall()
+                    vectors.update((key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows)
+
+        missing = [k for k, key in enumerate(keys) if key not in vectors]
+        # Duplicate texts in one call count as one miss
+        unique_missing = list({keys[k]: k for k in missing}.values())
+        self.hits += len(keys) - len(missing)
+        self.misses += len(unique_missing)
+
+        if unique_missing:
+            computed = self.model.embed_documents([texts[k] for k in unique_missing])
+            rows = []
+            for k, vector in zip(unique_missing, computed):
+                # Stored as float32, so fresh and cached vectors are identical
+                vector = np.asarray(vector, dtype=np.float32)
+                vectors[keys[k]] = vector.tolist()
+                rows.append((keys[k], vector.tobytes()))
+            if self.db is not None:
+                with self.lock:
+                    self.db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                    self.db.commit()
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> dict:
+        return {"model_loaded": self._model is not None, "hits": self.hits, "misses": self.misses}
+
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def get_shared_embeddings() -> CachedEmbeddings:
+    """The process-wide embedding provider, shared across CardAdvisor instances."""
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            _embeddings = CachedEmbeddings()
+        return _embeddings
@@ -0,0 +1,525 @@
+"""
+Columnar analytics archive
+Rolls the NDJSON event log (app/analytics.py) into compressed NumPy partitions,
+one directory per UTC day, each part holding dictionary-encoded event columns,
+one row per recommended card, and a JSON summary of pre-aggregated counts.
+query() filters and groups over profile fields and recommended cards;
+dashboard_metrics() merges the part summaries
+
+    python -m app.event_archive rollup
+    python -m app.event_archive query --start 2026-09-01 --end 2026-09-30 --salary 10000 15000 --goals travel --top-choice --group-by card
+"""
+import argparse
+import fcntl
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+from app.config import ANALYTICS_ARCHIVE_DIR, ANALYTICS_PATH, ANALYTICS_ROLLUP_INTERVAL
+
+EVENT_TYPES = ("recommend", "filter", "chat", "apply_click")
+RECOMMEND = EVENT_TYPES.index("recommend")
+MAX_GOALS = 64
+SALARY_BANDS = [5000, 10000, 15000, 20000, 30000, 50000]
+# Latency histogram edges in ms (log-spaced ~10% apart, 0.5 ms .. ~65 s)
+LATENCY_EDGES_MS = np.geomspace(0.5, 65536, 125)
+GROUP_BY = ("card", "goal", "top_spend", "salary_band", "day")
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def salary_band(salary: float) -> str:
+    if salary != salary:
+        return "unknown"
+    i = int(np.searchsorted(SALARY_BANDS, salary, side="right"))
+    low = SALARY_BANDS[i - 1] if i > 0 else 0
+    return f"{low}+" if i == len(SALARY_BANDS) else f"{low}-{SALARY_BANDS[i]}"
+
+
+class _Vocab:
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {v: i for i, v in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def array(self) -> np.ndarray:
+        return np.array(self.values, dtype=str)
+
+
+def _empty_summary() -> dict:
+    return {"events": {}, "recommend_events": 0, "cards_recommended": 0, "apply_clicks": 0,
+            "card_counts": {}, "card_clicks": {}, "top_choice_counts": {}, "goal_counts": {},
+            "converted_sessions": [], "latency_hist": {}}
+
+
+def encode(events: list) -> tuple:
+    """(column arrays, summary) for a batch of events."""
+    sessions, goals, categories, cards = _Vocab(), _Vocab(), _Vocab(), _Vocab()
+    n = len(events)
+    ts = np.empty(n)
+    kind = np.empty(n, dtype=np.int8)
+    session = np.empty(n, dtype=np.int32)
+    salary = np.full(n, np.nan)
+    goal_bits = np.zeros(n, dtype=np.uint64)
+    top_spend = np.full(n, -1, dtype=np.int32)
+    latency = np.full(n, np.nan, dtype=np.float32)
+    card = np.full(n, -1, dtype=np.int32)
+    rec_event, rec_card, rec_rank, rec_top = [], [], [], []
+
+    summary = _empty_summary()
+    counts = {key: Counter() for key in ("events", "card_counts", "card_clicks", "top_choice_counts", "goal_counts")}
+    converted = set()
+    latencies = {}
+
+    for i, event in enumerate(events):
+        event_type = event.get("type")
+        ts[i] = event.get("ts", 0)
+        kind[i] = EVENT_TYPES.index(event_type) if event_type in EVENT_TYPES else -1
+        session[i] = sessions.code(event.get("session_id") or "anonymous")
+        counts["events"][event_type] += 1
+        if event.get("latency_ms") is not None:
+            latency[i] = event["latency_ms"]
+            latencies.setdefault(event_type, []).append(event["latency_ms"])
+
+        if event_type == "recommend":
+            if event.get("salary") is not None:
+                salary[i] = event["salary"]
+            bits = 0
+            for goal in event.get("goals", []):
+                code = goals.code(goal)
+                if code < MAX_GOALS:
+                    bits |= 1 << code
+            goal_bits[i] = bits
+            spend = event.get("spend") or {}
+            if spend:
+                top_spend[i] = categories.code(max(spend, key=spend.get))
+            top_choices = set(event.get("top_choices", []))
+            for rank, name in enumerate(event.get("cards", [])):
+                rec_event.append(i)
+                rec_card.append(cards.code(name))
+                rec_rank.append(rank)
+                rec_top.append(name in top_choices)
+            summary["recommend_events"] += 1
+            summary["cards_recommended"] += len(event.get("cards", []))
+            counts["card_counts"].update(event.get("cards", []))
+            counts["top_choice_counts"].update(top_choices)
+            counts["goal_counts"].update(event.get("goals", []))
+        elif event_type == "apply_click":
+            card[i] = cards.code(event.get("card_name"))
+            summary["apply_clicks"] += 1
+            counts["card_clicks"][event.get("card_name")] += 1
+            converted.add(event.get("session_id") or "anonymous")
+
+    for key, counter in counts.items():
+        summary[key] = dict(counter)
+    summary["converted_sessions"] = sorted(converted)
+    summary["latency_hist"] = {
+        event_type: np.bincount(np.searchsorted(LATENCY_EDGES_MS, values), minlength=len(LATENCY_EDGES_MS) + 1).tolist()
+        for event_type, values in latencies.items()
+    }
+    columns = {
+        "ts": ts, "type": kind, "session": session, "salary": salary, "goals": goal_bits,
+        "top_spend": top_spend, "latency_ms": latency, "card": card,
+        "rec_event": np.array(rec_event, dtype=np.int32), "rec_card": np.array(rec_card, dtype=np.int32),
+        "rec_rank": np.array(rec_rank, dtype=np.int16), "rec_top": np.array(rec_top, dtype=bool),
+        "session_vocab": sessions.array(), "goal_vocab": goals.array(),
+        "category_vocab": categories.array(), "card_vocab": cards.array()
+    }
+    return columns, summary
+
+
+def decode(columns: dict) -> list:
+    """Event dicts back from a part's columns (used when compacting parts)."""
+    sessions, goals = columns["session_vocab"], columns["goal_vocab"]
+    categories, cards = columns["category_vocab"], columns["card_vocab"]
+    recommended = [[] for _ in range(len(columns["ts"]))]
+    top_choices = [[] for _ in range(len(columns["ts"]))]
+    for e, c, top in zip(columns["rec_event"], columns["rec_card"], columns["rec_top"]):
+        recommended[e].append(str(cards[c]))
+        if top:
+            top_choices[e].append(str(cards[c]))
+
+    events = []
+    for i in range(len(columns["ts"])):
+        event_type = EVENT_TYPES[columns["type"][i]] if columns["type"][i] >= 0 else None
+        event = {"ts": float(columns["ts"][i]), "type": event_type, "session_id": str(sessions[columns["session"][i]])}
+        if not np.isnan(columns["latency_ms"][i]):
+            event["latency_ms"] = float(columns["latency_ms"][i])
+        if event_type == "recommend":
+            bits = int(columns["goals"][i])
+            event["salary"] = None if np.isnan(columns["salary"][i]) else float(columns["salary"][i])
+            event["goals"] = [str(goals[b]) for b in range(len(goals)) if bits >> b & 1]
+            if columns["top_spend"][i] >= 0:
+                event["spend"] = {str(categories[columns["top_spend"][i]]): 1}
+            event["cards"] = recommended[i]
+            event["top_choices"] = top_choices[i]
+        elif event_type == "apply_click":
+            event["card_name"] = str(cards[columns["card"][i]])
+        events.append(event)
+    return events
+
+
+def merge_summaries(summaries) -> dict:
+    merged = _empty_summary()
+    counters = {key: Counter() for key in ("events", "card_counts", "card_clicks", "top_choice_counts", "goal_counts")}
+    converted = set()
+    for summary in summaries:
+        merged["recommend_events"] += summary["recommend_events"]
+        merged["cards_recommended"] += summary["cards_recommended"]
+        merged["apply_clicks"] += summary["apply_clicks"]
+        for key, counter in counters.items():
+            counter.update(summary[key])
+        converted.update(summary["converted_sessions"])
+        for event_type, hist in summary["latency_hist"].items():
+            current = merged["latency_hist"].get(event_type)
+            merged["latency_hist"][event_type] = hist if current is None else [a + b for a, b in zip(current, hist)]
+    for key, counter in counters.items():
+        merged[key] = dict(counter)
+    merged["converted_sessions"] = sorted(converted)
+    return merged
+
+
+def _hist_percentile(hist: list, q: float) -> float:
+    cumulative = np.cumsum(hist)
+    i = int(np.searchsorted(cumulative, q / 100 * cumulative[-1]))
+    if i == 0:
+        return float(LATENCY_EDGES_MS[0])
+    if i >= len(LATENCY_EDGES_MS):
+        return float(LATENCY_EDGES_MS[-1])
+    # Geometric midpoint of the bucket
+    return float(np.sqrt(LATENCY_EDGES_MS[i - 1] * LATENCY_EDGES_MS[i]))
+
+
+class Part:
+    """One immutable partition file, loaded once and cached."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.day = os.path.basename(os.path.dirname(path))[len("day="):]
+        with np.load(path) as data:
+            self.columns = {key: data[key] for key in data.files}
+        with open(path[:-len(".npz")] + ".json", "r") as f:
+            self.summary = json.load(f)
+
+
+class EventArchive:
+    """Day-partitioned columnar archive under root/day=YYYY-MM-DD/part-NNNNNN.npz."""
+
+    def __init__(self, root: str = ANALYTICS_ARCHIVE_DIR, rollup_interval: float = ANALYTICS_ROLLUP_INTERVAL,
+                 max_parts: int = 16):
+        self.root = root
+        self.rollup_interval = rollup_interval
+        self.max_parts = max_parts
+        self.parts = {}
+        self.sessions = set()
+        self.session_parts = set()
+        self.last_rollup = 0
+
+    @contextmanager
+    def _locked(self):
+        # Several API workers or dashboards may roll up concurrently
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _state(self) -> dict:
+        try:
+            with open(os.path.join(self.root, "state.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"offsets": {}}
+
+    def _save_state(self, state: dict):
+        path = os.path.join(self.root, "state.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def _part_paths(self, day: str) -> list:
+        directory = os.path.join(self.root, f"day={day}")
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".npz"))
+
+    def _write_part(self, day: str, events: list):
+        directory = os.path.join(self.root, f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        existing = self._part_paths(day)
+        number = int(os.path.basename(existing[-1])[5:11]) + 1 if existing else 0
+        base = os.path.join(directory, f"part-{number:06d}")
+        columns, summary = encode(events)
+        # Summary first: a part is only visible once its .npz exists
+        with open(base + ".json", "w") as f:
+            json.dump(summary, f)
+        np.savez_compressed(base + ".tmp.npz", **columns)
+        os.replace(base + ".tmp.npz", base + ".npz")
+
+    def _compact(self, day: str):
+        """Merge a day's parts into one."""
+        paths = self._part_paths(day)
+        events = [event for path in paths for event in decode(Part(path).columns)]
+        self._write_part(day, events)
+        for path in paths:
+            os.remove(path)
+            os.remove(path[:-len(".npz")] + ".json")
+            self.parts.pop(path, None)
+
+    def roll_up(self, log_path: str = ANALYTICS_PATH, force: bool = False) -> int:
+        """Archive log lines added since the last roll-up. Returns the number of events archived."""
+        if not log_path or (not force and time.time() - self.last_rollup < self.rollup_interval):
+            return 0
+        self.last_rollup = time.time()
+        with self._locked():
+            state = self._state()
+            key = os.path.abspath(log_path)
+            offset = state["offsets"].get(key, 0)
+            try:
+                with open(log_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            except OSError:
+                return 0
+            end = data.rfind(b"\n") + 1
+            by_day = {}
+            for line in data[:end].splitlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                by_day.setdefault(_day(event.get("ts", 0)), []).append(event)
+
+            for day, events in sorted(by_day.items()):
+                self._write_part(day, events)
+            state["offsets"][key] = offset + end
+            self._save_state(state)
+
+            today = _day(time.time())
+            for day in by_day:
+                if len(self._part_paths(day)) > (1 if day < today else self.max_parts):
+                    self._compact(day)
+        return sum(len(events) for events in by_day.values())
+
+    def _load(self, start: str = None, end: str = None) -> list:
+        """Cached parts whose day is within [start, end] (YYYY-MM-DD, inclusive)."""
+        if not os.path.isdir(self.root):
+            return []
+        paths = []
+        for name in sorted(os.listdir(self.root)):
+            day = name[len("day="):]
+            if name.startswith("day=") and (start is None or day >= start) and (end is None or day <= end):
+                paths.extend(self._part_paths(day))
+        for path in set(self.parts) - set(paths):
+            if not os.path.exists(path):
+                del self.parts[path]
+        parts = []
+        for path in paths:
+            if path not in self.parts:
+                try:
+                    self.parts[path] = Part(path)
+                except (OSError, ValueError):
+                    continue
+            parts.append(self.parts[path])
+        return parts
+
+    def query(self, start: str = None, end: str = None, salary: tuple = None, goals: list = None,
+              any_goals: list = None, top_spend: str = None, cards: list = None, top_choice: bool = None,
+              group_by=("card",), limit: int = None) -> list:
+        """Group recommended-card rows of recommend events.
+
+        Filters: day range, salary (low, high) inclusive, goals (all of) / any_goals,
+        the profile's top spend category, recommended card names, top-choice only.
+        Each row is {<group_by fields>, "count": recommended-card rows, "events": recommend events}.
+        """
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        for dim in group_by:
+            if dim not in GROUP_BY:
+                raise ValueError(f"group_by must be among {GROUP_BY}, got {dim!r}")
+
+        totals = {}
+        for part in self._load(start, end):
+            c = part.columns
+            goal_vocab = [str(g) for g in c["goal_vocab"]]
+            event_mask = c["type"] == RECOMMEND
+            if salary is not None:
+                event_mask &= (c["salary"] >= salary[0]) & (c["salary"] <= salary[1])
+            if goals:
+                if any(g not in goal_vocab for g in goals):
+                    continue
+                bits = np.uint64(sum(1 << goal_vocab.index(g) for g in goals))
+                event_mask &= (c["goals"] & bits) == bits
+            if any_goals:
+                bits = np.uint64(sum(1 << goal_vocab.index(g) for g in any_goals if g in goal_vocab))
+                event_mask &= (c["goals"] & bits) != 0
+            if top_spend is not None:
+                categories = list(c["category_vocab"])
+                event_mask &= c["top_spend"] == (categories.index(top_spend) if top_spend in categories else -2)
+
+            rows = event_mask[c["rec_event"]]
+            if top_choice:
+                rows &= c["rec_top"]
+            if cards:
+                rows &= np.isin(c["rec_card"], [i for i, name in enumerate(c["card_vocab"]) if name in cards])
+            row_ids = np.flatnonzero(rows)
+            self._group(part, row_ids, group_by, goal_vocab, totals)
+
+        results = [dict(zip(group_by, key), count=v[0], events=v[1]) for key, v in totals.items()]
+        results.sort(key=lambda r: (-r["count"], [str(r[d]) for d in group_by]))
+        return results[:limit] if limit else results
+
+    def _group(self, part: Part, row_ids: np.ndarray, group_by: list, goal_vocab: list, totals: dict):
+        c = part.columns
+        events = c["rec_event"][row_ids]
+        if "goal" in group_by:
+            # A profile with several goals counts once under each of them
+            exploded = [(row_ids[(c["goals"][events] >> np.uint64(b)) & np.uint64(1) == 1], b) for b in range(len(goal_vocab))]
+            row_ids = np.concatenate([r for r, _ in exploded]) if exploded else row_ids[:0]
+            goal_codes = np.concatenate([np.full(len(r), b) for r, b in exploded]) if exploded else row_ids[:0]
+            events = c["rec_event"][row_ids]
+
+        codes, labels = [], []
+        for dim in group_by:
+            if dim == "card":
+                codes.append(c["rec_card"][row_ids])
+                labels.append([str(v) for v in c["card_vocab"]])
+            elif dim == "goal":
+                codes.append(goal_codes)
+                labels.append(goal_vocab)
+            elif dim == "top_spend":
+                codes.append(c["top_spend"][events] + 1)
+                labels.append(["unknown"] + [str(v) for v in c["category_vocab"]])
+            elif dim == "salary_band":
+                salaries = c["salary"][events]
+                band = np.searchsorted(SALARY_BANDS, np.nan_to_num(salaries, nan=-1), side="right")
+                codes.append(np.where(np.isnan(salaries), len(SALARY_BANDS) + 1, band))
+                labels.append([salary_band(v) for v in [0] + SALARY_BANDS] + ["unknown"])
+            elif dim == "day":
+                codes.append(np.zeros(len(row_ids), dtype=np.int64))
+                labels.append([part.day])
+
+        # One int64 key per row (mixed radix over the dimensions), then a single np.unique
+        key = np.zeros(len(row_ids), dtype=np.int64)
+        for code, label in zip(codes, labels):
+            key = key * len(label) + code
+        unique, counts = np.unique(key, return_counts=True)
+        event_keys = np.unique(np.stack([key, events.astype(np.int64)]), axis=1)[0] if len(key) else key
+        unique_events, event_counts = np.unique(event_keys, return_counts=True)
+        events_by_key = dict(zip(unique_events.tolist(), event_counts.tolist()))
+
+        for k, count in zip(unique.tolist(), counts.tolist()):
+            group, rest = [], k
+            for label in reversed(labels):
+                group.append(label[rest % len(label)])
+                rest //= len(label)
+            group = tuple(reversed(group))
+            current = totals.get(group, (0, 0))
+            totals[group] = (current[0] + count, current[1] + events_by_key[k])
+
+    def dashboard_metrics(self, top: int = 10, recent: int = 20) -> dict:
+        """The AnalyticsTracker.get_metrics() shape, from part summaries and the newest rows."""
+        parts = self._load()
+        summary = merge_summaries(part.summary for part in parts)
+        # Sessions are the ones with a recommend event, as in RollingAggregates.
+        # Compaction rewrites parts with the same sessions, so the union only ever grows
+        for part in parts:
+            if part.path not in self.session_parts:
+                c = part.columns
+                self.sessions.update(c["session_vocab"][np.unique(c["session"][c["type"] == RECOMMEND])].tolist())
+                self.session_parts.add(part.path)
+        sessions = self.sessions
+        converted = set(summary["converted_sessions"])
+
+        recent_sessions, seen = [], set()
+        for part in reversed(parts):
+            c = part.columns
+            cards_per_event = np.bincount(c["rec_event"], minlength=len(c["ts"]))
+            goal_vocab = [str(g) for g in c["goal_vocab"]]
+            for i in np.flatnonzero(c["type"] == RECOMMEND)[::-1]:
+                if len(recent_sessions) >= recent:
+                    break
+                session_id = str(c["session_vocab"][c["session"][i]])
+                if session_id in seen:
+                    continue
+                seen.add(session_id)
+                bits = int(c["goals"][i])
+                recent_sessions.append({
+                    "session_id": session_id,
+                    "salary": None if np.isnan(c["salary"][i]) else float(c["salary"][i]),
+                    "goals": [goal_vocab[b] for b in range(len(goal_vocab)) if bits >> b & 1],
+                    "cards_recommended": int(cards_per_event[i]),
+                    "applied": session_id in converted
+                })
+            if len(recent_sessions) >= recent:
+                break
+
+        card_counts = Counter(summary["card_counts"])
+        return {
+            "total_sessions": len(sessions),
+            "conversion_rate": round(len(converted & sessions) / len(sessions) * 100, 1) if sessions else 0,
+            "avg_recommendations": round(summary["cards_recommended"] / summary["recommend_events"], 1) if summary["recommend_events"] else 0,
+            "total_apply_clicks": summary["apply_clicks"],
+            "top_cards": [
+                {"card_name": name, "count": count, "click_rate": round(summary["card_clicks"].get(name, 0) / count * 100, 1)}
+                for name, count in card_counts.most_common(top)
+            ],
+            "recent_sessions": recent_sessions,
+            "goal_frequencies": dict(Counter(summary["goal_counts"]).most_common()),
+            "events": summary["events"],
+            "latency_ms": {
+                event_type: {f"p{q}": round(_hist_percentile(hist, q), 1) for q in (50, 95, 99)}
+                for event_type, hist in summary["latency_hist"].items()
+            }
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roll up and query the analytics archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rollup = sub.add_parser("rollup", help="archive new lines of the event log")
+    rollup.add_argument("--log", default=ANALYTICS_PATH)
+    q = sub.add_parser("query", help="filter and group recommended cards")
+    q.add_argument("--start")
+    q.add_argument("--end")
+    q.add_argument("--salary", type=float, nargs=2, metavar=("LOW", "HIGH"))
+    q.add_argument("--goals", nargs="+")
+    q.add_argument("--any-goals", nargs="+")
+    q.add_argument("--top-spend")
+    q.add_argument("--cards", nargs="+")
+    q.add_argument("--top-choice", action="store_true")
+    q.add_argument("--group-by", nargs="+", default=["card"], choices=GROUP_BY)
+    q.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    archive = EventArchive()
+    if args.command == "rollup":
+        print(f"✓ Archived {archive.roll_up(args.log, force=True)} events into {archive.root}")
+        return 0
+    start = time.perf_counter()
+    rows = archive.query(args.start, args.end, salary=args.salary, goals=args.goals, any_goals=args.any_goals,
+                         top_spend=args.top_spend, cards=args.cards, top_choice=args.top_choice or None,
+                         group_by=args.group_by, limit=args.limit)
+    for row in rows:
+        print(json.dumps(row))
+    print(f"({len(rows)} rows in {(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
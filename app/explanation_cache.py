@@ -0,0 +1,131 @@
+"""
+Content-addressed cache for LLM card explanations
+Keyed on the card record's content hash and a coarse profile fingerprint, so
+near-identical profiles share one LLM call per card
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from app.config import EXPLANATION_CACHE_SIZE, EXPLANATION_CACHE_TTL, EXPLANATION_CACHE_DB
+from app.scoring import parse_lifestyle_entry
+
+# Monthly spend (AED) bucket edges; amounts within a bucket share cache entries
+SPEND_BUCKETS = [500, 1000, 2000, 3000, 5000, 10000]
+
+
+def spend_bucket(amount) -> int:
+    return bisect_right(SPEND_BUCKETS, amount)
+
+
+def spend_range(bucket: int) -> str:
+    """Monthly spend range a bucket covers, as quoted in explanation prompts."""
+    if bucket == 0:
+        return f"under {SPEND_BUCKETS[0]} AED/month"
+    if bucket == len(SPEND_BUCKETS):
+        return f"{SPEND_BUCKETS[-1]}+ AED/month"
+    return f"{SPEND_BUCKETS[bucket - 1]}-{SPEND_BUCKETS[bucket]} AED/month"
+
+
+def profile_fingerprint(user_profile: dict) -> dict:
+    """The parts of a profile the explanation prompt uses, normalized.
+
+    The prompt is built from this fingerprint alone, so a cached explanation
+    never quotes figures from another profile.
+    """
+    spend = user_profile.get("spend", {})
+    top_spending = sorted(spend.items(), key=lambda x: x[1], reverse=True)[:3]
+    lifestyle = user_profile.get("lifestyle", {}) or {}
+    return {
+        "spend": sorted((category, spend_bucket(amount)) for category, amount in top_spending),
+        "goals": sorted(set(user_profile.get("goals", []))),
+        "lifestyle": {
+            category: sorted(str(parse_lifestyle_entry(s)[0]) for s in services)
+            for category, services in sorted(lifestyle.items())
+        }
+    }
+
+
+def cache_key(card_hash: str, user_profile: dict) -> str:
+    payload = json.dumps([card_hash, profile_fingerprint(user_profile)], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ExplanationCache:
+    """LRU/TTL in-process cache with an optional SQLite tier that survives restarts."""
+
+    def __init__(self, max_size: int = EXPLANATION_CACHE_SIZE, ttl: float = EXPLANATION_CACHE_TTL,
+                 db_path: str = EXPLANATION_CACHE_DB):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db_path = db_path
+        self.db = None
+        self.reopen()
+
+    def reopen(self):
+        """Open a fresh SQLite connection (call in each worker after a fork)."""
+        if not self.db_path:
+            return
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS explanations (key TEXT PRIMARY KEY, text TEXT, created REAL)"
+        )
+        self.db.commit()
+
+    def get(self, key: str):
+        """Cached explanation for the key, or None."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT text, created FROM explanations WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] < self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, text: str):
+        now = time.time()
+        with self.lock:
+            self._remember(key, text, now)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO explanations (key, text, created) VALUES (?, ?, ?)", (key, text, now)
+                )
+                self.db.execute("DELETE FROM explanations WHERE created < ?", (now - self.ttl,))
+                self.db.commit()
+
+    def _remember(self, key: str, text: str, created: float):
+        self.entries[key] = (text, created)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
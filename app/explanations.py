@@ -0,0 +1,158 @@
+"""
+Parallel LLM explanation stage
+Fires the explanation prompts for a result's top cards concurrently on a shared
+thread pool and falls back to the template explanation once the deadline passes
+"""
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from app.config import EXPLANATION_WORKERS, EXPLANATION_DEADLINE, EXPLANATION_JOB_TTL
+from app.explanation_cache import cache_key
+from app.metrics import EXPLANATION_FALLBACKS, LLM_CALLS, LLM_ERRORS, LLM_LATENCY
+from app.tracing import span
+
+_calls = LLM_CALLS.labels("explanation")
+_errors = LLM_ERRORS.labels("explanation")
+_latency = LLM_LATENCY.labels("explanation")
+
+
+def fallback_explanation(card: dict) -> str:
+    """Deterministic explanation used when the LLM fails or misses its deadline."""
+    return f"This card matches your {card.get('recommendation_type', 'spending')} profile with a {card['fit_score']} fit score."
+
+
+class ExplanationService:
+    """Generate card explanations in parallel, either inline or as a deferred job.
+
+    llm_agent is the LLMAgent, or a zero-argument callable returning it so the
+    client is only built when the first explanation is needed. With a cache,
+    explanations are looked up by (card record hash, profile fingerprint)
+    first; only misses reach the LLM. card_hash maps a card name to its record
+    hash. Template fallbacks are never cached.
+    """
+
+    def __init__(self, llm_agent, cache=None, card_hash=None, max_workers: int = EXPLANATION_WORKERS,
+                 deadline: float = EXPLANATION_DEADLINE, job_ttl: float = EXPLANATION_JOB_TTL):
+        self.get_llm_agent = llm_agent if callable(llm_agent) else (lambda: llm_agent)
+        self.cache = cache
+        self.card_hash = card_hash
+        self.deadline = deadline
+        self.job_ttl = job_ttl
+        self.max_workers = max_workers
+        self.restart()
+
+    def restart(self):
+        """Fresh thread pool and job table (threads do not survive a fork)."""
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="explain")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def _submit(self, cards: list, user_profile: dict) -> list:
+        futures = []
+        for card in cards:
+            key = None
+            if self.cache is not None and self.card_hash is not None:
+                key = cache_key(self.card_hash(card["card_name"]), user_profile)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    future = Future()
+                    future.set_result(cached)
+                    futures.append(future)
+                    continue
+            # Cards are copied so later edits to the result don't race the prompt builder;
+            # the context carries the request's trace into the worker thread
+            futures.append(self.executor.submit(contextvars.copy_context().run, self._generate, dict(card), user_profile, key))
+        return futures
+
+    def _generate(self, card: dict, user_profile: dict, key: str) -> str:
+        _calls.inc()
+        try:
+            with span("llm.explanation", card=card["card_name"]), _latency.time():
+                text = self.get_llm_agent().generate_card_explanation(card, user_profile)
+        except Exception:
+            _errors.inc()
+            raise
+        if text == fallback_explanation(card):
+            # LLMAgent answers with the template when the call fails
+            _errors.inc()
+            EXPLANATION_FALLBACKS.labels("llm_error").inc()
+        elif key is not None:
+            self.cache.set(key, text)
+        return text
+
+    @staticmethod
+    def _collect(futures: list, cards: list, record: bool = True) -> list:
+        explanations = []
+        for future, card in zip(futures, cards):
+            if future.done() and not future.cancelled() and future.exception() is None:
+                explanations.append(future.result())
+            else:
+                if record:
+                    EXPLANATION_FALLBACKS.labels("error" if future.done() else "deadline").inc()
+                future.cancel()
+                explanations.append(fallback_explanation(card))
+        return explanations
+
+    def explain(self, cards: list, user_profile: dict, deadline: float = None) -> list:
+        """Explanations for the cards, in order, waiting at most `deadline` seconds."""
+        if not cards:
+            return []
+        futures = self._submit(cards, user_profile)
+        wait(futures, timeout=self.deadline if deadline is None else deadline)
+        return self._collect(futures, cards)
+
+    def start(self, cards: list, user_profile: dict) -> str:
+        """Start explaining the cards in the background and return a job id to poll."""
+        self._expire_jobs()
+        job_id = uuid.uuid4().hex
+        job = {
+            "cards": [dict(card) for card in cards],
+            "futures": self._submit(cards, user_profile),
+            "created": time.time(),
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+        return job_id
+
+    def poll(self, job_id: str, timeout: float = 0) -> dict:
+        """Current state of a deferred job, or None if it is unknown or expired.
+
+        Waits up to `timeout` seconds (bounded by the job deadline) for pending
+        explanations. After the deadline, unfinished cards get the template.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        remaining = job["created"] + self.deadline - time.time()
+        futures = job["futures"]
+        if timeout > 0 and remaining > 0:
+            wait(futures, timeout=min(timeout, remaining))
+            remaining = job["created"] + self.deadline - time.time()
+
+        if remaining <= 0 or all(f.done() for f in futures):
+            # Count fallbacks once, however often a finished job is polled
+            explanations = self._collect(futures, job["cards"], record=not job.get("collected"))
+            job["collected"] = True
+            status = "complete"
+        else:
+            explanations = [f.result() if f.done() and f.exception() is None else None for f in futures]
+            status = "pending"
+
+        return {
+            "explanation_id": job_id,
+            "status": status,
+            "explanations": [
+                {"card_name": card["card_name"], "ai_explanation": text}
+                for card, text in zip(job["cards"], explanations)
+            ]
+        }
+
+    def _expire_jobs(self):
+        cutoff = time.time() - self.job_ttl
+        with self.lock:
+            for job_id in [j for j, job in self.jobs.items() if job["created"] < cutoff]:
+                del self.jobs[job_id]
@@ -1,6 +1,8 @@
 import os
 from langchain_groq import ChatGroq
 from langchain.schema import HumanMessage, SystemMessage
+from app.explanation_cache import profile_fingerprint, spend_range
+from app.explanations import fallback_explanation
 
 SYSTEM_PROMPT = """You are an expert UAE credit card advisor providing personalized insights and explanations.
 
@@ -77,14 +79,17 @@ class LLMAgent:
         )
     
     def generate_card_explanation(self, card: dict, user_profile: dict) -> str:
-        """Generate personalized explanation for why a card is recommended."""
-        goals = user_profile.get("goals", [])
-        spend = user_profile.get("spend", {})
-        lifestyle = user_profile.get("lifestyle", {})
+        """Generate personalized explanation for why a card is recommended.
         
-        top_spending = sorted(spend.items(), key=lambda x: x[1], reverse=True)[:3]
-        spending_text = ', '.join([f"{k.replace('_', ' ')}: {v} AED/month" for k, v in top_spending])
-        lifestyle_text = ", ".join([f"{k}: {[s.get('service') if isinstance(s, dict) else s for s in v]}" for k, v in lifestyle.items()]) if lifestyle else "None"
+        Explanations are cached per card and profile fingerprint, so the prompt only
+        uses the fingerprint (spend ranges, goals, services) and the card record.
+        Exact amounts, the fit score and the estimated value are shown next to it.
+        """
+        fingerprint = profile_fingerprint(user_profile)
+        goals = fingerprint["goals"]
+        spending_text = ', '.join([f"{k.replace('_', ' ')}: {spend_range(bucket)}" for k, bucket in fingerprint["spend"]])
+        lifestyle = fingerprint["lifestyle"]
+        lifestyle_text = ", ".join([f"{k}: {v}" for k, v in lifestyle.items()]) if lifestyle else "None"
         
         # Extract conditions from card notes
         conditions = ""
@@ -104,9 +109,7 @@ Card Details:
 - Annual Fee: {card['annual_fee']} AED
 - Rewards: {card.get('rewards', {})}
 - Best for: {', '.join(card.get('best_for', []))}
-- Notes: {card.get('notes', 'N/A')}
-- Fit Score: {card['fit_score']}
-- Estimated Value: {card.get('estimated_annual_value', 'N/A')}{conditions}
+- Notes: {card.get('notes', 'N/A')}{conditions}
 
 Provide a personalized, conversational explanation. If there are membership requirements or conditions, mention them clearly."""
 
@@ -119,7 +122,7 @@ Provide a personalized, conversational explanation. If there are membership requ
             response = self.llm.invoke(messages)
             return response.content
         except Exception as e:
-            return f"This card matches your {card.get('recommendation_type', 'spending')} profile with a {card['fit_score']} fit score."
+            return fallback_explanation(card)
     
     def generate_explanation(self, card_name: str, reasons: list, user_profile: dict) -> str:
         """Generate natural language explanation for why a card is recommended."""
@@ -0,0 +1,374 @@
+"""
+Prometheus-style metrics
+Counters, gauges and histograms keep one value cell per thread, so recording is
+a plain list update with no shared lock. Cells are summed on scrape. Under the
+multi-worker server each process also writes its totals to METRICS_DIR, and a
+scrape of any worker aggregates every process's file
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from app.config import METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Shards:
+    """Per-thread value cells; only the owning thread ever writes its cell."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.local = threading.local()
+        self.cells = []
+
+    def cell(self) -> list:
+        try:
+            return self.local.cell
+        except AttributeError:
+            cell = [0.0] * self.size
+            with self.lock:
+                self.cells.append(cell)
+            self.local.cell = cell
+            return cell
+
+    def total(self) -> list:
+        with self.lock:
+            cells = list(self.cells)
+        return [sum(cell[i] for cell in cells) for i in range(self.size)]
+
+
+class Metric:
+    kind = None
+    aggregate = "sum"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        if not self.labelnames:
+            self.default = self.labels()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, self._child())
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def reset(self):
+        for child in list(self.children.values()):
+            child.shards.reset()
+
+    def collect(self) -> dict:
+        """{label values: [cell totals]} for this process."""
+        return {labels: child.shards.total() for labels, child in list(self.children.items())}
+
+
+class _CounterChild:
+    __slots__ = ("shards",)
+
+    def __init__(self):
+        self.shards = _Shards(1)
+
+    def inc(self, amount: float = 1):
+        self.shards.cell()[0] += amount
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.default.inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self.shards.cell()[0] -= amount
+
+
+class Gauge(Metric):
+    """Gauge summed across threads and live processes (e.g. in-flight requests)."""
+    kind = "gauge"
+
+    def _child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1):
+        self.default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self.default.dec(amount)
+
+
+class _HistogramChild:
+    __slots__ = ("shards", "buckets")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # One count per bucket plus +Inf, then sum and count
+        self.shards = _Shards(len(buckets) + 3)
+
+    def observe(self, value: float):
+        cell = self.shards.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.default.observe(value)
+
+    def time(self):
+        return self.default.time()
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge read from `function() -> {label values tuple: value}` on scrape.
+
+    aggregate="max" merges processes by maximum instead of sum (e.g. an info gauge).
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: tuple, function, aggregate: str = "sum"):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self.aggregate = aggregate
+
+    def reset(self):
+        pass
+
+    def collect(self) -> dict:
+        try:
+            return {tuple(str(v) for v in labels): [float(value)] for labels, value in self.function().items()}
+        except Exception as e:
+            print(f"[WARN] Metric {self.name} callback failed: {e}")
+            return {}
+
+
+class Ratio:
+    """numerator / (numerator + other), computed on scrape from aggregated counters (e.g. cache hit ratio)."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, numerator: str, other: str):
+        self.name = name
+        self.help = help
+        self.numerator = numerator
+        self.other = other
+
+
+class MetricsRegistry:
+    """The process's metrics, rendered in the Prometheus text format.
+
+    With a directory, totals are also written to <directory>/<pid>.json every
+    flush_interval seconds and a scrape merges all processes' files. Gauges of
+    processes that have exited are dropped; their counters and histograms stay.
+    """
+
+    def __init__(self, directory: str = METRICS_DIR, flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        self.metrics = {}
+        self.ratios = []
+        self.flush_thread = None
+        self.stop_event = threading.Event()
+
+    def register(self, metric):
+        if isinstance(metric, Ratio):
+            self.ratios.append(metric)
+        else:
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, kind: str, labelnames: tuple, function, aggregate: str = "sum") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, kind, labelnames, function, aggregate))
+
+    def ratio(self, name: str, help: str, numerator: str, other: str) -> Ratio:
+        return self.register(Ratio(name, help, numerator, other))
+
+    def reset_after_fork(self):
+        """Start this worker from zero and begin writing its shard file."""
+        for metric in self.metrics.values():
+            metric.reset()
+        self.flush_thread = None
+        self.start()
+
+    def start(self):
+        if not self.directory or (self.flush_thread is not None and self.flush_thread.is_alive()):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.stop_event.clear()
+        self.flush_thread = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self.flush_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _flush_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[WARN] Metrics flush failed: {e}")
+
+    def _local(self) -> dict:
+        return {
+            name: [[list(labels), values] for labels, values in metric.collect().items()]
+            for name, metric in self.metrics.items()
+        }
+
+    def flush(self):
+        """Write this process's totals to its shard file (atomic replace)."""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pid": os.getpid(), "metrics": self._local()}, f)
+        os.replace(tmp, path)
+
+    def _shards(self) -> list:
+        """[(is_live, {name: [[labels, values], ...]})] for every process."""
+        shards = [(True, self._local())]
+        if not self.directory or not os.path.isdir(self.directory):
+            return shards
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json") or filename == f"{os.getpid()}.json":
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), "r") as f:
+                    shard = json.load(f)
+            except (OSError, ValueError):
+                continue
+            shards.append((_alive(shard["pid"]), shard["metrics"]))
+        return shards
+
+    def aggregate(self) -> dict:
+        """{name: {label values: [summed values]}} across threads and processes."""
+        totals = {name: {} for name in self.metrics}
+        for live, shard in self._shards():
+            for name, samples in shard.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not live):
+                    continue
+                for labels, values in samples:
+                    key = tuple(labels)
+                    current = totals[name].get(key)
+                    if current is None:
+                        totals[name][key] = values
+                    elif metric.aggregate == "max":
+                        totals[name][key] = [max(a, b) for a, b in zip(current, values)]
+                    else:
+                        totals[name][key] = [a + b for a, b in zip(current, values)]
+        return totals
+
+    def render(self) -> str:
+        totals = self.aggregate()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, values in sorted(totals[name].items()):
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(list(metric.buckets) + ["+Inf"], values):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(pairs + [('le', bound)])} {_number(cumulative)}")
+                    lines.append(f"{name}_sum{_labels(pairs)} {_number(values[-2])}")
+                    lines.append(f"{name}_count{_labels(pairs)} {_number(values[-1])}")
+                else:
+                    lines.append(f"{name}{_labels(pairs)} {_number(values[0])}")
+
+        for ratio in self.ratios:
+            numerator = self.metrics[ratio.numerator]
+            other = totals[ratio.other]
+            lines.append(f"# HELP {ratio.name} {ratio.help}")
+            lines.append(f"# TYPE {ratio.name} gauge")
+            for labels, values in sorted(totals[ratio.numerator].items()):
+                lookups = values[0] + other.get(labels, [0])[0]
+                value = values[0] / lookups if lookups else 0
+                lines.append(f"{ratio.name}{_labels(list(zip(numerator.labelnames, labels)))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _labels(pairs: list) -> str:
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter("http_requests_total", "API requests by endpoint, method and status",
+                                 ("endpoint", "method", "status"))
+HTTP_LATENCY = registry.histogram("http_request_duration_seconds", "API request latency", ("endpoint",))
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "API requests currently being handled", ("endpoint",))
+LLM_CALLS = registry.counter("llm_calls_total", "LLM calls by purpose", ("kind",))
+LLM_LATENCY = registry.histogram("llm_call_duration_seconds", "LLM call latency", ("kind",))
+LLM_ERRORS = registry.counter("llm_errors_total", "Failed LLM calls", ("kind",))
+EXPLANATION_FALLBACKS = registry.counter("explanation_fallbacks_total",
+                                         "Template explanations served instead of LLM output", ("reason",))
+RETRIEVER_LATENCY = registry.histogram("retriever_duration_seconds", "Vector store retrieval latency (cache misses)")
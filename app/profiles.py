@@ -0,0 +1,83 @@
+"""
+Profile vocabulary shared by the API and tooling
+"""
+import hashlib
+import json
+from app.scoring import parse_lifestyle_entry
+
+# Map camelCase goal names to snake_case
+GOAL_MAPPING = {
+    'travelMiles': 'travel',
+    'noAnnualFee': 'no_fee',
+    'airportLounge': 'airport_lounge',
+    'diningRewards': 'dining',
+    'premiumBenefits': 'premium',
+    'fuelSavings': 'fuel',
+    'onlineShopping': 'online'
+}
+
+def normalize_goals(goals):
+    """Accept goals as an array or a {"goal": true} object and map camelCase names."""
+    if isinstance(goals, dict):
+        # Convert {"cashback": true, "no_fee": true} to ["cashback", "no_fee"]
+        goals = [k for k, v in goals.items() if v]
+    return [GOAL_MAPPING.get(g, g) for g in goals]
+
+
+# Employment types used by the eligibility rules in uae_cards_detailed.json
+EMPLOYMENT_TYPES = ("salaried", "self_employed")
+
+def normalize_age(age):
+    """Age as an int ("30" and 30.0 are accepted). Raises ValueError unless it is a whole number of years."""
+    if isinstance(age, bool) or not isinstance(age, (int, float, str)):
+        raise ValueError(f"invalid age: {age!r}")
+    value = float(age)
+    if not value.is_integer() or not 0 < value < 130:
+        raise ValueError(f"invalid age: {age!r}")
+    return int(value)
+
+def normalize_employment_type(employment_type):
+    """Map "Salaried" / "self-employed" onto EMPLOYMENT_TYPES. Raises ValueError for anything else."""
+    value = str(employment_type).strip().lower().replace("-", "_").replace(" ", "_")
+    if value not in EMPLOYMENT_TYPES:
+        raise ValueError(f"invalid employment_type: {employment_type!r}")
+    return value
+
+
+def canonical_profile(profile: dict) -> dict:
+    """Cache-key form of a profile, equal for profiles that score the same.
+
+    Goals are mapped from camelCase and sorted (scoring reads them as a set;
+    repeats are kept, they weigh into value estimates). Lifestyle entries become
+    {"service", "usage_percent"} dicts with the default of 50, except Amazon Fresh
+    under groceries, which keeps its form: its boost only reads dict entries.
+    Spend, lifestyle categories and services keep their order, since reasons,
+    lifestyle matches and follow-up questions depend on it. Other fields are kept.
+    The profile that gets scored is never replaced by this form.
+    """
+    canonical = dict(profile)
+    canonical["spend"] = dict(profile.get("spend") or {})
+    canonical["goals"] = sorted(normalize_goals(profile.get("goals") or []))
+    lifestyle = profile.get("lifestyle") or {}
+    canonical["lifestyle"] = {
+        category: [_canonical_entry(category, entry) for entry in lifestyle[category] or []]
+        for category in lifestyle
+    }
+    return canonical
+
+
+def _canonical_entry(category: str, entry):
+    service, usage = parse_lifestyle_entry(entry)
+    if category == "groceries" and service == "amazon_fresh":
+        return dict(entry) if isinstance(entry, dict) else entry
+    return {"service": service, "usage_percent": usage}
+
+
+def profile_hash(profile: dict) -> str:
+    """Stable hash of the canonical profile (equal for equivalent profiles)."""
+    canonical = canonical_profile(profile)
+    # Spend and lifestyle as item lists, so sort_keys does not merge reordered profiles
+    canonical["spend"] = list(canonical["spend"].items())
+    canonical["lifestyle"] = list(canonical["lifestyle"].items())
+    payload = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,96 @@
+"""
+Chat query planner
+Turns constraints stated in a chat message (salary, no annual fee, bank) into
+Chroma metadata filters. Pure Python, so planning needs no langchain import
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from app.catalog_store import CARDS_FILE, DATA_DIR
+
+# Nicknames users type for banks, on top of the bank names in uae_cards.json
+BANK_ALIASES = {
+    "enbd": "Emirates NBD",
+    "emirates islamic": "Emirates Islamic Bank",
+    "first abu dhabi": "FAB",
+    "abu dhabi commercial": "ADCB",
+    "rak bank": "RAKBank",
+    "rakbank": "RAKBank",
+    "wio": "WIO Bank",
+    "majid al futtaim": "Majid Al Futtaim Finance",
+    "maf": "Majid Al Futtaim Finance"
+}
+
+NO_FEE_PATTERN = re.compile(r"\b(no|zero|free|without|0)[\s-]*(annual[\s-]*)?fees?\b|\b(lifetime|fee)[\s-]*free\b")
+SALARY_PATTERN = re.compile(r"\b(?:salary|earn|earning|income|make)\D{0,20}?(\d[\d,]*(?:\.\d+)?)(?![\d,]|\.\d)\s*(k\b)?(?!\s*(?:%|x\b|percent))")
+# Below this a number next to "earn" / "make" is a reward rate or a count, not a monthly salary
+MIN_STATED_SALARY = 1000
+
+@lru_cache(maxsize=1)
+def _bank_aliases():
+    with open(os.path.join(DATA_DIR, CARDS_FILE), "r") as f:
+        cards = json.load(f)
+    aliases = dict(BANK_ALIASES)
+    for bank in {card["bank"] for card in cards}:
+        aliases[bank.lower()] = bank
+    return aliases
+
+def stated_salary(text):
+    """Monthly salary stated in a lowercased message ("i earn 8k", "salary of 12,000"), or None."""
+    for match in SALARY_PATTERN.finditer(text):
+        salary = float(match.group(1).replace(",", "")) * (1000 if match.group(2) else 1)
+        if match.group(2) or salary >= MIN_STATED_SALARY:
+            return salary
+    return None
+
+def profile_salary(user_profile):
+    """The chat profile's salary as a positive number, or None (the profile is not validated)."""
+    try:
+        salary = float((user_profile or {}).get("salary") or 0)
+    except (TypeError, ValueError):
+        return None
+    return salary if salary > 0 else None
+
+def plan_query(message, user_profile=None, bank_aliases=None):
+    """Chroma metadata filter for the constraints stated in a chat message, or None.
+    
+    Picks up salary eligibility (from the profile, else "I earn 8k"), "no annual
+    fee" wording and named banks, so the vector search only ranks cards the
+    user can actually get.
+    """
+    text = message.lower()
+    conditions = []
+    
+    salary = profile_salary(user_profile) or stated_salary(text)
+    if salary:
+        conditions.append({"min_salary": {"$lte": salary}})
+    
+    if NO_FEE_PATTERN.search(text):
+        conditions.append({"annual_fee": {"$eq": 0}})
+    
+    aliases = _bank_aliases() if bank_aliases is None else bank_aliases
+    banks = sorted({bank for alias, bank in aliases.items() if re.search(rf"\b{re.escape(alias)}\b", text)})
+    if len(banks) == 1:
+        conditions.append({"bank": {"$eq": banks[0]}})
+    elif banks:
+        conditions.append({"bank": {"$in": banks}})
+    
+    if not conditions:
+        return None
+    card_filter = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    # Reference (RTF) chunks carry no card metadata, so keep them in the candidate set
+    return {"$or": [{"type": {"$eq": "reference"}}, card_filter]}
+
+def retrieve_documents(retriever, message, where=None):
+    """Similarity search with the planned metadata filter pushed down.
+    
+    Falls back to the unfiltered search if the filter leaves no card documents
+    (reference chunks always pass the filter, so they alone don't count).
+    """
+    if where:
+        k = retriever.search_kwargs.get("k", 10)
+        docs = retriever.vectorstore.similarity_search(message, k=k, filter=where)
+        if any(doc.metadata.get("type") != "reference" for doc in docs):
+            return docs
+    return retriever.get_relevant_documents(message)
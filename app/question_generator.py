@@ -2,7 +2,9 @@
 Question generator for credit card recommendations
 Analyzes spending patterns and generates contextual questions
 """
+from app.tracing import traced
 
+@traced("generate_questions")
 def generate_questions(salary, spend, lifestyle, goals=None):
     """Generate 2-3 contextual questions based on spending patterns"""
     
@@ -206,6 +208,7 @@ def _get_category_question(category, amount):
     return questions_map.get(category)
 
 
+@traced("enrich_profile_with_answers")
 def enrich_profile_with_answers(profile, questionnaire_answers):
     """Convert questionnaire answers to lifestyle data"""
     
@@ -1,11 +1,16 @@
+import hashlib
 import json
 import os
 import re
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from app.config import CHROMA_DB_PATH
+from app.embeddings import get_shared_embeddings
+from app.query_planner import plan_query, retrieve_documents
+
+# Records the chunk ids and content hashes currently embedded in the store
+MANIFEST_FILENAME = "index_manifest.json"
 
 def strip_rtf(text):
     """Remove RTF formatting and extract plain text."""
@@ -81,49 +86,112 @@ Details: {card['notes']}
     return documents
 
 def get_embeddings():
-    """Get HuggingFace embeddings (free, no API key needed)."""
-    return HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2",
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
-    )
-
-def setup_vectorstore():
-    """Initialize and populate Chroma vector store with all data sources."""
-    documents = create_documents()
+    """Get HuggingFace embeddings (free, no API key needed).
     
-    # Split documents
+    Returns the process-wide provider: the model loads once, and only when a
+    text is missing from the on-disk embedding cache.
+    """
+    return get_shared_embeddings()
+
+def split_documents(documents=None):
+    """Split documents into the chunks that get embedded."""
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000, 
         chunk_overlap=100,
         separators=["\n\n", "\n", ". ", ", ", " "]
     )
-    splits = text_splitter.split_documents(documents)
+    return text_splitter.split_documents(create_documents() if documents is None else documents)
+
+def chunk_ids(splits):
+    """Stable id and content hash for each chunk.
+    
+    Ids are source:card_name:ordinal, so an edited card keeps its ids and only
+    its hash changes.
+    """
+    ids = []
+    hashes = []
+    counts = {}
+    for doc in splits:
+        base = f"{doc.metadata.get('source', '')}:{doc.metadata.get('name', '')}"
+        ordinal = counts.get(base, 0)
+        counts[base] = ordinal + 1
+        ids.append(f"{base}:{ordinal}")
+        payload = json.dumps([doc.page_content, doc.metadata], sort_keys=True)
+        hashes.append(hashlib.sha1(payload.encode()).hexdigest())
+    return ids, hashes
+
+def load_manifest(persist_directory=CHROMA_DB_PATH):
+    """Chunk id -> content hash for what the store holds, or None if there is no manifest."""
+    path = os.path.join(persist_directory, MANIFEST_FILENAME)
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(manifest, persist_directory=CHROMA_DB_PATH):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def index_version(persist_directory=CHROMA_DB_PATH):
+    """Changes whenever the manifest is rewritten, i.e. whenever the index content changes."""
+    try:
+        stat = os.stat(os.path.join(persist_directory, MANIFEST_FILENAME))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def sync_vectorstore(vectorstore, persist_directory=CHROMA_DB_PATH, documents=None):
+    """Embed only new or changed chunks and remove deleted ones, then update the manifest."""
+    splits = split_documents(documents)
+    ids, hashes = chunk_ids(splits)
+    current = dict(zip(ids, hashes))
+    manifest = load_manifest(persist_directory)
     
-    # Create embeddings (FREE - HuggingFace)
+    if manifest is None:
+        # No manifest (new store, or one built before manifests with random ids): rebuild
+        stale = vectorstore.get(include=[])["ids"]
+        manifest = {}
+    else:
+        stale = [doc_id for doc_id, doc_hash in manifest.items() if current.get(doc_id) != doc_hash]
+    
+    changed = [k for k, doc_id in enumerate(ids) if manifest.get(doc_id) != hashes[k]]
+    if stale:
+        vectorstore.delete(ids=stale)
+    if changed:
+        vectorstore.add_documents([splits[k] for k in changed], ids=[ids[k] for k in changed])
+    if current != manifest:
+        save_manifest(current, persist_directory)
+    
+    stats = {
+        "added": sum(1 for k in changed if ids[k] not in manifest),
+        "updated": sum(1 for k in changed if ids[k] in manifest),
+        "removed": sum(1 for doc_id in manifest if doc_id not in current),
+        "unchanged": len(ids) - len(changed)
+    }
+    if changed or stale:
+        print(f"✓ Vector store synced at {persist_directory}: {stats['added']} added, "
+              f"{stats['updated']} updated, {stats['removed']} removed, {stats['unchanged']} unchanged")
+    return stats
+
+def setup_vectorstore():
+    """Open the Chroma vector store and bring it up to date with all data sources."""
     embeddings = get_embeddings()
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        persist_directory=CHROMA_DB_PATH
+    vectorstore = Chroma(
+        persist_directory=CHROMA_DB_PATH,
+        embedding_function=embeddings
     )
-    
-    print(f"✓ Vector store created with {len(splits)} document chunks at {CHROMA_DB_PATH}")
-    print(f"  - Sources: uae_cards.json + 3 RTF files")
+    sync_vectorstore(vectorstore)
     return vectorstore
 
 def get_cards_retriever():
     """Get retriever for card recommendations."""
-    embeddings = get_embeddings()
-    
-    # Load existing vector store or create new one
-    if os.path.exists(CHROMA_DB_PATH):
-        vectorstore = Chroma(
-            persist_directory=CHROMA_DB_PATH,
-            embedding_function=embeddings
-        )
-    else:
-        vectorstore = setup_vectorstore()
+    # Reuses the persisted store; only new or changed chunks are re-embedded
+    vectorstore = setup_vectorstore()
     
     # Retrieve more documents since we have more data sources
     return vectorstore.as_retriever(search_kwargs={"k": 10})
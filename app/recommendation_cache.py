@@ -0,0 +1,63 @@
+"""
+Memoized recommendation scoring
+Keyed on (canonical profile hash, catalog version), so equivalent profiles are
+scored once per catalog. A catalog swap changes the key; old entries age out
+"""
+import threading
+import time
+from collections import OrderedDict
+from app.config import RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_CACHE_TTL
+
+
+class RecommendationCache:
+    """LRU/TTL in-process cache of scored results (before explanations)."""
+
+    def __init__(self, max_size: int = RECOMMENDATION_CACHE_SIZE, ttl: float = RECOMMENDATION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: tuple):
+        """Cached value for the key, or None. Callers must not mutate it."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key: tuple, value):
+        with self.lock:
+            self.entries[key] = (value, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,350 @@
+"""
+Incremental rescoring for refined profiles
+A questionnaire round-trip scores a profile, then scores it again with a few
+lifestyle entries or goals added. ProfileTerms keeps every per-card term of the
+goal, spending and value scores keyed on the profile fields it reads, so the
+refined profile only recomputes the terms whose inputs changed. Terms are summed
+in ScoringEngine's order over the same salary-eligible cards, so the scores match
+score_batch() exactly
+"""
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.config import SESSION_SCORES_SIZE, SESSION_SCORES_TTL
+from app.scoring import (GENERAL_SPEND_CATEGORIES, LIFESTYLE_CATEGORY_KEYS, ScoringEngine,
+                         parse_lifestyle_entry)
+
+
+def _entries_key(services: list) -> tuple:
+    """Hashable form of a lifestyle category's entries (string and dict entries stay distinct)."""
+    return tuple((s.get("service"), s.get("usage_percent")) if isinstance(s, dict) else s for s in services)
+
+
+class ProfileTerms:
+    """Per-card score terms of the last profile scored, reused by the next one."""
+
+    def __init__(self, engine: ScoringEngine):
+        self.engine = engine
+        self.columns = engine.columns(0)
+        self.terms = {}
+        self.previous = {}
+        self.computed = 0
+        self.reused = 0
+        self.lock = threading.Lock()
+
+    def score(self, profile: dict) -> tuple:
+        """(goal_scores, spending_scores, values) dicts shaped like the engine's batch results."""
+        with self.lock:
+            # Terms cover the cards up to the salary's prefix; a new prefix starts from scratch
+            width = self.engine.catalog.salary_prefix(profile.get("salary", 0))
+            if width != self.columns.size:
+                self.columns = self.engine.columns(width)
+                self.terms = {}
+            self.previous, self.terms = self.terms, {}
+            self.computed = self.reused = 0
+            return self._goal_scores(profile), self._spending_scores(profile), self._values(profile)
+
+    def _term(self, key: tuple, compute):
+        """Term from this round or the last one, computed only if its inputs are new."""
+        value = self.terms.get(key)
+        if value is None:
+            value = self.previous.get(key)
+            if value is None:
+                value = compute()
+                self.computed += 1
+            else:
+                self.reused += 1
+            self.terms[key] = value
+        return value
+
+    @staticmethod
+    def _rule(profile: dict) -> tuple:
+        """The profile fields eligibility depends on."""
+        return profile.get("salary", 0), profile.get("age"), profile.get("employment_type")
+
+    def _eligible(self, profile: dict) -> np.ndarray:
+        """Age and employment eligibility within the salary prefix (every column meets the salary)."""
+        rule = self._rule(profile)
+        return self._term(("eligible",) + rule, lambda: self.engine._eligible_columns(
+            [{"age": rule[1], "employment_type": rule[2]}], [self.columns.size], self.columns)[0])
+
+    def _by_card_id(self, row: np.ndarray) -> np.ndarray:
+        return self.engine._by_card_id(row[np.newaxis])[0]
+
+    def _goal_scores(self, profile: dict) -> dict:
+        e, c = self.engine, self.columns
+        salary = profile.get("salary", 0)
+        goal_list = list(set(profile.get("goals", [])))
+        goals = frozenset(goal_list)
+        spend = profile.get("spend", {})
+
+        match_count = self._term(("goals.matches", goals), lambda: e._goal_match_counts([goal_list], c)[0])
+        eligible = self._eligible(profile)
+        candidates = self._term(("goals.candidates", self._rule(profile), goals), lambda: eligible & (match_count > 0))
+
+        score = self._term(("goals.base", goals), lambda: 0.5 + match_count * 0.15)
+        score = score + self._term(("fee",), lambda: np.where(c.zero_fee, 0.05, 0.0))
+
+        # Boosts whose condition is off add 0.0 in the batch, so they are skipped here
+        boosts = [
+            ("goals.international", spend.get("international_travel", 0) > 2000 and "international" in goal_list,
+             lambda: np.where(c.goal_international_cards, 0.2, 0.0)),
+            ("goals.transport", spend.get("domestic_transport", 0) > 800
+             and any(x in goal_list for x in ["transport", "careem", "nol"]),
+             lambda: np.where(c.transport_cards, 0.15, 0.0)),
+            ("goals.online", spend.get("online", 0) > 1500 and "online" in goal_list,
+             lambda: np.array(c.goal_online_boost, dtype=float)),
+            ("goals.entertainment", "entertainment" in goal_list,
+             lambda: np.where(c.goal_entertainment_cards, 0.2, 0.0)),
+            ("goals.premium", salary >= 50000 and any(x in goal_list for x in ["premium", "luxury"]),
+             lambda: np.where(c.premium_cards, 0.25, 0.0)),
+            ("goals.online_aligned", "online" in goal_list and spend.get("online", 0) > 2000,
+             lambda: np.where(c.high_online_cards, 0.3, 0.0)),
+            ("goals.dining_aligned", "dining" in goal_list and spend.get("dining", 0) > 3000,
+             lambda: np.where(c.high_dining_cards, 0.3, 0.0)),
+            ("goals.travel", "travel" in goal_list or "miles" in goal_list,
+             lambda: np.array(c.travel_boost, dtype=float)),
+            ("goals.entry", salary <= 6000 and "no_fee" in goal_list,
+             lambda: np.where(c.entry_goal_cards, 0.15, 0.0)),
+        ]
+        for name, applies, compute in boosts:
+            if applies:
+                score += self._term((name,), compute)
+
+        lifestyle_match = {}
+        for category, services in profile.get("lifestyle", {}).items():
+            steps = self._term(("goals.lifestyle", _entries_key(services)),
+                               lambda: self._goal_lifestyle_steps(services))
+            for ids, ranks, value, title in steps:
+                score[ranks] += value
+                for i in ids:
+                    lifestyle_match[int(i)] = title
+
+        return {
+            "goals": goal_list,
+            "candidates": self._by_card_id(candidates),
+            "score": self._by_card_id(np.minimum(score, 1.0)),
+            "lifestyle_match": lifestyle_match
+        }
+
+    def _goal_lifestyle_steps(self, services: list) -> list:
+        steps = []
+        for service_data in services:
+            service, usage_percent = parse_lifestyle_entry(service_data)
+            ids = self.engine.co_brand_cards.get(service)
+            if ids is not None and len(ids):
+                steps.append((ids, self._ranks(self.engine.co_brand_ranks[service]), 0.3 * (usage_percent / 100),
+                              service.replace("_", " ").title()))
+        return steps
+
+    def _ranks(self, ranks: np.ndarray) -> np.ndarray:
+        """Salary-order positions of cards, dropping those past the prefix."""
+        return ranks[ranks < self.columns.size]
+
+    def _spending_scores(self, profile: dict) -> dict:
+        e, c = self.engine, self.columns
+        salary = profile.get("salary", 0)
+        spend = profile.get("spend", {})
+        total_spend = sum(spend.values()) or 1
+        lifestyle = profile.get("lifestyle", {})
+
+        score = np.full(c.size, 0.5)
+        matches = []
+        for category, services in lifestyle.items():
+            steps, category_matches = self._term(("spending.lifestyle", _entries_key(services)),
+                                                 lambda: self._spending_lifestyle_steps(services))
+            for ids, value in steps:
+                score[ids] += value
+            matches.extend(category_matches)
+
+        online_spend = spend.get("online", 0)
+        international_travel = spend.get("international_travel", 0)
+        domestic_transport = spend.get("domestic_transport", 0)
+        misc_spend = spend.get("miscellaneous", 0)
+
+        if online_spend > 1500:
+            matches.append((e.high_online_cards, e._online_match(int((online_spend / total_spend) * 100), online_spend)))
+        if international_travel > 2000:
+            matches.append((e.international_travel_cards, e._static_match({
+                "type": "international_travel",
+                "service": "international_travel",
+                "usage": int((international_travel / total_spend) * 100),
+                "benefit": f"Enhanced rewards on international travel & foreign spending"
+            })))
+        if domestic_transport > 800:
+            matches.append((e.transport_cards, e._static_match({
+                "type": "domestic_transport",
+                "service": "ride_hailing_transport",
+                "usage": int((domestic_transport / total_spend) * 100),
+                "benefit": f"Benefits for ride-hailing and local transport"
+            })))
+
+        amazon_fresh_boosts = 0
+        for service_data in lifestyle.get("groceries", []):
+            if isinstance(service_data, dict):
+                service = service_data.get("service")
+                usage = service_data.get("usage_percent", 0)
+                if service == "amazon_fresh" and usage >= 50:
+                    amazon_fresh_boosts += 1
+                    matches.append((e.is_amazon_card, e._static_match({
+                        "type": "high_usage",
+                        "service": "amazon_fresh",
+                        "usage": usage,
+                        "benefit": f"You use Amazon Fresh {usage}% for groceries - 6% cashback applies!"
+                    })))
+
+        general = misc_spend > 0 and misc_spend / total_spend > 0.3
+        if general:
+            matches.append((e.general_reward_cards, e._general_match(int((misc_spend / total_spend) * 100), misc_spend)))
+
+        if online_spend > 1500:
+            score += self._term(("spending.high_online",), lambda: np.where(c.high_online_cards, 0.2, 0.0))
+        if international_travel > 2000:
+            score += self._term(("spending.international",), lambda: np.where(c.international_travel_cards, 0.15, 0.0))
+        if domestic_transport > 800:
+            score += self._term(("spending.transport",), lambda: np.where(c.transport_cards, 0.1, 0.0))
+        if salary <= 6000:
+            score += self._term(("spending.entry",), lambda: np.where(c.entry_level_cards, 0.1, 0.0))
+        if spend.get("dining", 0) + online_spend > 2000:
+            score += self._term(("spending.entertainment",), lambda: np.where(c.entertainment_cards, 0.1, 0.0))
+        for _ in range(amazon_fresh_boosts):
+            score += self._term(("spending.amazon_fresh",), lambda: np.where(c.is_amazon_card, 0.2, 0.0))
+        if general:
+            score += self._term(("spending.general",), lambda: np.where(c.general_reward_cards, 0.25, 0.0))
+
+        # Category-weighted reward score, one term per spend position
+        for category, amount in spend.items():
+            if amount > 0 and category not in GENERAL_SPEND_CATEGORIES:
+                weight = amount / total_spend
+                score += self._term(("spending.weighted", category, weight),
+                                    lambda: self._weighted_term(self._rate(category), weight))
+        if misc_spend > 0:
+            weight = misc_spend / total_spend
+            score += self._term(("spending.misc", weight), lambda: self._weighted_term(c.misc_rate, weight))
+
+        goals = tuple(profile.get("goals", []))
+        score += self._term(("spending.goals", goals),
+                            lambda: np.minimum(e._goal_match_counts([list(goals)], c)[0] * 0.1, 0.15))
+        score += self._term(("fee",), lambda: np.where(c.zero_fee, 0.05, 0.0))
+
+        return {
+            "candidates": self._by_card_id(self._eligible(profile)),
+            "score": self._by_card_id(np.minimum(score, 1.0)),
+            "matches": matches
+        }
+
+    def _spending_lifestyle_steps(self, services: list) -> tuple:
+        e = self.engine
+        steps, matches = [], []
+        for service_data in services:
+            service, usage_percent = parse_lifestyle_entry(service_data)
+            if service in e.co_brand_cards:
+                steps.append((self._ranks(e.co_brand_ranks[service]), 0.3 * (usage_percent / 100)))
+                matches.append((e.co_brand_masks[service], e._static_match({
+                    "type": "co_branded",
+                    "service": service,
+                    "usage": usage_percent,
+                    "benefit": e.co_brand_benefit[service]
+                })))
+            if service in e.partner_cards:
+                steps.append((self._ranks(e.partner_ranks[service]), 0.15 * (usage_percent / 100)))
+                matches.append((e.partner_masks[service], e._static_match({
+                    "type": "partner",
+                    "service": service,
+                    "usage": usage_percent,
+                    "benefit": f"Special benefits at {service}"
+                })))
+        return steps, matches
+
+    def _rate(self, category: str) -> np.ndarray:
+        return self.columns.reward_rates[:, self.engine.category_index.get(category, self.engine.missing_column)]
+
+    def _has_rate(self, category: str) -> np.ndarray:
+        return self.columns.has_reward[:, self.engine.category_index.get(category, self.engine.missing_column)]
+
+    @staticmethod
+    def _weighted_term(reward_rate: np.ndarray, weight: float) -> np.ndarray:
+        return np.where(reward_rate > 0, weight * (reward_rate / 5) * 0.2, 0.0)
+
+    def _values(self, profile: dict) -> dict:
+        lifestyle = profile.get("lifestyle", {})
+        total_rewards = np.zeros(self.columns.size)
+        excluded_spend = np.zeros(self.columns.size)
+        for category, amount in profile.get("spend", {}).items():
+            category_lifestyle = lifestyle.get(LIFESTYLE_CATEGORY_KEYS.get(category, ""), [])
+            excluded, rewards = self._term(("values", category, amount, _entries_key(category_lifestyle)),
+                                           lambda: self._value_terms(category, amount, category_lifestyle))
+            excluded_spend += excluded
+            total_rewards += rewards
+        return {
+            "total_rewards": self._by_card_id(total_rewards),
+            "excluded_spend": self._by_card_id(excluded_spend),
+            "has_lifestyle_data": len(lifestyle) > 0
+        }
+
+    def _value_terms(self, category: str, amount, category_lifestyle: list) -> tuple:
+        """(excluded spend, annual rewards) per card for one spend category."""
+        e, c = self.engine, self.columns
+        amount = np.float64(amount)
+        if category_lifestyle:
+            in_use = e._services_in_use([s.get("service") if isinstance(s, dict) else s for s in category_lifestyle])
+            excluded = ~in_use[c.co_brand_service_id]
+        else:
+            excluded = np.zeros(c.size, dtype=bool)
+        has_rate = self._has_rate(category)
+        earned = np.where(has_rate, amount * 12 * self._rate(category) / 100, 0.0)
+        if category in GENERAL_SPEND_CATEGORIES:
+            earned = np.where(c.is_general_rewards & ~has_rate, amount * 12 * c.general_rate / 100, earned)
+        return np.where(excluded, amount, 0), np.where(excluded, 0.0, earned)
+
+
+class SessionScores:
+    """LRU/TTL map of session id -> ProfileTerms, each bound to the engine it was scored with."""
+
+    def __init__(self, max_size: int = SESSION_SCORES_SIZE, ttl: float = SESSION_SCORES_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.terms_computed = 0
+        self.terms_reused = 0
+
+    def score(self, session_id: str, engine: ScoringEngine, profile: dict) -> tuple:
+        """Score the profile with the session's terms; a new session or catalog starts from scratch."""
+        terms = self._terms(session_id, engine)
+        scored = terms.score(profile)
+        with self.lock:
+            self.terms_computed += terms.computed
+            self.terms_reused += terms.reused
+        return scored
+
+    def _terms(self, session_id: str, engine: ScoringEngine) -> ProfileTerms:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is not None and entry[0].engine is engine and now - entry[1] < self.ttl:
+                self.hits += 1
+                terms = entry[0]
+            else:
+                self.misses += 1
+                terms = ProfileTerms(engine)
+            self.entries[session_id] = (terms, now)
+            self.entries.move_to_end(session_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            return terms
+
+    def stats(self) -> dict:
+        with self.lock:
+            terms = self.terms_computed + self.terms_reused
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "terms_computed": self.terms_computed,
+                "terms_reused": self.terms_reused,
+                "reuse_rate": round(self.terms_reused / terms, 4) if terms else 0.0
+            }
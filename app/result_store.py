@@ -0,0 +1,94 @@
+"""
+Server-side store for recommendation results
+recommend() keeps each result's shown cards and canonical profile under a
+result ID, so /api/filter only needs the ID and the filter answers instead of
+the client posting the recommendations back
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from app.config import RESULT_STORE_SIZE, RESULT_STORE_TTL, RESULT_STORE_DB
+
+
+class ResultStore:
+    """LRU/TTL in-process store with an optional SQLite tier shared by the server's workers."""
+
+    def __init__(self, max_size: int = RESULT_STORE_SIZE, ttl: float = RESULT_STORE_TTL,
+                 db_path: str = RESULT_STORE_DB):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db_path = db_path
+        self.db = None
+        self.reopen()
+
+    def reopen(self):
+        """Open a fresh SQLite connection (call in each worker after a fork)."""
+        if not self.db_path:
+            return
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (id TEXT PRIMARY KEY, payload TEXT, created REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+        self.db.commit()
+
+    def put(self, candidates: list, **metadata) -> str:
+        """Store a result's shown cards (best first) and return its ID."""
+        result_id = uuid.uuid4().hex
+        entry = {"candidates": candidates, **metadata}
+        now = time.time()
+        with self.lock:
+            self._remember(result_id, entry, now)
+            if self.db is not None:
+                self.db.execute("INSERT INTO results (id, payload, created) VALUES (?, ?, ?)",
+                                (result_id, json.dumps(entry), now))
+                self.db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+                self.db.commit()
+        return result_id
+
+    def get(self, result_id: str):
+        """{"candidates": [...], **metadata} for the ID, or None if unknown or expired."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(result_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.entries.move_to_end(result_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[result_id]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT payload, created FROM results WHERE id = ?", (result_id,)).fetchone()
+                if row and now - row[1] < self.ttl:
+                    stored = json.loads(row[0])
+                    self._remember(result_id, stored, row[1])
+                    self.disk_hits += 1
+                    return stored
+
+            self.misses += 1
+            return None
+
+    def _remember(self, result_id: str, entry: dict, created: float):
+        self.entries[result_id] = (entry, created)
+        self.entries.move_to_end(result_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
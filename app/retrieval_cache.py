@@ -0,0 +1,120 @@
+"""
+Retrieval result cache for chat
+Reuses the Chroma search for repeated (and optionally paraphrased) questions,
+and drops everything when the vector index manifest changes
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.config import RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_SIMILARITY
+
+
+def normalize_query(text: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+class RetrievalCache:
+    """LRU cache of retrieved documents keyed on the normalized query.
+
+    index_version is a callable returning the current index version; a change
+    clears the cache. With embeddings and a similarity threshold > 0, a miss
+    falls back to the most similar cached query (cosine on normalized vectors).
+    """
+
+    def __init__(self, index_version=None, embeddings=None, max_size: int = RETRIEVAL_CACHE_SIZE,
+                 similarity: float = RETRIEVAL_CACHE_SIMILARITY):
+        self.index_version = index_version
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.similarity = similarity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def _check_version(self):
+        if self.index_version is None:
+            return
+        version = self.index_version()
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+
+    def _semantic_match(self, vector, scope):
+        keys = [key for key, (_, v) in self.entries.items() if v is not None and key[0] == scope]
+        if not keys:
+            return None
+        matrix = np.array([self.entries[key][1] for key in keys])
+        scores = matrix @ vector / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector) + 1e-12)
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity else None
+
+    def get_or_retrieve(self, query: str, retrieve, scope=None) -> list:
+        """Cached documents for the query, calling retrieve(query) on a miss.
+        
+        scope (e.g. the metadata filter) is part of the key; paraphrase lookup
+        only matches entries with the same scope.
+        """
+        start = time.perf_counter()
+        scope = json.dumps(scope, sort_keys=True) if scope is not None else None
+        text = normalize_query(query)
+        key = (scope, text)
+        semantic = self.embeddings is not None and self.similarity > 0
+
+        with self.lock:
+            self._check_version()
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.hit_seconds += time.perf_counter() - start
+                return entry[0]
+
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=float) if semantic else None
+        if vector is not None:
+            with self.lock:
+                match = self._semantic_match(vector, scope)
+                if match is not None:
+                    self.entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    self.hit_seconds += time.perf_counter() - start
+                    return self.entries[match][0]
+
+        docs = retrieve(query)
+        with self.lock:
+            self.entries[key] = (docs, vector)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self.misses += 1
+            self.miss_seconds += time.perf_counter() - start
+        return docs
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits = self.hits + self.semantic_hits
+            lookups = hits + self.misses
+            avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            avg_hit = self.hit_seconds / hits if hits else 0.0
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_hit_ms": round(avg_hit * 1000, 3),
+                "avg_miss_ms": round(avg_miss * 1000, 3),
+                "estimated_saved_ms": round(hits * max(avg_miss - avg_hit, 0.0) * 1000, 1)
+            }
@@ -0,0 +1,664 @@
+"""
+Vectorized scoring engine for card recommendations
+Compiles the card catalog into NumPy arrays once and scores a batch of profiles
+against every card as profile x card matrices instead of a Python loop per card
+"""
+import numpy as np
+from app.catalog import CatalogIndex, GoalLookups
+
+# best_for tags that trigger the scoring boosts
+TRANSPORT_TAGS = ["careem", "transport", "nol", "salik"]
+ENTERTAINMENT_GOAL_TAGS = ["entertainment", "cinema", "vox", "dubai_mall"]
+ENTERTAINMENT_SPEND_TAGS = ["entertainment", "cinema", "vox", "dubai_mall", "namshi"]
+PREMIUM_TAGS = ["premium", "elite", "signature"]
+
+# Spend categories only rewarded by flat-rate (general rewards) cards
+GENERAL_SPEND_CATEGORIES = ["miscellaneous", "utilities", "remittances"]
+
+# Spend category -> lifestyle key used to check co-branded merchant usage
+LIFESTYLE_CATEGORY_KEYS = {
+    "groceries": "groceries",
+    "online": "online_shopping",
+    "fuel": "fuel_stations",
+    "entertainment": "entertainment",
+    "international_travel": "airlines"
+}
+
+
+def parse_lifestyle_entry(service_data, default_usage=50):
+    """Return (service, usage_percent) for a string or dict lifestyle entry."""
+    if isinstance(service_data, dict):
+        return service_data.get("service"), service_data.get("usage_percent", default_usage)
+    return service_data, default_usage
+
+
+def top_k(ids: np.ndarray, scores: np.ndarray, k: int = None, groups: np.ndarray = None) -> list:
+    """The k ids with the highest (group, fit score), best first (all of them if k is None).
+
+    Scores in [0, 1] are compared rounded to 2 places and ties keep id order, as
+    sorting every card's result dict did. Only the ids within rounding distance
+    of the k-th best are sorted, so the cost barely grows with the catalog.
+    """
+    if groups is None:
+        groups = np.zeros(len(ids), dtype=int)
+    if k is not None and len(ids) > k:
+        # A group outranks any score, so group * 2 + score orders like (group, score)
+        key = groups * 2.0 + scores
+        kth = np.partition(key, len(key) - k)[len(key) - k]
+        keep = np.flatnonzero(key >= kth - 0.02)
+        ids, scores, groups = ids[keep], scores[keep], groups[keep]
+    fit = [round(float(score), 2) for score in scores]
+    order = sorted(range(len(ids)), key=lambda j: (int(groups[j]), fit[j]), reverse=True)
+    return [int(ids[j]) for j in order[:k]]
+
+
+# Card arrays the scorers read, kept a second time in min_salary order
+SALARY_ORDERED_ARRAYS = [
+    "reward_rates", "has_reward", "zero_fee", "is_general_rewards", "general_rate", "is_amazon_card",
+    "goal_international_cards", "transport_cards", "goal_online_boost", "high_online_cards",
+    "goal_entertainment_cards", "premium_cards", "high_dining_cards", "travel_boost", "entry_goal_cards",
+    "international_travel_cards", "entry_level_cards", "entertainment_cards", "general_reward_cards",
+    "misc_rate", "co_brand_service_id", "age_min", "age_max", "open_employment"
+]
+
+
+class CardColumns:
+    """The first `size` cards in min_salary order, as slices of the salary-ordered arrays."""
+
+    def __init__(self, arrays: dict, size: int):
+        self.size = size
+        for name, array in arrays.items():
+            setattr(self, name, array[:size])
+
+
+def _column(values, dtype=float) -> np.ndarray:
+    """Per-profile values as a (profiles, 1) column that broadcasts across cards."""
+    return np.array(values, dtype=dtype).reshape(-1, 1)
+
+
+class ScoringEngine:
+    """Card catalog compiled into arrays for vectorized goal, spending and value scoring.
+
+    Every score is a (profiles, cards) matrix. Terms are added in the same order
+    as the original per-card formula, and each profile gets its spend and
+    lifestyle terms in its own key order. A profile with no term at a step adds
+    0.0. This keeps the floating point result, and so the rounded fit score,
+    exact for every profile in the batch.
+
+    The card arrays are also kept in min_salary order. The cards a salary is
+    eligible for are a prefix of that order, so a batch only scores the
+    columns up to its highest salary's prefix.
+    """
+
+    def __init__(self, catalog: CatalogIndex):
+        self.catalog = catalog
+        cards = catalog.cards
+        self.cards = cards
+        self.size = catalog.size
+        self.names = catalog.names
+
+        # Card x category reward-rate matrix plus a presence mask for "category in rewards".
+        # The trailing all-zero column stands in for categories no card rewards.
+        self.categories = []
+        self.category_index = {}
+        for card in cards:
+            for category in card.get("rewards", {}):
+                if category not in self.category_index:
+                    self.category_index[category] = len(self.categories)
+                    self.categories.append(category)
+        self.missing_column = len(self.categories)
+
+        self.reward_rates = np.zeros((self.size, len(self.categories) + 1))
+        self.has_reward = np.zeros((self.size, len(self.categories) + 1), dtype=bool)
+        for i, card in enumerate(cards):
+            for category, rate in card.get("rewards", {}).items():
+                self.reward_rates[i, self.category_index[category]] = rate
+                self.has_reward[i, self.category_index[category]] = True
+
+        self.annual_fee = np.array([card["annual_fee"] for card in cards], dtype=float)
+        self.min_salary = np.array([card["min_salary"] for card in cards], dtype=float)
+
+        # Flat-rate cards: every reward category earns the same rate
+        self.is_general_rewards = np.zeros(self.size, dtype=bool)
+        self.general_rate = np.zeros(self.size)
+        for i, card in enumerate(cards):
+            reward_values = list(card.get("rewards", {}).values())
+            if len(set(reward_values)) == 1 and len(reward_values) >= 5:
+                self.is_general_rewards[i] = True
+                self.general_rate[i] = reward_values[0]
+
+        name_has_amazon = self._name_flag("Amazon")
+        name_has_liv = self._name_flag("Liv")
+        name_has_wio = self._name_flag("WIO")
+        self.is_amazon_card = np.array([name == "Amazon.ae Credit Card" for name in self.names], dtype=bool)
+
+        # best_for tag bitmask (card x tag), filled from the catalog's posting lists
+        self.tags = catalog.tags
+        self.tag_index = {tag: i for i, tag in enumerate(self.tags)}
+        self.tag_matrix = np.zeros((self.size, len(self.tags)), dtype=bool)
+        for tag, ids in catalog.tag_postings.items():
+            self.tag_matrix[ids, self.tag_index[tag]] = True
+        self._goal_matches = GoalLookups()
+        self.no_matches = np.zeros(self.size, dtype=bool)
+        self.no_matches.setflags(write=False)
+
+        # Card flag vectors behind each scoring boost
+        online_rate = self.rate("online")
+        international_rate = self.rate("international")
+        self.zero_fee = self.annual_fee == 0
+        self.goal_international_cards = name_has_amazon | (international_rate > 2)
+        self.transport_cards = self.has_any_tag(TRANSPORT_TAGS)
+        self.goal_online_boost = np.where(online_rate >= 5, 0.25, np.where(online_rate >= 3, 0.15, 0.0))
+        self.high_online_cards = online_rate >= 5
+        self.goal_entertainment_cards = self.has_any_tag(ENTERTAINMENT_GOAL_TAGS)
+        self.premium_cards = (self.annual_fee > 1000) | self.has_any_tag(PREMIUM_TAGS)
+        self.high_dining_cards = self.rate("dining") >= 3
+        best_travel_rate = np.maximum(self.rate("travel"), international_rate)
+        self.travel_boost = np.where(best_travel_rate >= 5, 0.2, np.where(best_travel_rate >= 3, 0.1, 0.0))
+        self.entry_goal_cards = name_has_liv | (self.min_salary <= 5000)
+        intl_rate = np.where(self.has_rate("international"), international_rate, self.rate("travel"))
+        self.international_travel_cards = (intl_rate >= 2.5) | name_has_amazon
+        self.entry_level_cards = self.zero_fee & (self.min_salary <= 5000) & (name_has_liv | name_has_wio)
+        self.entertainment_cards = self.has_any_tag(ENTERTAINMENT_SPEND_TAGS)
+        self.general_reward_cards = self.is_general_rewards & (self.general_rate >= 2.0)
+        misc_rate = self.rate("miscellaneous")
+        self.misc_rate = np.where((misc_rate == 0) & self.is_general_rewards, self.general_rate, misc_rate)
+
+        # Co-branded and partner services resolved to card masks
+        self.co_brand_cards = catalog.service_cards
+        self.co_brand_benefit = catalog.co_brand_benefit
+        self.partner_cards = catalog.partner_cards
+        self.co_brand_masks = {service: self._mask(ids) for service, ids in self.co_brand_cards.items()}
+        self.partner_masks = {service: self._mask(ids) for service, ids in self.partner_cards.items()}
+
+        # First co-branded service of each card, used to exclude non-partner spend
+        self.co_brand_service = catalog.co_brand_service
+        self.co_brand_services = sorted({s for s in self.co_brand_service if s is not None})
+        service_ids = {service: k for k, service in enumerate(self.co_brand_services)}
+        self.co_brand_service_id = np.array([service_ids.get(s, -1) for s in self.co_brand_service], dtype=int)
+
+        # Eligibility rules, then every scored array again in min_salary order
+        self.age_min = catalog.age_min
+        self.age_max = catalog.age_max
+        self.open_employment = catalog.open_employment
+        order = catalog.salary_order
+        self.salary_rank = np.empty(self.size, dtype=int)
+        self.salary_rank[order] = np.arange(self.size)
+        self.by_salary = {name: getattr(self, name)[order] for name in SALARY_ORDERED_ARRAYS}
+        self.employment_by_salary = {t: mask[order] for t, mask in catalog.employment_masks.items()}
+        self.co_brand_ranks = {service: self.salary_rank[ids] for service, ids in self.co_brand_cards.items()}
+        self.partner_ranks = {service: self.salary_rank[ids] for service, ids in self.partner_cards.items()}
+        self._goal_matches_by_salary = GoalLookups()
+
+    def _name_flag(self, text: str) -> np.ndarray:
+        return np.array([text in name for name in self.names], dtype=bool)
+
+    def _mask(self, ids: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def rate(self, category: str) -> np.ndarray:
+        """Reward rate for a category across all cards (0 where the card has none)."""
+        return self.reward_rates[:, self.category_index.get(category, self.missing_column)]
+
+    def has_rate(self, category: str) -> np.ndarray:
+        """Whether each card lists the category in its rewards."""
+        return self.has_reward[:, self.category_index.get(category, self.missing_column)]
+
+    def has_any_tag(self, tags: list) -> np.ndarray:
+        """Whether each card's best_for contains any of the exact tags."""
+        columns = [self.tag_index[tag] for tag in tags if tag in self.tag_index]
+        return self.tag_matrix[:, columns].any(axis=1)
+
+    def goal_matches(self, goal: str) -> np.ndarray:
+        """Cards with a best_for tag containing the goal (case-insensitive substring)."""
+        key = goal.lower()
+        mask = self._goal_matches.get(key, lambda: self._goal_mask(key))
+        return self.no_matches if mask is None else mask
+
+    def _goal_mask(self, key: str):
+        ids = self.catalog.cards_for_goal(key)
+        return self._mask(ids) if len(ids) else None
+
+    def _goal_matches_in_salary_order(self, key: str) -> np.ndarray:
+        mask = self._goal_matches_by_salary.get(key, lambda: self._goal_mask_in_salary_order(key))
+        return self.no_matches if mask is None else mask
+
+    def _goal_mask_in_salary_order(self, key: str):
+        mask = self.goal_matches(key)
+        return mask[self.catalog.salary_order] if mask is not self.no_matches else None
+
+    def _goal_match_counts(self, goal_lists: list, columns: CardColumns = None) -> np.ndarray:
+        """(profiles, cards) count of goals matching each card, as one profile x goal @ goal x card product.
+
+        With `columns`, counts only those cards, in min_salary order.
+        """
+        vocabulary = {}
+        for goals in goal_lists:
+            for goal in goals:
+                vocabulary.setdefault(goal.lower(), len(vocabulary))
+        if not vocabulary:
+            return np.zeros((len(goal_lists), self.size if columns is None else columns.size), dtype=int)
+        counts = np.zeros((len(goal_lists), len(vocabulary)), dtype=int)
+        for p, goals in enumerate(goal_lists):
+            for goal in goals:
+                counts[p, vocabulary[goal.lower()]] += 1
+        if columns is None:
+            matches = np.array([self.goal_matches(key) for key in vocabulary], dtype=int)
+        else:
+            matches = np.array([self._goal_matches_in_salary_order(key)[:columns.size] for key in vocabulary], dtype=int)
+        return counts @ matches
+
+    def _reward_columns(self, categories: list) -> np.ndarray:
+        return np.array([self.category_index.get(c, self.missing_column) for c in categories], dtype=int)
+
+    @staticmethod
+    def _add_sparse(score: np.ndarray, updates: list):
+        """Apply (step, profile, card ids, value) boosts, each profile in step order."""
+        steps = {}
+        for step, p, ids, value in updates:
+            rows, cols, values = steps.setdefault(step, ([], [], []))
+            rows.extend([p] * len(ids))
+            cols.extend(ids)
+            values.extend([value] * len(ids))
+        for step in sorted(steps):
+            rows, cols, values = steps[step]
+            score[rows, cols] += values
+
+    def eligible(self, salary) -> np.ndarray:
+        return self.min_salary <= salary
+
+    def columns(self, size: int) -> CardColumns:
+        """The `size` lowest min_salary cards' arrays (slices, nothing is copied)."""
+        return CardColumns(self.by_salary, size)
+
+    def _eligible_columns(self, parsed: list, prefixes: list, columns: CardColumns) -> np.ndarray:
+        """(profiles, columns) eligibility: each salary prefix, intersected with the age and employment bitsets."""
+        eligible = _column(prefixes, int) > np.arange(columns.size)
+        ages = [q["age"] for q in parsed]
+        if any(age is not None for age in ages):
+            no_age = _column([age is None for age in ages], bool)
+            age = _column([0 if age is None else age for age in ages])
+            eligible &= no_age | ((columns.age_min <= age) & (age <= columns.age_max))
+        employment_types = [q["employment_type"] for q in parsed]
+        if any(t is not None for t in employment_types):
+            anyone = np.ones(columns.size, dtype=bool)
+            masks = [anyone if t is None else self.employment_by_salary.get(t, self.by_salary["open_employment"])
+                     for t in employment_types]
+            eligible &= np.array([mask[:columns.size] for mask in masks])
+        return eligible
+
+    def _by_card_id(self, matrix: np.ndarray) -> np.ndarray:
+        """(profiles, columns) in min_salary order back to (profiles, cards) by card id, 0 past the columns."""
+        columns = matrix.shape[1]
+        if columns == self.size:
+            full = np.empty_like(matrix)
+        else:
+            full = np.zeros((matrix.shape[0], self.size), dtype=matrix.dtype)
+        full[:, self.catalog.salary_order[:columns]] = matrix
+        return full
+
+    def goal_scores(self, user_profile: dict) -> dict:
+        """Score every card against one user's goals."""
+        return self.goal_scores_batch([user_profile])[0]
+
+    def spending_scores(self, user_profile: dict) -> dict:
+        """Score every card against one user's spending and lifestyle."""
+        return self.spending_scores_batch([user_profile])[0]
+
+    def estimate_values(self, user_profile: dict) -> dict:
+        """Annual reward totals for every card for one user."""
+        return self.estimate_values_batch([user_profile])[0]
+
+    def goal_scores_batch(self, profiles: list) -> list:
+        """Score every card against each profile's goals."""
+        return [goal for goal, _, _ in self.score_batch(profiles, all_cards=True)]
+
+    def spending_scores_batch(self, profiles: list) -> list:
+        """Score every card against each profile's spending and lifestyle."""
+        return [spending for _, spending, _ in self.score_batch(profiles, all_cards=True)]
+
+    def estimate_values_batch(self, profiles: list) -> list:
+        """Annual reward totals for every card, excluding non-partner spend on co-branded cards."""
+        return [values for _, _, values in self.score_batch(profiles, all_cards=True)]
+
+    @staticmethod
+    def parse_profile(profile: dict) -> dict:
+        """Every profile field the scorers read, parsed once."""
+        spend = profile.get("spend", {})
+        lifestyle = profile.get("lifestyle", {})
+        total_spend = sum(spend.values()) or 1
+
+        # Lifestyle entries in profile order, services in use per category, Amazon Fresh usage
+        entries = []
+        services = {}
+        amazon_fresh = []
+        for category, category_services in lifestyle.items():
+            for service_data in category_services:
+                service, usage_percent = parse_lifestyle_entry(service_data)
+                entries.append((service, usage_percent))
+                if category == "groceries" and isinstance(service_data, dict) and service == "amazon_fresh":
+                    usage = service_data.get("usage_percent", 0)
+                    if usage >= 50:
+                        amazon_fresh.append(usage)
+            if category_services:
+                services[category] = [s.get("service") if isinstance(s, dict) else s for s in category_services]
+
+        return {
+            "salary": profile.get("salary", 0),
+            "goals": profile.get("goals", []),
+            "goal_set": list(set(profile.get("goals", []))),
+            "spend": spend,
+            "spend_items": list(spend.items()),
+            "total_spend": total_spend,
+            "weighted_spend": [(c, a / total_spend) for c, a in spend.items() if a > 0 and c not in GENERAL_SPEND_CATEGORIES],
+            "lifestyle": entries,
+            "services": services,
+            "amazon_fresh": amazon_fresh,
+            "has_lifestyle_data": len(lifestyle) > 0,
+            "age": profile.get("age"),
+            "employment_type": profile.get("employment_type")
+        }
+
+    def score_batch(self, profiles: list, all_cards: bool = False) -> list:
+        """(goal scores, spending scores, values) for each profile, in one pass.
+
+        Each profile is parsed once, and the eligibility mask, goal match counts
+        and lifestyle boosts are shared by the goal and spending scores. Spending
+        matches are recorded as (card mask, builder) so match dicts only get
+        built for the cards that are returned.
+
+        Only cards up to the highest salary's prefix are scored; scores and
+        values of the others are 0. all_cards=True scores the whole catalog.
+        """
+        parsed = [self.parse_profile(p) for p in profiles]
+        n = len(parsed)
+        goal_sets = [q["goal_set"] for q in parsed]
+        prefixes = [self.catalog.salary_prefix(q["salary"]) for q in parsed]
+        columns = self.columns(self.size if all_cards else max(prefixes, default=0))
+        eligible = self._eligible_columns(parsed, prefixes, columns)
+
+        # Goal scores count each distinct goal, spending scores every listed one: one product for both
+        match_counts = self._goal_match_counts(goal_sets + [q["goals"] for q in parsed], columns)
+        goal_match_count, spending_match_count = match_counts[:n], match_counts[n:]
+
+        # Lifestyle boosts, in each profile's entry order. The last matching service names the goal match.
+        goal_updates, spending_updates = [], []
+        lifestyle_matches = []
+        matches = [[] for _ in parsed]
+        for p, q in enumerate(parsed):
+            lifestyle_match = {}
+            for k, (service, usage_percent) in enumerate(q["lifestyle"]):
+                ids = self.co_brand_cards.get(service)
+                if ids is not None:
+                    ranks = self.co_brand_ranks[service]
+                    ranks = ranks[ranks < columns.size]
+                    if len(ids):
+                        goal_updates.append((k, p, ranks, 0.3 * (usage_percent / 100)))
+                        for i in ids:
+                            lifestyle_match[int(i)] = service.replace("_", " ").title()
+                    spending_updates.append((2 * k, p, ranks, 0.3 * (usage_percent / 100)))
+                    matches[p].append((self.co_brand_masks[service], self._static_match({
+                        "type": "co_branded",
+                        "service": service,
+                        "usage": usage_percent,
+                        "benefit": self.co_brand_benefit[service]
+                    })))
+                if service in self.partner_cards:
+                    ranks = self.partner_ranks[service]
+                    spending_updates.append((2 * k + 1, p, ranks[ranks < columns.size], 0.15 * (usage_percent / 100)))
+                    matches[p].append((self.partner_masks[service], self._static_match({
+                        "type": "partner",
+                        "service": service,
+                        "usage": usage_percent,
+                        "benefit": f"Special benefits at {service}"
+                    })))
+            lifestyle_matches.append(lifestyle_match)
+
+        goal_score = self._by_card_id(self._goal_score(parsed, columns, goal_match_count, goal_updates))
+        spending_score = self._by_card_id(self._spending_score(parsed, columns, spending_match_count, spending_updates, matches))
+        values = self._values(parsed, columns)
+        goal_candidates = self._by_card_id(eligible & (goal_match_count > 0))
+        eligible = self._by_card_id(eligible)
+
+        return [({
+            "goals": goal_sets[p],
+            "candidates": goal_candidates[p],
+            "score": goal_score[p],
+            "lifestyle_match": lifestyle_matches[p]
+        }, {
+            "candidates": eligible[p],
+            "score": spending_score[p],
+            "matches": matches[p]
+        }, values[p]) for p in range(n)]
+
+    def _goal_score(self, parsed: list, c: CardColumns, match_count: np.ndarray, updates: list) -> np.ndarray:
+        salaries = [q["salary"] for q in parsed]
+        goal_lists = [q["goal_set"] for q in parsed]
+        spends = [q["spend"] for q in parsed]
+
+        score = 0.5 + match_count * 0.15
+        score += np.where(c.zero_fee, 0.05, 0.0)
+
+        # Boost for international spenders
+        international = _column([s.get("international_travel", 0) > 2000 and "international" in g
+                                 for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(international & c.goal_international_cards, 0.2, 0.0)
+
+        # Boost for domestic transport users
+        transport = _column([s.get("domestic_transport", 0) > 800 and any(x in g for x in ["transport", "careem", "nol"])
+                             for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(transport & c.transport_cards, 0.15, 0.0)
+
+        # Boost for online shoppers
+        online = _column([s.get("online", 0) > 1500 and "online" in g for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(online, c.goal_online_boost, 0.0)
+
+        # Boost for entertainment seekers
+        entertainment = _column(["entertainment" in g for g in goal_lists], bool)
+        score += np.where(entertainment & c.goal_entertainment_cards, 0.2, 0.0)
+
+        # Premium card boost for high earners
+        premium = _column([s >= 50000 and any(x in g for x in ["premium", "luxury"])
+                           for s, g in zip(salaries, goal_lists)], bool)
+        score += np.where(premium & c.premium_cards, 0.25, 0.0)
+
+        # Strong boost for goal+spending alignment
+        online_aligned = _column(["online" in g and s.get("online", 0) > 2000 for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(online_aligned & c.high_online_cards, 0.3, 0.0)
+
+        dining_aligned = _column(["dining" in g and s.get("dining", 0) > 3000 for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(dining_aligned & c.high_dining_cards, 0.3, 0.0)
+
+        # Boost for high travel reward rates
+        travel = _column(["travel" in g or "miles" in g for g in goal_lists], bool)
+        score += np.where(travel, c.travel_boost, 0.0)
+
+        # Entry-level card boost for low salary
+        entry = _column([s <= 6000 and "no_fee" in g for s, g in zip(salaries, goal_lists)], bool)
+        score += np.where(entry & c.entry_goal_cards, 0.15, 0.0)
+
+        # Lifestyle match on co-branded cards
+        self._add_sparse(score, updates)
+
+        return np.minimum(score, 1.0)
+
+    def _spending_score(self, parsed: list, c: CardColumns, goal_matches: np.ndarray, updates: list,
+                        matches: list) -> np.ndarray:
+        score = np.full((len(parsed), c.size), 0.5)
+        self._add_sparse(score, updates)
+
+        high_online, international, transport, general = [], [], [], []
+        for p, q in enumerate(parsed):
+            spend = q["spend"]
+            total_spend = q["total_spend"]
+            online_spend = spend.get("online", 0)
+            international_travel = spend.get("international_travel", 0)
+            domestic_transport = spend.get("domestic_transport", 0)
+            misc_spend = spend.get("miscellaneous", 0)
+
+            # Boost for high online spenders
+            high_online.append(online_spend > 1500)
+            if online_spend > 1500:
+                matches[p].append((self.high_online_cards, self._online_match(
+                    int((online_spend / total_spend) * 100), online_spend)))
+
+            # Boost for international travelers (flights, hotels, foreign spending)
+            international.append(international_travel > 2000)
+            if international_travel > 2000:
+                matches[p].append((self.international_travel_cards, self._static_match({
+                    "type": "international_travel",
+                    "service": "international_travel",
+                    "usage": int((international_travel / total_spend) * 100),
+                    "benefit": f"Enhanced rewards on international travel & foreign spending"
+                })))
+
+            # Boost for domestic transport users (Careem, RTA, etc)
+            transport.append(domestic_transport > 800)
+            if domestic_transport > 800:
+                matches[p].append((self.transport_cards, self._static_match({
+                    "type": "domestic_transport",
+                    "service": "ride_hailing_transport",
+                    "usage": int((domestic_transport / total_spend) * 100),
+                    "benefit": f"Benefits for ride-hailing and local transport"
+                })))
+
+            for usage in q["amazon_fresh"]:
+                matches[p].append((self.is_amazon_card, self._static_match({
+                    "type": "high_usage",
+                    "service": "amazon_fresh",
+                    "usage": usage,
+                    "benefit": f"You use Amazon Fresh {usage}% for groceries - 6% cashback applies!"
+                })))
+
+            general.append(misc_spend > 0 and misc_spend / total_spend > 0.3)
+            if general[-1]:
+                matches[p].append((self.general_reward_cards, self._general_match(
+                    int((misc_spend / total_spend) * 100), misc_spend)))
+
+        score += np.where(_column(high_online, bool) & c.high_online_cards, 0.2, 0.0)
+        score += np.where(_column(international, bool) & c.international_travel_cards, 0.15, 0.0)
+        score += np.where(_column(transport, bool) & c.transport_cards, 0.1, 0.0)
+
+        # Entry-level card boost
+        entry = _column([q["salary"] <= 6000 for q in parsed], bool)
+        score += np.where(entry & c.entry_level_cards, 0.1, 0.0)
+
+        # Entertainment boost
+        entertainment = _column([q["spend"].get("dining", 0) + q["spend"].get("online", 0) > 2000 for q in parsed], bool)
+        score += np.where(entertainment & c.entertainment_cards, 0.1, 0.0)
+
+        # Amazon Fresh heavy users, once per qualifying groceries entry
+        amazon_fresh_boosts = [len(q["amazon_fresh"]) for q in parsed]
+        amazon_fresh = _column(amazon_fresh_boosts, int)
+        for t in range(max(amazon_fresh_boosts, default=0)):
+            score += np.where((amazon_fresh > t) & c.is_amazon_card, 0.2, 0.0)
+
+        score += np.where(_column(general, bool) & c.general_reward_cards, 0.25, 0.0)
+
+        # Category-weighted reward score, one profile x card step per spend position
+        weighted = [q["weighted_spend"] for q in parsed]
+        for j in range(max((len(items) for items in weighted), default=0)):
+            categories = [items[j][0] if j < len(items) else None for items in weighted]
+            weight = _column([items[j][1] if j < len(items) else 0.0 for items in weighted])
+            reward_rate = c.reward_rates[:, self._reward_columns(categories)].T
+            score += np.where(reward_rate > 0, weight * (reward_rate / 5) * 0.2, 0.0)
+
+        misc = _column([q["spend"].get("miscellaneous", 0) > 0 for q in parsed], bool)
+        weight = _column([q["spend"].get("miscellaneous", 0) / q["total_spend"] for q in parsed])
+        score += np.where(misc & (c.misc_rate > 0), weight * (c.misc_rate / 5) * 0.2, 0.0)
+
+        score += np.minimum(goal_matches * 0.1, 0.15)
+
+        score += np.where(c.zero_fee, 0.05, 0.0)
+
+        return np.minimum(score, 1.0)
+
+    def _values(self, parsed: list, c: CardColumns) -> list:
+        spend_items = [q["spend_items"] for q in parsed]
+
+        total_rewards = np.zeros((len(parsed), c.size))
+        excluded_spend = np.zeros((len(parsed), c.size))
+
+        for j in range(max((len(items) for items in spend_items), default=0)):
+            categories = [items[j][0] if j < len(items) else None for items in spend_items]
+            amount = _column([items[j][1] if j < len(items) else 0 for items in spend_items])
+
+            # Only apply exclusion logic if user provided lifestyle data for this category
+            excluded = np.zeros((len(parsed), c.size), dtype=bool)
+            for p, category in enumerate(categories):
+                if category is None:
+                    continue
+                user_services = parsed[p]["services"].get(LIFESTYLE_CATEGORY_KEYS.get(category, ""))
+                if user_services:
+                    excluded[p] = ~self._services_in_use(user_services)[c.co_brand_service_id]
+            excluded_spend += np.where(excluded, amount, 0)
+
+            columns = self._reward_columns(categories)
+            has_rate = c.has_reward[:, columns].T
+            earned = np.where(has_rate, amount * 12 * c.reward_rates[:, columns].T / 100, 0.0)
+            general = _column([k in GENERAL_SPEND_CATEGORIES for k in categories], bool) & c.is_general_rewards & ~has_rate
+            earned = np.where(general, amount * 12 * c.general_rate / 100, earned)
+            total_rewards += np.where(excluded, 0.0, earned)
+
+        total_rewards = self._by_card_id(total_rewards)
+        excluded_spend = self._by_card_id(excluded_spend)
+        return [{
+            "total_rewards": total_rewards[p],
+            "excluded_spend": excluded_spend[p],
+            "has_lifestyle_data": parsed[p]["has_lifestyle_data"]
+        } for p in range(len(parsed))]
+
+    @staticmethod
+    def _static_match(match: dict):
+        return lambda card: dict(match)
+
+    @staticmethod
+    def _online_match(usage: int, online_spend):
+        return lambda card: {
+            "type": "high_online",
+            "service": "online_shopping",
+            "usage": usage,
+            "benefit": f"{card['rewards'].get('online', 0)}% on online spending ({online_spend} AED/month)"
+        }
+
+    @staticmethod
+    def _general_match(usage: int, misc_spend):
+        return lambda card: {
+            "type": "general_rewards",
+            "service": "miscellaneous",
+            "usage": usage,
+            "benefit": f"Flat {list(card['rewards'].values())[0]}% on all spending including miscellaneous ({int(misc_spend)} AED/month)"
+        }
+
+    def build_matches(self, scored: dict, i: int) -> list:
+        """Materialize the lifestyle match dicts for card i."""
+        card = self.cards[i]
+        return [build(card) for hit, build in scored["matches"] if hit[i]]
+
+    def _services_in_use(self, user_services: list) -> np.ndarray:
+        """Per co-branded service id, whether the user uses it (the trailing True is for cards with none)."""
+        return np.array([service in user_services for service in self.co_brand_services] + [True], dtype=bool)
+
+    def _excluded_cards(self, user_services: list) -> np.ndarray:
+        """Co-branded cards whose partner service the user doesn't use."""
+        return ~self._services_in_use(user_services)[self.co_brand_service_id]
+
+    def format_value(self, values: dict, i: int) -> str:
+        """Human readable estimated annual value for card i."""
+        annual_fee = self.cards[i]["annual_fee"]
+        total_rewards = float(values["total_rewards"][i])
+        excluded_spend = float(values["excluded_spend"][i])
+        net_value = total_rewards - annual_fee
+
+        exclusion_note = ""
+        if excluded_spend > 0 and values["has_lifestyle_data"]:
+            exclusion_note = f" (excludes {int(excluded_spend)} AED/month at non-partner merchants)"
+        elif not values["has_lifestyle_data"] and self.co_brand_service[i]:
+            exclusion_note = " (assumes all spending at partner merchants)"
+
+        if net_value > 0:
+            return f"approx. {int(net_value)} AED net benefit annually{exclusion_note}"
+        else:
+            return f"approx. {int(total_rewards)} AED rewards (minus {annual_fee} AED fee){exclusion_note}"
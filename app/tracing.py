@@ -0,0 +1,278 @@
+"""
+Lightweight in-process span tracing
+A trace is opened per API request; code marks its stages with span(). Outside
+an active trace, span() returns a shared no-op, so instrumented code paths
+(benchmarks, CLI, batch scoring) pay one context-variable lookup per stage.
+Finished traces feed the Server-Timing header and, when TRACE_EXPORT is set,
+are exported in OTLP/JSON to a file or an OTLP/HTTP collector in the background
+"""
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from app.config import TRACING_ENABLED, TRACE_EXPORT, TRACE_SAMPLE_RATE
+
+SERVICE_NAME = "uae-credit-card-recommender"
+MAX_SPANS_PER_TRACE = 1000
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "duration_ns", "attributes", "perf_start", "token")
+
+    def __init__(self, trace, name: str, parent_id: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.perf_start = time.perf_counter_ns()
+        self.duration_ns = None
+        self.token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration_ns = time.perf_counter_ns() - self.perf_start
+
+    def __enter__(self):
+        self.token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end()
+        if exc is not None:
+            self.attributes["error"] = repr(exc)
+        _current_span.reset(self.token)
+        self.trace.add(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned by span() when no trace is active."""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """The spans recorded for one request; the root span is the request itself."""
+
+    def __init__(self, name: str, attributes: dict = None):
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.root = Span(self, name, None, dict(attributes or {}))
+        self.token = _current_span.set(self.root)
+
+    def add(self, span: Span):
+        with self.lock:
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def finish(self):
+        """End the root span and detach the trace from the current context."""
+        self.root.end()
+        try:
+            _current_span.reset(self.token)
+        except ValueError:
+            # Finished from a different context than it was started in
+            _current_span.set(None)
+        self.add(self.root)
+
+    def stage_durations(self) -> dict:
+        """Total milliseconds per span name, in first-seen order (root excluded)."""
+        totals = {}
+        with self.lock:
+            spans = list(self.spans)
+        for s in spans:
+            if s is not self.root and s.duration_ns is not None:
+                totals[s.name] = totals.get(s.name, 0) + s.duration_ns / 1e6
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value summarizing the stages and the total."""
+        metrics = [f"{name};dur={ms:.2f}" for name, ms in self.stage_durations().items()]
+        if self.root.duration_ns is not None:
+            metrics.append(f"total;dur={self.root.duration_ns / 1e6:.2f}")
+        return ", ".join(metrics)
+
+
+def span(name: str, **attributes):
+    """Context manager timing one stage under the current span (no-op without a trace)."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                return func(*args, **kwargs)
+            with Span(parent.trace, name, parent.span_id, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace():
+    parent = _current_span.get()
+    return parent.trace if parent is not None else None
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def to_otlp(traces: list) -> dict:
+    """An OTLP/JSON ExportTraceServiceRequest for finished traces."""
+    spans = []
+    for trace in traces:
+        with trace.lock:
+            recorded = list(trace.spans)
+        for s in recorded:
+            if s.duration_ns is None:
+                continue
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": SPAN_KIND_SERVER if s is trace.root else SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.start_ns + s.duration_ns),
+                "attributes": [_attribute(k, v) for k, v in s.attributes.items()]
+            }
+            if s.parent_id:
+                otlp_span["parentSpanId"] = s.parent_id
+            spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}]
+        }]
+    }
+
+
+class TraceExporter:
+    """Background exporter: OTLP/JSON lines appended to a file, or POSTed to an OTLP/HTTP endpoint.
+
+    Requests only enqueue; a full queue drops traces rather than slowing requests down.
+    """
+
+    def __init__(self, target: str, flush_interval: float = 1.0, max_queue: int = 10000, batch_size: int = 100):
+        self.target = target
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.exported = 0
+        self.pid = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def _start(self):
+        # Threads and queues do not survive a fork: start fresh in each process
+        self.pid = os.getpid()
+        self.queue = queue.Queue(maxsize=self.max_queue)
+        self.thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self.thread.start()
+
+    def submit(self, trace: Trace):
+        if self.pid != os.getpid() or not self.thread.is_alive():
+            with self.lock:
+                if self.pid != os.getpid() or not self.thread.is_alive():
+                    self._start()
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch)
+                self.exported += len(batch)
+            except Exception as e:
+                print(f"[WARN] Trace export to {self.target} failed: {e}")
+            for _ in batch:
+                self.queue.task_done()
+
+    def export(self, traces: list):
+        payload = json.dumps(to_otlp(traces))
+        if self.target.startswith(("http://", "https://")):
+            req = urllib.request.Request(self.target, data=payload.encode(),
+                                         headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(req, timeout=5) as response:
+                response.read()
+        else:
+            with open(self.target, "a") as f:
+                f.write(payload + "\n")
+
+    def flush(self, timeout: float = 5):
+        """Wait until queued traces are exported (for tests and shutdown)."""
+        end = time.monotonic() + timeout
+        while self.thread is not None and self.queue.unfinished_tasks and time.monotonic() < end:
+            time.sleep(0.01)
+
+
+class Tracer:
+    """Starts request traces and hands finished ones to the exporter."""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, export: str = TRACE_EXPORT, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = TraceExporter(export) if export else None
+
+    def start_trace(self, name: str, **attributes):
+        """Open a trace in the current context, or None when tracing is disabled."""
+        if not self.enabled:
+            return None
+        return Trace(name, attributes)
+
+    def finish(self, trace: Trace):
+        trace.finish()
+        if self.exporter is not None and (self.sample_rate >= 1 or random.random() < self.sample_rate):
+            self.exporter.submit(trace)
+
+
+tracer = Tracer()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Synthetic card catalogs for scaling tests
+
+Generates catalogs of any size in the schema of the real data files:
+uae_cards.json, uae_cards_detailed.json, card_service_mapping.json and
+card_apply_urls.json. Banks, apply-URL domains, reward categories, best_for
+tags and partner services are taken from the real data, so the synthetic
+cards exercise the same scoring paths.
+
+    python benchmarks/catalog_synth.py --cards 10000 --out /tmp/catalog_10k
+    python benchmarks/catalog_synth.py --scale 1000 10000 100000 --save scaling.json --plot scaling.png
+
+Scale mode builds a CardAdvisor (stub LLM and retriever) on each catalog and
+reports index-build time, snapshot memory and recommend latency per size.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app.catalog_store import (APPLY_URLS_FILE, CARDS_FILE, DATA_DIR, DETAILED_CARDS_FILE, SERVICE_MAPPING_FILE,
+                               CatalogSnapshot)
+
+# (tier, annual fee range, min salary range, weight)
+TIERS = [
+    ("Classic", (0, 0), (5000, 5000), 0.15),
+    ("Gold", (0, 300), (5000, 8000), 0.2),
+    ("Titanium", (0, 400), (8000, 10000), 0.15),
+    ("Platinum", (300, 800), (10000, 15000), 0.2),
+    ("Signature", (500, 1200), (15000, 25000), 0.15),
+    ("Infinite", (1000, 1500), (25000, 50000), 0.1),
+    ("World Elite", (1500, 3000), (40000, 100000), 0.05)
+]
+NETWORKS = ["Visa", "Mastercard", "American Express", "Diners Club"]
+BASE_CATEGORIES = ["groceries", "travel", "fuel", "online", "dining"]
+EXTRA_CATEGORIES = ["entertainment", "education", "utilities", "telecom", "international", "retail", "healthcare"]
+# theme -> (reward categories it boosts, best_for tags)
+THEMES = {
+    "Cashback": (["groceries", "online", "dining"], ["cashback"]),
+    "Travel": (["travel", "international"], ["travel", "miles", "airport_lounge"]),
+    "Dining": (["dining", "entertainment"], ["dining", "entertainment"]),
+    "Fuel": (["fuel"], ["fuel", "cashback"]),
+    "Shopping": (["online", "retail"], ["online", "retail"]),
+    "Family": (["groceries", "education", "utilities"], ["groceries", "education"]),
+    "Lifestyle": (["entertainment", "dining"], ["lifestyle", "entertainment"]),
+    "Premium": (["travel", "dining"], ["premium", "concierge", "airport_lounge"])
+}
+
+
+def _load_json(filename: str):
+    with open(os.path.join(DATA_DIR, filename), "r") as f:
+        return json.load(f)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+class CatalogSynthesizer:
+    """Seeded generator of catalogs that look like the real data files."""
+
+    def __init__(self, seed: int = 42, co_brand_rate: float = 0.05, partner_rate: float = 0.1):
+        self.rng = random.Random(seed)
+        self.co_brand_rate = co_brand_rate
+        self.partner_rate = partner_rate
+
+        cards = _load_json(CARDS_FILE)
+        apply_urls = _load_json(APPLY_URLS_FILE)["cards"]
+        self.banks = sorted({card["bank"] for card in cards})
+        self.domains = {}
+        for entry in apply_urls.values():
+            self.domains.setdefault(entry["bank"], urlparse(entry["apply_url"]).netloc)
+        self.tags = sorted({tag for card in cards for tag in card.get("best_for", [])})
+        lifestyle = _load_json("uae_lifestyle_categories.json")["categories"]
+        self.services = [
+            option["value"] if isinstance(option, dict) else option
+            for category in lifestyle.values() for option in category["options"]
+        ]
+
+    def _bank_code(self, bank: str) -> str:
+        return "".join(w if w.isupper() else w[0].upper() for w in re.findall(r"[A-Za-z]+", bank))
+
+    def _card(self, i: int) -> dict:
+        tier, fee_range, salary_range, _ = self.rng.choices(TIERS, weights=[t[3] for t in TIERS])[0]
+        theme = self.rng.choice(sorted(THEMES))
+        bank = self.rng.choice(self.banks)
+        boosted, theme_tags = THEMES[theme]
+
+        rewards = {category: round(self.rng.uniform(0.5, 2.0), 1) for category in BASE_CATEGORIES}
+        for category in self.rng.sample(EXTRA_CATEGORIES, self.rng.randint(0, 2)):
+            rewards[category] = round(self.rng.uniform(0.5, 3.0), 1)
+        for category in boosted:
+            rewards[category] = round(self.rng.uniform(3.0, 10.0), 1)
+
+        annual_fee = self.rng.choice([0, 0, int(round(self.rng.uniform(*fee_range), -1))])
+        best_for = list(dict.fromkeys(theme_tags + self.rng.sample(self.tags, self.rng.randint(0, 2))))
+        if annual_fee == 0:
+            best_for.append("no_fee")
+        return {
+            "name": f"{bank} {theme} {tier} Card {i:06d}",
+            "bank": bank,
+            "annual_fee": annual_fee,
+            "min_salary": int(round(self.rng.uniform(*salary_range), -3)),
+            "rewards": rewards,
+            "best_for": best_for,
+            "notes": f"Synthetic {tier} {theme.lower()} card. {', '.join(boosted)} earn up to {max(rewards.values())}%.",
+            "tier": tier,
+            "theme": theme
+        }
+
+    def _detailed(self, i: int, card: dict, apply_url: str) -> dict:
+        """uae_cards_detailed.json record for a card."""
+        bank_code = self._bank_code(card["bank"])
+        bonus = sorted(THEMES[card["theme"]][0])
+        rewards = {"general": f"{min(card['rewards'].values())}% on all spends"}
+        rewards.update(card["rewards"])
+        rewards["airline_specific"] = ""
+        rewards["other_categories"] = ""
+        min_spend = self.rng.choice([0, 3000, 5000, 10000])
+        return {
+            "card_id": f"{bank_code}_SYN_{i:06d}",
+            "name": card["name"],
+            "bank": card["bank"],
+            "bank_code": bank_code,
+            "network": self.rng.sample(NETWORKS, 1),
+            "tier": card["tier"],
+            "card_variant": f"{card['theme']} {card['tier']}",
+            "annual_fee": card["annual_fee"],
+            "min_salary": card["min_salary"],
+            "currency": "AED",
+            "interest_rate": f"{self.rng.choice([2.99, 3.25, 3.49, 3.69])}% per month",
+            "estimated_annual_savings": int(sum(card["rewards"].values()) * 200),
+            "last_updated": "Synthetic",
+            "urls": {
+                "primary_apply_url": apply_url,
+                "card_details_url": apply_url,
+                "bank_general_apply": apply_url.rsplit("/", 1)[0]
+            },
+            "rewards": rewards,
+            "rewards_conditions": {
+                "min_monthly_spend_for_bonus": min_spend,
+                "bonus_categories": bonus,
+                "bonus_rate": f"{max(card['rewards'][c] for c in bonus if c in card['rewards'])}%",
+                "standard_rate_if_not_met": rewards["general"] if min_spend else ""
+            },
+            "best_for": card["best_for"],
+            "eligibility": {
+                "min_salary_aed": card["min_salary"],
+                "age_min": self.rng.choice([18, 21, 21, 23]),
+                "age_max": self.rng.choice([60, 65, 65, 70]),
+                "employment_type": self.rng.choice([["salaried", "self_employed"], ["salaried"]]),
+                "nationality_restrictions": "UAE residents only"
+            },
+            "fees": {
+                "annual_fee": card["annual_fee"],
+                "annual_fee_conditions": "Free for Life" if card["annual_fee"] == 0 else "",
+                "supplementary_card_fee": "",
+                "foreign_txn_fee": "",
+                "late_payment_fee": "",
+                "cash_advance_fee": ""
+            },
+            "benefits": {
+                "airport_lounge": "Complimentary lounge access" if "airport_lounge" in card["best_for"] else "",
+                "other_benefits": []
+            },
+            "restrictions": {
+                "region_limitations": "Global",
+                "category_caps": f"Bonus categories require {min_spend:,} AED monthly spend" if min_spend else "",
+                "notes": ""
+            },
+            "notes": card["notes"]
+        }
+
+    def generate(self, n: int) -> dict:
+        """{filename: file contents} for a catalog of n cards."""
+        cards, detailed, apply_urls = [], [], {}
+        for i in range(n):
+            card = self._card(i)
+            domain = self.domains.get(card["bank"], f"www.{_slug(card['bank'])}.ae")
+            apply_url = f"https://{domain}/credit-cards/{_slug(card['name'])}"
+            apply_urls[card["name"]] = {"apply_url": apply_url, "bank": card["bank"]}
+            detailed.append(self._detailed(i, card, apply_url))
+            del card["tier"], card["theme"]
+            cards.append(card)
+
+        # Real services get co-brands first, then synthetic merchants
+        co_branded, partners = {}, {}
+        co_brand_count = max(1, int(n * self.co_brand_rate))
+        services = self.services + [f"partner_{i:05d}" for i in range(max(0, co_brand_count - len(self.services)))]
+        for service, card in zip(services, self.rng.sample(cards, min(co_brand_count, n))):
+            co_branded[service] = {
+                "card_name": card["name"],
+                "bank": card["bank"],
+                "benefit": f"{self.rng.randint(2, 10)}% back at {service.replace('_', ' ').title()}",
+                "priority": 1
+            }
+        for card in self.rng.sample(cards, int(n * self.partner_rate)):
+            partners.setdefault(self.rng.choice(self.services), []).append(card["name"])
+
+        return {
+            CARDS_FILE: cards,
+            DETAILED_CARDS_FILE: detailed,
+            SERVICE_MAPPING_FILE: {
+                "metadata": {"version": "synthetic", "description": f"Synthetic mapping for {n} cards"},
+                "co_branded_cards": co_branded,
+                "partner_benefits": partners
+            },
+            APPLY_URLS_FILE: {
+                "metadata": {"version": "synthetic", "description": f"Synthetic apply URLs for {n} cards"},
+                "cards": apply_urls
+            }
+        }
+
+
+def write_catalog(files: dict, out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+    for filename, content in files.items():
+        with open(os.path.join(out_dir, filename), "w") as f:
+            json.dump(content, f)
+
+
+def measure_scale(size: int, profiles: list, seed: int, iterations: int) -> dict:
+    """Index-build time, snapshot memory and recommend latency on a synthetic catalog."""
+    from app.agent import CardAdvisor
+    from benchmarks.stubs import install_stubs
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_catalog(CatalogSynthesizer(seed).generate(size), data_dir)
+
+        start = time.perf_counter()
+        CatalogSnapshot.load(data_dir)
+        build_s = time.perf_counter() - start
+
+        tracemalloc.start()
+        CatalogSnapshot.load(data_dir)
+        snapshot_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+        advisor = install_stubs(CardAdvisor(data_dir=data_dir))
+
+    score_ms, recommend_ms = [], []
+    for i in range(iterations):
+        profile = profiles[i % len(profiles)]
+        t = time.perf_counter()
+        next(advisor.recommend_batch([dict(profile)], explain=False))
+        score_ms.append((time.perf_counter() - t) * 1000)
+        advisor.recommendation_cache.clear()
+        t = time.perf_counter()
+        advisor.recommend(dict(profile))
+        recommend_ms.append((time.perf_counter() - t) * 1000)
+
+    return {
+        "cards": size,
+        "build_ms": round(build_s * 1000, 1),
+        "snapshot_peak_mb": round(snapshot_kb / 1024, 2),
+        "score_p50_ms": round(float(np.percentile(score_ms, 50)), 3),
+        "score_p95_ms": round(float(np.percentile(score_ms, 95)), 3),
+        "recommend_p50_ms": round(float(np.percentile(recommend_ms, 50)), 3),
+        "recommend_p95_ms": round(float(np.percentile(recommend_ms, 95)), 3)
+    }
+
+
+def plot(results: list, path: str):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("[WARN] matplotlib not installed, skipping plot")
+        return
+    sizes = [r["cards"] for r in results]
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+    for ax, keys, label in (
+        (axes[0], ["score_p50_ms", "recommend_p50_ms", "recommend_p95_ms"], "latency (ms)"),
+        (axes[1], ["snapshot_peak_mb"], "snapshot memory (MB)"),
+        (axes[2], ["build_ms"], "index build (ms)")
+    ):
+        for key in keys:
+            ax.plot(sizes, [r[key] for r in results], marker="o", label=key)
+        ax.set_xscale("log")
+        ax.set_xlabel("cards")
+        ax.set_ylabel(label)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"✓ Plot saved to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize card catalogs and measure scaling")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cards", type=int, default=1000, help="catalog size to write with --out")
+    parser.add_argument("--out", help="directory to write the catalog files to")
+    parser.add_argument("--scale", type=int, nargs="+", help="catalog sizes to benchmark, e.g. 1000 10000 100000")
+    parser.add_argument("--iterations", type=int, default=50, help="recommend calls per size")
+    parser.add_argument("--profiles", type=int, default=200)
+    parser.add_argument("--save", help="write scaling results as JSON")
+    parser.add_argument("--plot", help="write a PNG of latency, memory and build time vs size (needs matplotlib)")
+    args = parser.parse_args(argv)
+
+    if args.out:
+        write_catalog(CatalogSynthesizer(args.seed).generate(args.cards), args.out)
+        print(f"✓ Wrote {args.cards} synthetic cards to {args.out}")
+    if not args.scale:
+        return 0
+
+    from benchmarks.run_benchmarks import synthetic_profiles
+    profiles = synthetic_profiles(args.profiles, args.seed)
+    results = []
+    print(f"{'cards':>8}{'build ms':>11}{'snap MB':>10}{'score p50':>11}{'score p95':>11}{'rec p50':>10}{'rec p95':>10}")
+    for size in args.scale:
+        r = measure_scale(size, profiles, args.seed, args.iterations)
+        results.append(r)
+        print(f"{r['cards']:>8}{r['build_ms']:>11}{r['snapshot_peak_mb']:>10}{r['score_p50_ms']:>11}"
+              f"{r['score_p95_ms']:>11}{r['recommend_p50_ms']:>10}{r['recommend_p95_ms']:>10}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"seed": args.seed, "iterations": args.iterations, "results": results}, f, indent=2)
+        print(f"\n✓ Scaling results saved to {args.save}")
+    if args.plot:
+        plot(results, args.plot)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+HTTP load driver for a running API server
+
+Replays synthetic traffic (generated on the fly, or read from an NDJSON file
+written by benchmarks/traffic.py) against the API with a fixed number of
+concurrent clients, then reports throughput and latency percentiles per
+endpoint.
+
+    python serve.py &
+    python benchmarks/load_driver.py --url http://127.0.0.1:5000 --requests 5000 --concurrency 16
+    python benchmarks/load_driver.py --input traffic.ndjson --rate 200
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from benchmarks.traffic import EVENT_MIX, add_distribution_args, build_generator, read_ndjson
+
+ENDPOINTS = {
+    "recommend": "/api/recommend",
+    "questions": "/api/generate-questions",
+    "chat": "/api/chat"
+}
+
+
+def send(base_url: str, event: dict, timeout: float) -> tuple:
+    """POST one event; returns (kind, status, seconds)."""
+    body = json.dumps(event["payload"]).encode()
+    req = urllib.request.Request(base_url + ENDPOINTS[event["kind"]], data=body,
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return event["kind"], status, time.perf_counter() - start
+
+
+def run(base_url: str, events, concurrency: int = 8, rate: float = 0, timeout: float = 30) -> dict:
+    """Send every event with `concurrency` clients (and at most `rate` req/s if set)."""
+    timings = {}
+    errors = {}
+    lock = threading.Lock()
+    # Bounded in-flight work so a long event stream is never fully buffered
+    slots = threading.BoundedSemaphore(concurrency * 2)
+
+    def record(future):
+        kind, status, seconds = future.result()
+        with lock:
+            timings.setdefault(kind, []).append(seconds)
+            if not 200 <= status < 300:
+                errors[kind] = errors.get(kind, 0) + 1
+        slots.release()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, event in enumerate(events):
+            if rate > 0:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            pool.submit(send, base_url, event, timeout).add_done_callback(record)
+    elapsed = time.perf_counter() - start
+
+    report = {}
+    for kind, values in sorted(timings.items()):
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        report[kind] = {
+            "requests": len(values),
+            "errors": errors.get(kind, 0),
+            "throughput_per_s": round(len(values) / elapsed, 1),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2)
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay synthetic traffic against a running API")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--requests", type=int, default=1000, help="events to generate (ignored with --input)")
+    parser.add_argument("--input", help="NDJSON events from benchmarks/traffic.py ('-' for stdin)")
+    parser.add_argument("--kind", choices=sorted(EVENT_MIX), help="only send this kind (default: mixed)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="max requests per second (0 = unthrottled)")
+    parser.add_argument("--timeout", type=float, default=30)
+    add_distribution_args(parser)
+    args = parser.parse_args(argv)
+
+    if args.input:
+        events = read_ndjson(args.input)
+    else:
+        events = build_generator(args).events(args.requests, args.kind)
+
+    report = run(args.url.rstrip("/"), events, args.concurrency, args.rate, args.timeout)
+
+    print(f"{'endpoint':<14}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, r in report.items():
+        print(f"{kind:<14}{r['requests']:>10}{r['errors']:>8}{r['throughput_per_s']:>10}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+    return 1 if any(r["errors"] for r in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
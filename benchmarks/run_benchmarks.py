@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the recommendation hot path
+
+Builds CardAdvisor with the stub LLM and retriever (benchmarks/stubs.py) and
+drives the main entry points with seeded synthetic traffic (benchmarks/traffic.py),
+reporting throughput, p50/p95/p99 latency and peak allocation per call.
+
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+
+With --compare, any operation whose p50/p95 latency or allocation grew (or
+throughput dropped) by more than --threshold is flagged and the exit code is 1.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app.agent import CardAdvisor
+from app.profiles import normalize_goals
+from app.question_generator import generate_questions, enrich_profile_with_answers
+from benchmarks.stubs import install_stubs
+from benchmarks.traffic import TrafficGenerator
+
+DEFAULT_OPERATIONS = ["recommend", "recommend_cached", "score_only", "recommend_batch", "filter_recommendations",
+                      "generate_questions", "enrich_profile_with_answers", "chat_turn"]
+BATCH_SIZE = 64
+
+
+def synthetic_profiles(n: int, seed: int) -> list:
+    """Seeded profiles from the traffic generator, with goals normalized as the API does."""
+    generator = TrafficGenerator(seed=seed)
+    profiles = []
+    for profile in generator.profiles(n):
+        profile["goals"] = normalize_goals(profile["goals"])
+        profiles.append(profile)
+    return profiles
+
+
+def build_operations(advisor, profiles: list, seed: int) -> dict:
+    """name -> callable(i) running one call on the i-th input."""
+    generator = TrafficGenerator(seed=seed)
+    results = [next(advisor.recommend_batch([copy.deepcopy(p)], explain=False)) for p in profiles[:50]]
+    answers = [generator.answers(p) for p in profiles]
+    chat_questions = [generator.chat_question() for _ in range(100)]
+    batches = [profiles[i:i + BATCH_SIZE] for i in range(0, len(profiles), BATCH_SIZE)]
+    n = len(profiles)
+
+    def recommend(i):
+        # Measure the scoring path, not the recommendation cache
+        advisor.recommendation_cache.clear()
+        return advisor.recommend(copy.deepcopy(profiles[i % n]))
+
+    return {
+        "recommend": recommend,
+        "recommend_cached": lambda i: advisor.recommend(copy.deepcopy(profiles[i % 50])),
+        "score_only": lambda i: next(advisor.recommend_batch([copy.deepcopy(profiles[i % n])], explain=False)),
+        "recommend_batch": lambda i: list(advisor.recommend_batch(copy.deepcopy(batches[i % len(batches)]), explain=False)),
+        "filter_recommendations": lambda i: advisor.filter_recommendations(
+            results[i % len(results)]["recommendations"], "annual_fee", "No annual fee"),
+        "generate_questions": lambda i: generate_questions(
+            profiles[i % n]["salary"], profiles[i % n]["spend"], profiles[i % n]["lifestyle"], profiles[i % n]["goals"]),
+        "enrich_profile_with_answers": lambda i: enrich_profile_with_answers(copy.deepcopy(profiles[i % n]), answers[i % n]),
+        "chat_turn": lambda i: advisor.chat_turn(chat_questions[i % len(chat_questions)], profiles[i % n]),
+    }
+
+
+def measure(operation, iterations: int, warmup: int, alloc_samples: int) -> dict:
+    for i in range(warmup):
+        operation(i)
+
+    timings = np.empty(iterations)
+    start = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        operation(i)
+        timings[i] = time.perf_counter() - t
+    total = time.perf_counter() - start
+
+    # Allocation pass runs separately: tracemalloc slows every call down
+    peaks = []
+    tracemalloc.start()
+    for i in range(min(alloc_samples, iterations)):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        operation(i)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+    return {
+        "calls": iterations,
+        "throughput_per_s": round(iterations / total, 1),
+        "mean_ms": round(float(timings.mean()) * 1000, 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "alloc_peak_kb": round(float(np.mean(peaks)) / 1024, 2) if peaks else 0.0
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Regression messages for operations that got worse than the baseline by more than threshold."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms", "alloc_peak_kb"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 - threshold):
+            regressions.append(f"{name}: throughput_per_s {previous['throughput_per_s']} -> {current['throughput_per_s']}")
+    return regressions
+
+
+def print_table(results: dict, baseline: dict = None):
+    print(f"{'operation':<30}{'ops/s':>12}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'alloc KB':>11}")
+    for name, r in results.items():
+        line = f"{name:<30}{r['throughput_per_s']:>12}{r['p50_ms']:>11.3f}{r['p95_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['alloc_peak_kb']:>11.1f}"
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous and previous["p50_ms"]:
+            line += f"   ({(r['p50_ms'] / previous['p50_ms'] - 1) * 100:+.1f}% p50)"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline CardAdvisor benchmarks (stub LLM and retriever)")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-samples", type=int, default=100)
+    parser.add_argument("--profiles", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated latency per stub LLM call")
+    parser.add_argument("--ops", nargs="+", default=DEFAULT_OPERATIONS, choices=DEFAULT_OPERATIONS)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    advisor = install_stubs(CardAdvisor(), llm_latency=args.llm_latency_ms / 1000)
+    profiles = synthetic_profiles(args.profiles, args.seed)
+    operations = build_operations(advisor, profiles, args.seed)
+
+    results = {}
+    for name in args.ops:
+        results[name] = measure(operations[name], args.iterations, args.warmup, args.alloc_samples)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cards": len(advisor.cards_data),
+            "catalog_version": advisor.catalog_version,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "llm_latency_ms": args.llm_latency_ms,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "results": results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"   {message}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
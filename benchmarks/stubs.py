@@ -0,0 +1,100 @@
+"""
+Deterministic stand-ins for the LLM and retriever tiers
+Let CardAdvisor run fully offline: no Groq key, no langchain, no Chroma, no model
+"""
+import time
+from app.query_planner import _bank_aliases
+
+
+class StubLLMAgent:
+    """Same interface as LLMAgent; returns fixed text after an optional simulated latency."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def generate_card_explanation(self, card: dict, user_profile: dict) -> str:
+        self._wait()
+        return f"{card['card_name']} fits your {card.get('recommendation_type', 'spending')} profile ({card['fit_score']})."
+
+    def answer_question(self, question: str, context: str, user_profile: dict = None) -> str:
+        self._wait()
+        return f"Answer to '{question}' from {len(context)} characters of context."
+
+
+class StubDocument:
+    def __init__(self, page_content: str, metadata: dict):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    """Enough of Chroma's where-filter syntax for the query planner's filters."""
+    if "$and" in where:
+        return all(_matches(metadata, w) for w in where["$and"])
+    if "$or" in where:
+        return any(_matches(metadata, w) for w in where["$or"])
+    for field, condition in where.items():
+        value = metadata.get(field)
+        for op, target in condition.items():
+            if value is None:
+                return False
+            if op == "$eq" and value != target:
+                return False
+            if op == "$lte" and not value <= target:
+                return False
+            if op == "$in" and value not in target:
+                return False
+    return True
+
+
+class StubVectorStore:
+    """Keyword-overlap ranking over one document per card."""
+
+    def __init__(self, cards: list):
+        self.documents = [
+            StubDocument(
+                f"Card: {card['name']}\nBank: {card['bank']}\nAnnual Fee: {card['annual_fee']} AED\n"
+                f"Minimum Salary: {card['min_salary']} AED\nBest For: {', '.join(card.get('best_for', []))}\n"
+                f"Details: {card.get('notes', '')}",
+                {"name": card["name"], "bank": card["bank"], "annual_fee": card["annual_fee"],
+                 "min_salary": card["min_salary"], "type": "card"}
+            )
+            for card in cards
+        ]
+        self.terms = [set(doc.page_content.lower().split()) for doc in self.documents]
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None) -> list:
+        words = set(query.lower().split())
+        ranked = sorted(
+            (i for i, doc in enumerate(self.documents) if not filter or _matches(doc.metadata, filter)),
+            key=lambda i: -len(words & self.terms[i])
+        )
+        return [self.documents[i] for i in ranked[:k]]
+
+
+class StubRetriever:
+    def __init__(self, cards: list, k: int = 10):
+        self.vectorstore = StubVectorStore(cards)
+        self.search_kwargs = {"k": k}
+
+    def get_relevant_documents(self, query: str) -> list:
+        return self.vectorstore.similarity_search(query, k=self.search_kwargs["k"])
+
+
+def install_stubs(advisor, llm_latency: float = 0.0):
+    """Swap the advisor's LLM, retriever and memory tiers for the stubs."""
+    from app.retrieval_cache import RetrievalCache
+
+    cards = advisor.cards_data
+    advisor.components.register("retriever", lambda: StubRetriever(cards))
+    advisor.components.register("embeddings", lambda: None)
+    advisor.components.register("llm", lambda: StubLLMAgent(llm_latency))
+    advisor.components.register("memory", lambda: None)
+    # No on-disk index to version, and warm the alias table outside the timings
+    advisor.retrieval_cache = RetrievalCache()
+    _bank_aliases()
+    return advisor
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenTelemetry collector
+
+Accepts OTLP/HTTP JSON exports on /v1/traces, appends them to an NDJSON file
+and prints per-stage latency percentiles on exit. It can also summarize a file
+written by the app's file exporter (TRACE_EXPORT=path).
+
+    python benchmarks/trace_collector.py --port 4318 --output traces.ndjson
+    TRACE_EXPORT=http://127.0.0.1:4318/v1/traces python serve.py
+    python benchmarks/trace_collector.py --summarize traces.ndjson
+"""
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def span_durations(export: dict):
+    """(span name, duration ms) for every span in an OTLP/JSON export."""
+    for resource_spans in export.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                yield span["name"], (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def summarize(exports) -> dict:
+    durations = {}
+    for export in exports:
+        for name, ms in span_durations(export):
+            durations.setdefault(name, []).append(ms)
+    summary = {}
+    for name, values in sorted(durations.items()):
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary[name] = {"count": len(values), "p50_ms": round(float(p50), 3),
+                         "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+    return summary
+
+
+def print_summary(summary: dict):
+    print(f"{'span':<40}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in summary.items():
+        print(f"{name:<40}{s['count']:>8}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}")
+
+
+class Collector(ThreadingHTTPServer):
+    def __init__(self, address, output: str = None):
+        super().__init__(address, CollectorHandler)
+        self.output = output
+        self.exports = []
+        self.lock = threading.Lock()
+
+    def receive(self, export: dict):
+        with self.lock:
+            self.exports.append(export)
+            if self.output:
+                with open(self.output, "a") as f:
+                    f.write(json.dumps(export) + "\n")
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != "/v1/traces":
+            self.send_response(404)
+            self.end_headers()
+            return
+        try:
+            export = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        self.server.receive(export)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minimal OTLP/HTTP JSON trace collector")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", help="append received exports to this NDJSON file")
+    parser.add_argument("--summarize", help="print stage percentiles for an NDJSON export file and exit")
+    args = parser.parse_args(argv)
+
+    if args.summarize:
+        with open(args.summarize, "r") as f:
+            print_summary(summarize(json.loads(line) for line in f if line.strip()))
+        return 0
+
+    collector = Collector((args.host, args.port), args.output)
+    print(f"✓ Collecting OTLP traces on http://{args.host}:{args.port}/v1/traces (Ctrl+C to stop)")
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print_summary(summarize(collector.exports))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
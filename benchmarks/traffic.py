@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic traffic for benchmarks and load tests
+
+Profiles, questionnaire answers and chat questions are drawn from the same
+vocabulary the app uses: lifestyle services from uae_lifestyle_categories.json,
+spend categories from the CLI and frontend, goals from app/profiles.py, question
+IDs and options from app/question_generator.py, and banks/features from the
+card catalog. Events are generated one at a time, so any number of them can be
+streamed as NDJSON without holding them in memory.
+
+    python benchmarks/traffic.py --count 1000000 --seed 7 > traffic.ndjson
+    python benchmarks/traffic.py --count 100 --kind chat
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.profiles import GOAL_MAPPING
+from app.question_generator import generate_questions, _get_priority_options
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# (low, high, weight) monthly salary bands in AED
+SALARY_BANDS = [
+    (3000, 5000, 0.12),
+    (5000, 10000, 0.30),
+    (10000, 20000, 0.30),
+    (20000, 40000, 0.18),
+    (40000, 100000, 0.10)
+]
+# category -> (chance the profile spends on it, median share of salary)
+SPEND_CATEGORIES = {
+    "groceries": (0.9, 0.08),
+    "dining": (0.8, 0.05),
+    "online": (0.7, 0.04),
+    "fuel": (0.6, 0.03),
+    "domestic_transport": (0.6, 0.03),
+    "international_travel": (0.4, 0.06),
+    "utilities": (0.6, 0.03),
+    "entertainment": (0.5, 0.02),
+    "miscellaneous": (0.5, 0.05),
+    "remittances": (0.3, 0.08),
+    "education": (0.2, 0.05),
+    "healthcare": (0.3, 0.01)
+}
+GOALS = sorted(set(GOAL_MAPPING.values()) | {"cashback"})
+CAMEL_GOALS = {snake: camel for camel, snake in GOAL_MAPPING.items()}
+EVENT_MIX = {"recommend": 0.6, "questions": 0.2, "chat": 0.2}
+CHAT_TEMPLATES = [
+    "Which card has {feature}?",
+    "best {goal} card",
+    "What can I get from {bank} with no annual fee?",
+    "I earn {salary_k}k, which {goal} card should I pick?",
+    "Compare {goal} cards from {bank}",
+    "Is there a {feature} card for a {salary_k}k salary?",
+    "Which {bank} card is best for {goal}?"
+]
+
+
+def _zipf_weights(n: int, skew: float) -> list:
+    return [1 / (rank + 1) ** skew for rank in range(n)]
+
+
+def _load_json(filename: str):
+    with open(os.path.join(DATA_DIR, filename), "r") as f:
+        return json.load(f)
+
+
+class TrafficGenerator:
+    """Deterministic stream of API payloads for a given seed and set of distributions.
+
+    salary_bands: [(low, high, weight)] sampled uniformly within the band.
+    spend_skew: lognormal sigma around each category's median share of salary.
+    popularity_skew: Zipf exponent over each lifestyle category's services (list order = rank).
+    """
+
+    def __init__(self, seed: int = 42, salary_bands: list = None, spend_skew: float = 0.6,
+                 popularity_skew: float = 1.2, lifestyle_rate: float = 0.35, answer_rate: float = 0.5,
+                 camel_case_rate: float = 0.3, repeat_chat_rate: float = 0.5, event_mix: dict = None):
+        self.rng = random.Random(seed)
+        self.salary_bands = salary_bands or SALARY_BANDS
+        self.spend_skew = spend_skew
+        self.popularity_skew = popularity_skew
+        self.lifestyle_rate = lifestyle_rate
+        self.answer_rate = answer_rate
+        self.camel_case_rate = camel_case_rate
+        self.repeat_chat_rate = repeat_chat_rate
+        self.event_mix = event_mix or EVENT_MIX
+
+        categories = _load_json("uae_lifestyle_categories.json")["categories"]
+        self.services = {
+            key: [option["value"] if isinstance(option, dict) else option for option in category["options"]]
+            for key, category in categories.items()
+        }
+        self.service_weights = {
+            key: _zipf_weights(len(services), popularity_skew) for key, services in self.services.items()
+        }
+
+        cards = _load_json("uae_cards.json")
+        self.banks = sorted({card["bank"] for card in cards})
+        self.features = sorted({tag.replace("_", " ") for card in cards for tag in card.get("best_for", [])})
+        # Recurring FAQs: a fixed pool sampled by popularity, like real chat traffic
+        self.chat_pool = [self._templated_question() for _ in range(50)]
+        self.chat_weights = _zipf_weights(len(self.chat_pool), 1.0)
+
+    def _pick(self, items: list, weights: list, k: int) -> list:
+        """k distinct items, more popular ones first more often."""
+        chosen = []
+        pool, pool_weights = list(items), list(weights)
+        for _ in range(min(k, len(pool))):
+            i = self.rng.choices(range(len(pool)), weights=pool_weights)[0]
+            chosen.append(pool.pop(i))
+            pool_weights.pop(i)
+        return chosen
+
+    def salary(self) -> int:
+        low, high, _ = self.rng.choices(self.salary_bands, weights=[band[2] for band in self.salary_bands])[0]
+        return int(round(self.rng.uniform(low, high) / 500) * 500)
+
+    def spend(self, salary: int) -> dict:
+        spend = {}
+        for category, (rate, share) in SPEND_CATEGORIES.items():
+            if self.rng.random() < rate:
+                amount = salary * share * math.exp(self.rng.gauss(0, self.spend_skew))
+                spend[category] = max(50, int(round(amount / 50) * 50))
+        return spend
+
+    def goals(self) -> list:
+        goals = self.rng.sample(GOALS, self.rng.randint(0, 3))
+        return [CAMEL_GOALS.get(g, g) if self.rng.random() < self.camel_case_rate else g for g in goals]
+
+    def lifestyle(self) -> dict:
+        lifestyle = {}
+        for key, services in self.services.items():
+            if self.rng.random() >= self.lifestyle_rate:
+                continue
+            picked = self._pick(services, self.service_weights[key], self.rng.randint(1, 3))
+            lifestyle[key] = [
+                svc if self.rng.random() < 0.3 else {"service": svc, "usage_percent": self.rng.choice([25, 50, 75, 100])}
+                for svc in picked
+            ]
+        return lifestyle
+
+    def profile(self) -> dict:
+        """A /api/recommend and /api/generate-questions payload (goals may be camelCase)."""
+        salary = self.salary()
+        return {
+            "salary": salary,
+            "spend": self.spend(salary),
+            "goals": self.goals(),
+            "lifestyle": self.lifestyle()
+        }
+
+    def answers(self, profile: dict) -> dict:
+        """Questionnaire answers for the questions the app would ask this profile."""
+        goals = [GOAL_MAPPING.get(g, g) for g in profile.get("goals", [])]
+        questions = generate_questions(profile["salary"], profile["spend"], profile["lifestyle"], goals)["questions"]
+        answers = {}
+        for question in questions:
+            values = [option["value"] for option in question["options"]]
+            weights = _zipf_weights(len(values), self.popularity_skew)
+            if question["type"] == "single":
+                answers[question["id"]] = self._pick(values, weights, 1)[0]
+            else:
+                answers[question["id"]] = self._pick(values, weights, self.rng.randint(1, 3))
+            if question.get("allow_custom") and "other" in answers[question["id"]]:
+                answers[question["id"] + "_custom"] = self.rng.choice(["gym membership", "school supplies", "pet care"])
+        if goals and self.rng.random() < 0.3:
+            options = [option["value"] for option in _get_priority_options(goals)]
+            self.rng.shuffle(options)
+            answers["priority"] = {value: rank for rank, value in enumerate(options, 1)}
+        return answers
+
+    def _templated_question(self) -> str:
+        return self.rng.choice(CHAT_TEMPLATES).format(
+            feature=self.rng.choice(self.features),
+            goal=self.rng.choice(GOALS).replace("_", " "),
+            bank=self.rng.choice(self.banks),
+            salary_k=self.salary() // 1000
+        )
+
+    def chat_question(self) -> str:
+        if self.rng.random() < self.repeat_chat_rate:
+            return self.rng.choices(self.chat_pool, weights=self.chat_weights)[0]
+        return self._templated_question()
+
+    def event(self, kind: str = None) -> dict:
+        """One request: {"kind": recommend|questions|chat, "payload": request body}."""
+        if kind is None:
+            kind = self.rng.choices(list(self.event_mix), weights=list(self.event_mix.values()))[0]
+        profile = self.profile()
+        if kind == "chat":
+            return {"kind": kind, "payload": {"message": self.chat_question(), "profile": profile}}
+        if kind == "recommend" and self.rng.random() < self.answer_rate:
+            answers = self.answers(profile)
+            if answers:
+                profile["questionnaire_answers"] = answers
+        return {"kind": kind, "payload": profile}
+
+    def events(self, count: int = None, kind: str = None):
+        """Yield `count` events (forever if None)."""
+        n = 0
+        while count is None or n < count:
+            yield self.event(kind)
+            n += 1
+
+    def profiles(self, count: int):
+        for _ in range(count):
+            yield self.profile()
+
+
+def write_ndjson(events, out) -> int:
+    n = 0
+    for event in events:
+        out.write(json.dumps(event) + "\n")
+        n += 1
+    return n
+
+
+def read_ndjson(path: str):
+    """Yield events from an NDJSON file ('-' for stdin) one line at a time."""
+    f = sys.stdin if path == "-" else open(path, "r")
+    try:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def build_generator(args) -> TrafficGenerator:
+    return TrafficGenerator(
+        seed=args.seed,
+        salary_bands=json.loads(args.salary_bands) if args.salary_bands else None,
+        spend_skew=args.spend_skew,
+        popularity_skew=args.popularity_skew,
+        answer_rate=args.answer_rate,
+        event_mix=json.loads(args.mix) if args.mix else None
+    )
+
+
+def add_distribution_args(parser):
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--salary-bands", help='JSON list of [low, high, weight], e.g. "[[3000, 8000, 1]]"')
+    parser.add_argument("--spend-skew", type=float, default=0.6, help="lognormal sigma of spend amounts")
+    parser.add_argument("--popularity-skew", type=float, default=1.2, help="Zipf exponent of service popularity")
+    parser.add_argument("--answer-rate", type=float, default=0.5, help="share of recommend calls with answers")
+    parser.add_argument("--mix", help='JSON event mix, e.g. \'{"recommend": 0.8, "chat": 0.2}\'')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream seeded synthetic traffic as NDJSON")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--kind", choices=sorted(EVENT_MIX), help="only emit this kind (default: mixed)")
+    parser.add_argument("--output", "-o", help="output file (default: stdout)")
+    add_distribution_args(parser)
+    args = parser.parse_args(argv)
+
+    generator = build_generator(args)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        n = write_ndjson(generator.events(args.count, args.kind), out)
+    finally:
+        if args.output:
+            out.close()
+    if args.output:
+        print(f"✓ Wrote {n} events to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
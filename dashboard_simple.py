@@ -1,9 +1,8 @@
-from flask import Flask, jsonify, render_template_string
-from app.analytics import AnalyticsTracker
-import json
+from flask import Flask, jsonify, render_template_string, request
+from app.event_archive import EventArchive
 
 app = Flask(__name__)
-tracker = AnalyticsTracker()
+archive = EventArchive()
 
 HTML = """
 <!DOCTYPE html>
@@ -104,8 +103,28 @@ def dashboard():
 
 @app.route('/api/dashboard/data')
 def get_data():
-    metrics = tracker.get_metrics()
-    return jsonify(metrics)
+    # Archive new log lines (at most every ANALYTICS_ROLLUP_INTERVAL seconds), then read the part summaries
+    archive.roll_up()
+    return jsonify(archive.dashboard_metrics())
+
+@app.route('/api/dashboard/query')
+def query():
+    """e.g. /api/dashboard/query?start=2026-09-01&end=2026-09-30&salary_min=10000&salary_max=15000&goals=travel&top_choice=1&group_by=card"""
+    try:
+        args = request.args
+        salary = None
+        if 'salary_min' in args or 'salary_max' in args:
+            salary = (float(args.get('salary_min', 0)), float(args.get('salary_max', 'inf')))
+        rows = archive.query(
+            start=args.get('start'), end=args.get('end'), salary=salary,
+            goals=args.getlist('goals') or None, any_goals=args.getlist('any_goals') or None,
+            top_spend=args.get('top_spend'), cards=args.getlist('cards') or None,
+            top_choice=args.get('top_choice') in ('1', 'true'),
+            group_by=args.get('group_by', 'card').split(','), limit=args.get('limit', type=int)
+        )
+        return jsonify({'rows': rows})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 if __name__ == '__main__':
     app.run(port=8501, debug=False)
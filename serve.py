@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Production server for UAE Credit Card Recommender API
+
+Runs app.api under gunicorn with the app preloaded: CardAdvisor (catalog,
+scoring arrays and embedding model) is built and warmed once in the master,
+then workers are forked and share that memory copy-on-write. The retriever,
+LLM client and memory hold connections, so each worker loads its own in the
+background after the fork.
+
+Configure with WEB_CONCURRENCY (workers), SERVER_THREADS, SERVER_BIND,
+SERVER_TIMEOUT and SERVER_GRACEFUL_TIMEOUT. Per-worker metric shards go to
+METRICS_DIR (a fresh temp directory by default), and stored recommendation
+results are shared through RESULT_STORE_DB (a temp SQLite file by default).
+"""
+import os
+import sys
+import tempfile
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    print("❌ gunicorn is not installed: pip install -r requirements.txt")
+    sys.exit(1)
+
+from app.config import SERVER_BIND, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT, SERVER_GRACEFUL_TIMEOUT
+
+
+def post_fork(server, worker):
+    """Give each worker its own SQLite connections, thread pool and metrics shard."""
+    from app.api import advisor
+    from app.metrics import registry
+    advisor.reopen_after_fork()
+    registry.reset_after_fork()
+    advisor.warm_up_in_background()
+
+
+def worker_exit(server, worker):
+    """Persist the worker's final counters so /metrics keeps them."""
+    from app.metrics import registry
+    registry.flush()
+
+
+class RecommenderServer(BaseApplication):
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.api import app, advisor
+        if not advisor.result_store.db_path:
+            # /api/recommend and /api/filter may land on different workers
+            advisor.result_store.db_path = os.path.join(tempfile.mkdtemp(prefix="card-results-"), "results.sqlite")
+        # Only the embedding model is warmed in the master: it is plain memory the workers
+        # share. The Chroma client's SQLite connection must not cross the fork.
+        advisor.warm_up(["embeddings"])
+        return app
+
+
+def main():
+    from app.metrics import registry
+    if registry.directory is None:
+        # Workers publish their metric shards here so a scrape of any worker sees them all
+        registry.directory = tempfile.mkdtemp(prefix="card-metrics-")
+
+    options = {
+        "bind": SERVER_BIND,
+        "workers": SERVER_WORKERS,
+        "threads": SERVER_THREADS,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": SERVER_TIMEOUT,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }
+    print(f"🏦 Starting UAE Credit Card Recommender API on {SERVER_BIND} "
+          f"({SERVER_WORKERS} workers x {SERVER_THREADS} threads)")
+    RecommenderServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
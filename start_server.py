@@ -41,7 +41,9 @@ def main():
     
     # Import and run the Flask app
     try:
-        from app.api import app
+        from app.api import app, advisor
+        advisor.warm_up_in_background()
+        advisor.watch_catalog()
         app.run(debug=True, port=5001, host='0.0.0.0')
     except ImportError as e:
         print(f"❌ Import error: {e}")
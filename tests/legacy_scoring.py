@@ -0,0 +1,385 @@
+"""
+Pre-vectorization scoring code kept verbatim as the reference for differential tests
+"""
+
+
+class LegacyScorer:
+    """Per-card Python scoring from before ScoringEngine, bound to an advisor's catalog."""
+
+    def __init__(self, advisor):
+        self.cards_data = advisor.cards_data
+        self.service_mapping = advisor.service_mapping
+        self.apply_urls = advisor.apply_urls
+        self._generate_goal_reasons = advisor._generate_goal_reasons
+        self._generate_reasons_with_lifestyle = advisor._generate_reasons_with_lifestyle
+
+    def _get_goal_based_cards(self, user_profile: dict) -> list:
+        salary = user_profile.get("salary", 0)
+        goals = user_profile.get("goals", [])
+        lifestyle = user_profile.get("lifestyle", {})
+        spend = user_profile.get("spend", {})
+        
+        # Deduplicate goals
+        goals = list(set(goals))
+        
+        scored_cards = []
+        co_branded = self.service_mapping.get("co_branded_cards", {})
+        
+        for card in self.cards_data:
+            if card["min_salary"] > salary:
+                continue
+            
+            best_for = card.get("best_for", [])
+            matched_goals = []
+            
+            for goal in goals:
+                if any(goal.lower() in bf.lower() for bf in best_for):
+                    if goal not in matched_goals:  # Prevent duplicates
+                        matched_goals.append(goal)
+            
+            if len(matched_goals) == 0:
+                continue
+            
+            score = 0.5 + (len(matched_goals) * 0.15)
+            
+            # Enhanced scoring adjustments
+            if card["annual_fee"] == 0:
+                score += 0.05
+            
+            # Boost for international spenders
+            international_travel = spend.get("international_travel", 0)
+            if international_travel > 2000 and "international" in goals:
+                if "Amazon" in card["name"] or card["rewards"].get("international", 0) > 2:
+                    score += 0.2
+            
+            # Boost for domestic transport users
+            domestic_transport = spend.get("domestic_transport", 0)
+            if domestic_transport > 800 and any(g in goals for g in ["transport", "careem", "nol"]):
+                transport_benefits = any(tag in best_for for tag in ["careem", "transport", "nol", "salik"])
+                if transport_benefits:
+                    score += 0.15
+            
+            # Boost for online shoppers
+            online_spend = spend.get("online", 0)
+            if online_spend > 1500 and "online" in goals:
+                online_rate = card["rewards"].get("online", 0)
+                if online_rate >= 5:
+                    score += 0.25
+                elif online_rate >= 3:
+                    score += 0.15
+            
+            # Boost for entertainment seekers
+            if "entertainment" in goals:
+                if any(tag in best_for for tag in ["entertainment", "cinema", "vox", "dubai_mall"]):
+                    score += 0.2
+            
+            # Premium card boost for high earners
+            if salary >= 50000 and any(g in goals for g in ["premium", "luxury"]):
+                if card["annual_fee"] > 1000 or any(tag in best_for for tag in ["premium", "elite", "signature"]):
+                    score += 0.25
+            
+            # Strong boost for goal+spending alignment
+            if "online" in goals:
+                online_spend = spend.get("online", 0)
+                online_rate = card["rewards"].get("online", 0)
+                if online_spend > 2000 and online_rate >= 5:
+                    score += 0.3
+            
+            if "dining" in goals:
+                dining_spend = spend.get("dining", 0)
+                dining_rate = card["rewards"].get("dining", 0)
+                if dining_spend > 3000 and dining_rate >= 3:
+                    score += 0.3
+            
+            # Boost for high travel reward rates
+            if "travel" in goals or "miles" in goals:
+                travel_rate = card["rewards"].get("travel", 0)
+                international_rate = card["rewards"].get("international", 0)
+                best_rate = max(travel_rate, international_rate)
+                if best_rate >= 5:
+                    score += 0.2
+                elif best_rate >= 3:
+                    score += 0.1
+            
+            # Entry-level card boost for low salary
+            if salary <= 6000 and "no_fee" in goals:
+                if "Liv" in card["name"] or card["min_salary"] <= 5000:
+                    score += 0.15
+            lifestyle_match_name = None
+            for category, services in lifestyle.items():
+                for service_data in services:
+                    if isinstance(service_data, dict):
+                        service = service_data.get("service")
+                        usage_percent = service_data.get("usage_percent", 50)
+                    else:
+                        service = service_data
+                        usage_percent = 50
+                    
+                    if service in co_branded and co_branded[service]["card_name"] == card["name"]:
+                        score += 0.3 * (usage_percent / 100)  # Boost for lifestyle match
+                        lifestyle_match_name = service.replace("_", " ").title()
+            
+            reasons = self._generate_goal_reasons(card, matched_goals, card["annual_fee"], lifestyle_match_name)
+            value = self._estimate_value(card, user_profile)
+            
+            scored_cards.append({
+                "card_name": card["name"],
+                "bank": card["bank"],
+                "annual_fee": card["annual_fee"],
+                "min_salary": card["min_salary"],
+                "rewards": card.get("rewards", {}),
+                "best_for": card.get("best_for", []),
+                "fit_score": round(min(score, 1.0), 2),
+                "reasons": reasons,
+                "estimated_annual_value": value,
+                "recommendation_type": "goal",
+                "matched_goals": matched_goals,
+                "total_goals": len(goals),
+                "apply_url": self.apply_urls.get(card["name"], {}).get("apply_url", "")
+            })
+        
+        scored_cards.sort(key=lambda x: (len(x["matched_goals"]), x["fit_score"]), reverse=True)
+        return scored_cards[:5]  # Return top 5 instead of 3 to show more goal matches
+    
+    def _get_spending_based_cards(self, user_profile: dict) -> list:
+        salary = user_profile.get("salary", 0)
+        
+        scored_cards = []
+        
+        for card in self.cards_data:
+            if card["min_salary"] > salary:
+                continue
+            
+            score, matches = self._calculate_score_with_lifestyle(card, user_profile)
+            reasons = self._generate_reasons_with_lifestyle(card, user_profile, matches)
+            value = self._estimate_value(card, user_profile)
+            
+            scored_cards.append({
+                "card_name": card["name"],
+                "bank": card["bank"],
+                "annual_fee": card["annual_fee"],
+                "min_salary": card["min_salary"],
+                "rewards": card.get("rewards", {}),
+                "best_for": card.get("best_for", []),
+                "fit_score": round(score, 2),
+                "reasons": reasons,
+                "estimated_annual_value": value,
+                "lifestyle_matches": matches,
+                "recommendation_type": "spending",
+                "apply_url": self.apply_urls.get(card["name"], {}).get("apply_url", "")
+            })
+        
+        scored_cards.sort(key=lambda x: x["fit_score"], reverse=True)
+        return scored_cards[:3]
+    
+    def _calculate_score_with_lifestyle(self, card: dict, profile: dict) -> tuple:
+        score = 0.5
+        matches = []
+        
+        lifestyle = profile.get("lifestyle", {})
+        co_branded = self.service_mapping.get("co_branded_cards", {})
+        partner_benefits = self.service_mapping.get("partner_benefits", {})
+        spend = profile.get("spend", {})
+        goals = profile.get("goals", [])
+        salary = profile.get("salary", 0)
+        
+        for category, services in lifestyle.items():
+            for service_data in services:
+                if isinstance(service_data, dict):
+                    service = service_data.get("service")
+                    usage_percent = service_data.get("usage_percent", 50)
+                else:
+                    service = service_data
+                    usage_percent = 50
+                
+                if service in co_branded:
+                    if co_branded[service]["card_name"] == card["name"]:
+                        boost = 0.3 * (usage_percent / 100)
+                        score += boost
+                        matches.append({
+                            "type": "co_branded",
+                            "service": service,
+                            "usage": usage_percent,
+                            "benefit": co_branded[service]["benefit"]
+                        })
+                
+                if service in partner_benefits:
+                    if card["name"] in partner_benefits[service]:
+                        boost = 0.15 * (usage_percent / 100)
+                        score += boost
+                        matches.append({
+                            "type": "partner",
+                            "service": service,
+                            "usage": usage_percent,
+                            "benefit": f"Special benefits at {service}"
+                        })
+        
+        # Enhanced scoring adjustments
+        online_spend = spend.get("online", 0)
+        international_travel = spend.get("international_travel", 0)
+        domestic_transport = spend.get("domestic_transport", 0)  # ride-hailing, metro, etc
+        total_spend = sum(spend.values()) or 1
+        
+        # Boost for high online spenders
+        if online_spend > 1500:
+            online_rate = card["rewards"].get("online", 0)
+            if online_rate >= 5:
+                score += 0.2
+                matches.append({
+                    "type": "high_online",
+                    "service": "online_shopping",
+                    "usage": int((online_spend / total_spend) * 100),
+                    "benefit": f"{online_rate}% on online spending ({online_spend} AED/month)"
+                })
+        
+        # Boost for international travelers (flights, hotels, foreign spending)
+        if international_travel > 2000:
+            intl_rate = card["rewards"].get("international", card["rewards"].get("travel", 0))
+            if intl_rate >= 2.5 or "Amazon" in card["name"]:
+                score += 0.15
+                matches.append({
+                    "type": "international_travel",
+                    "service": "international_travel",
+                    "usage": int((international_travel / total_spend) * 100),
+                    "benefit": f"Enhanced rewards on international travel & foreign spending"
+                })
+        
+        # Boost for domestic transport users (Careem, RTA, etc)
+        if domestic_transport > 800:
+            transport_benefits = any(tag in card.get("best_for", []) for tag in ["careem", "transport", "nol", "salik"])
+            if transport_benefits:
+                score += 0.1
+                matches.append({
+                    "type": "domestic_transport",
+                    "service": "ride_hailing_transport",
+                    "usage": int((domestic_transport / total_spend) * 100),
+                    "benefit": f"Benefits for ride-hailing and local transport"
+                })
+        
+        # Entry-level card boost
+        if salary <= 6000 and card["annual_fee"] == 0 and card["min_salary"] <= 5000:
+            if "Liv" in card["name"] or "WIO" in card["name"]:
+                score += 0.1
+        
+        # Entertainment boost
+        entertainment_spend = spend.get("dining", 0) + spend.get("online", 0)
+        if entertainment_spend > 2000:
+            best_for = card.get("best_for", [])
+            if any(tag in best_for for tag in ["entertainment", "cinema", "vox", "dubai_mall", "namshi"]):
+                score += 0.1
+        
+        groceries = lifestyle.get("groceries", [])
+        for service_data in groceries:
+            if isinstance(service_data, dict):
+                service = service_data.get("service")
+                usage = service_data.get("usage_percent", 0)
+                if service == "amazon_fresh" and usage >= 50:
+                    if card["name"] == "Amazon.ae Credit Card":
+                        score += 0.2
+                        matches.append({
+                            "type": "high_usage",
+                            "service": "amazon_fresh",
+                            "usage": usage,
+                            "benefit": f"You use Amazon Fresh {usage}% for groceries - 6% cashback applies!"
+                        })
+        
+        rewards = card.get("rewards", {})
+        misc_spend = spend.get("miscellaneous", 0)
+        
+        reward_values = list(rewards.values())
+        is_general_rewards = len(set(reward_values)) == 1 and len(reward_values) >= 5
+        
+        if misc_spend > 0 and misc_spend / total_spend > 0.3 and is_general_rewards:
+            general_rate = reward_values[0] if reward_values else 0
+            if general_rate >= 2.0:
+                score += 0.25
+                matches.append({
+                    "type": "general_rewards",
+                    "service": "miscellaneous",
+                    "usage": int((misc_spend / total_spend) * 100),
+                    "benefit": f"Flat {general_rate}% on all spending including miscellaneous ({int(misc_spend)} AED/month)"
+                })
+        
+        for category, amount in spend.items():
+            if amount > 0 and category not in ["miscellaneous", "utilities", "remittances"]:
+                reward_rate = rewards.get(category, 0)
+                if reward_rate > 0:
+                    weight = amount / total_spend
+                    score += weight * (reward_rate / 5) * 0.2
+        
+        if misc_spend > 0:
+            misc_reward = rewards.get("miscellaneous", 0)
+            if misc_reward == 0 and is_general_rewards:
+                misc_reward = reward_values[0]
+            if misc_reward > 0:
+                weight = misc_spend / total_spend
+                score += weight * (misc_reward / 5) * 0.2
+        
+        best_for = card.get("best_for", [])
+        goal_matches = sum(1 for g in goals if any(g.lower() in bf.lower() for bf in best_for))
+        score += min(goal_matches * 0.1, 0.15)
+        
+        if card["annual_fee"] == 0:
+            score += 0.05
+        
+        return min(score, 1.0), matches
+        
+    def _estimate_value(self, card: dict, profile: dict) -> str:
+        spend = profile.get("spend", {})
+        lifestyle = profile.get("lifestyle", {})
+        rewards = card.get("rewards", {})
+        
+        reward_values = list(rewards.values())
+        is_general_rewards = len(set(reward_values)) == 1 and len(reward_values) >= 5
+        general_rate = reward_values[0] if is_general_rewards and reward_values else 0
+        
+        co_branded = self.service_mapping.get("co_branded_cards", {})
+        card_co_brand_service = None
+        for service, info in co_branded.items():
+            if info["card_name"] == card["name"]:
+                card_co_brand_service = service
+                break
+        
+        total_rewards = 0
+        excluded_spend = 0
+        has_lifestyle_data = len(lifestyle) > 0
+        
+        for category, amount in spend.items():
+            category_lifestyle = lifestyle.get(self._get_lifestyle_category_key(category), [])
+            
+            # Only apply exclusion logic if user provided lifestyle data for this category
+            if category_lifestyle and card_co_brand_service:
+                user_services = [s.get("service") if isinstance(s, dict) else s for s in category_lifestyle]
+                
+                # Exclude spend if card is co-branded but user doesn't use that service
+                if card_co_brand_service not in user_services:
+                    excluded_spend += amount
+                    continue
+            
+            if category in rewards:
+                total_rewards += amount * 12 * rewards[category] / 100
+            elif is_general_rewards and category in ["miscellaneous", "utilities", "remittances"]:
+                total_rewards += amount * 12 * general_rate / 100
+        
+        net_value = total_rewards - card["annual_fee"]
+        
+        exclusion_note = ""
+        if excluded_spend > 0 and has_lifestyle_data:
+            exclusion_note = f" (excludes {int(excluded_spend)} AED/month at non-partner merchants)"
+        elif not has_lifestyle_data and card_co_brand_service:
+            exclusion_note = " (assumes all spending at partner merchants)"
+        
+        if net_value > 0:
+            return f"approx. {int(net_value)} AED net benefit annually{exclusion_note}"
+        else:
+            return f"approx. {int(total_rewards)} AED rewards (minus {card['annual_fee']} AED fee){exclusion_note}"
+    
+    def _get_lifestyle_category_key(self, spend_category: str) -> str:
+        mapping = {
+            "groceries": "groceries",
+            "online": "online_shopping",
+            "fuel": "fuel_stations",
+            "entertainment": "entertainment",
+            "international_travel": "airlines"
+        }
+        return mapping.get(spend_category, "")
@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.analytics import AnalyticsTracker
+
+
+def _session(tracker, session_id, cards, goals=("travel",), salary=15000):
+    tracker.track("recommend", session_id, 12.5, salary=salary, goals=list(goals), cards=cards)
+
+
+def test_metrics_match_the_dashboard_contract():
+    """Test the keys and values dashboard_simple.py renders."""
+    tracker = AnalyticsTracker(path="")
+    _session(tracker, "s1", ["Card A", "Card B"])
+    _session(tracker, "s2", ["Card A"], goals=("no_fee", "travel"))
+    tracker.track("apply_click", "s1", card_name="Card A")
+    tracker.track("chat", "s1", 3.0, message_length=20)
+
+    metrics = tracker.get_metrics()
+
+    assert metrics["total_sessions"] == 2
+    assert metrics["conversion_rate"] == 50.0
+    assert metrics["avg_recommendations"] == 1.5
+    assert metrics["total_apply_clicks"] == 1
+    assert metrics["top_cards"][0] == {"card_name": "Card A", "count": 2, "click_rate": 50.0}
+    assert [s["session_id"] for s in metrics["recent_sessions"]] == ["s2", "s1"]
+    assert metrics["recent_sessions"][1] == {"session_id": "s1", "salary": 15000, "goals": ["travel"],
+                                             "cards_recommended": 2, "applied": True}
+    assert metrics["goal_frequencies"] == {"travel": 2, "no_fee": 1}
+    assert metrics["latency_ms"]["recommend"]["p50"] == 12.5
+
+
+def test_track_only_buffers_and_readers_tail_the_log_incrementally(tmp_path):
+    """Test that track() does no I/O and a separate reader folds in only new lines."""
+    path = str(tmp_path / "events.ndjson")
+    writer = AnalyticsTracker(path=path, flush_interval=60)
+    reader = AnalyticsTracker(path=path)
+
+    _session(writer, "s1", ["Card A"])
+    assert not os.path.exists(path)
+
+    writer.flush()
+    assert reader.get_metrics()["total_sessions"] == 1
+    offset = reader.offset
+
+    # A half-written line is left for the next refresh
+    _session(writer, "s2", ["Card B"])
+    writer.flush()
+    with open(path, "a") as f:
+        f.write(json.dumps({"type": "apply_click", "session_id": "s1", "card_name": "Card A"})[:20])
+
+    metrics = reader.get_metrics()
+    assert metrics["total_sessions"] == 2 and metrics["total_apply_clicks"] == 0
+    assert reader.offset > offset and reader.offset < os.path.getsize(path)
+    writer.stop()
+
+
+def test_full_ring_buffer_drops_oldest_events():
+    """Test that a burst beyond the buffer drops the oldest events instead of blocking."""
+    tracker = AnalyticsTracker(path="", buffer_size=3, flush_interval=60)
+    for i in range(5):
+        _session(tracker, f"s{i}", ["Card A"])
+
+    metrics = tracker.get_metrics()
+
+    assert metrics["dropped_events"] == 2
+    assert [s["session_id"] for s in metrics["recent_sessions"]] == ["s4", "s3", "s2"]
+    tracker.stop()
+
+
+def test_sessions_are_counted_from_recommendations_only():
+    """Test that filter and chat calls, with or without a session id, don't add sessions or lower conversion."""
+    tracker = AnalyticsTracker(path="")
+    _session(tracker, "s1", ["Card A"])
+    tracker.track("apply_click", "s1", card_name="Card A")
+    tracker.track("filter", None, 2.0, filter_type="annual_fee", choice="No annual fee preferred", results=1)
+    tracker.track("chat", None, 3.0, message_length=20)
+    tracker.track("chat", "s2", 3.0, message_length=20)
+
+    metrics = tracker.get_metrics()
+
+    assert metrics["total_sessions"] == 1
+    assert metrics["conversion_rate"] == 100.0
+    assert metrics["events"] == {"recommend": 1, "apply_click": 1, "filter": 1, "chat": 2}
+    assert [s["session_id"] for s in metrics["recent_sessions"]] == ["s1"]
@@ -0,0 +1,24 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.run_benchmarks import compare, main
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    """Test that only metrics worse than the baseline by more than the threshold are flagged."""
+    baseline = {"results": {"recommend": {"p50_ms": 1.0, "p95_ms": 2.0, "alloc_peak_kb": 10.0, "throughput_per_s": 1000}}}
+    current = {"recommend": {"p50_ms": 1.1, "p95_ms": 3.0, "alloc_peak_kb": 10.0, "throughput_per_s": 700}}
+
+    regressions = compare(current, baseline, threshold=0.15)
+
+    assert regressions == ["recommend: p95_ms 2.0 -> 3.0", "recommend: throughput_per_s 1000 -> 700"]
+
+
+def test_benchmark_runs_offline_and_saves_baseline(tmp_path):
+    """Test a tiny end-to-end run with the stub LLM and retriever."""
+    path = str(tmp_path / "baseline.json")
+
+    assert main(["--iterations", "5", "--warmup", "1", "--alloc-samples", "2", "--profiles", "20", "--save", path]) == 0
+    assert main(["--iterations", "5", "--warmup", "1", "--alloc-samples", "2", "--profiles", "20",
+                 "--ops", "generate_questions", "--compare", path, "--threshold", "100"]) == 0
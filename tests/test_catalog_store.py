@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app.catalog_store import CATALOG_FILES, DATA_DIR, CatalogStore
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for filename in CATALOG_FILES:
+        shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / filename)
+    return tmp_path
+
+
+def _edit_cards(data_dir, edit):
+    path = data_dir / "uae_cards.json"
+    cards = json.loads(path.read_text())
+    edit(cards)
+    path.write_text(json.dumps(cards))
+
+
+def test_reload_swaps_in_new_version_and_keeps_old_snapshot_intact(data_dir):
+    """Test that an edit activates a new version while a held snapshot stays consistent."""
+    store = CatalogStore(str(data_dir), interval=0)
+    in_flight = store.snapshot
+    old_fee = in_flight.cards_data[0]["annual_fee"]
+
+    def raise_fee(cards):
+        cards[0]["annual_fee"] = old_fee + 100
+    _edit_cards(data_dir, raise_fee)
+
+    assert store.reload()
+    assert store.snapshot.version != in_flight.version
+    assert store.snapshot.engine.annual_fee[0] == old_fee + 100
+    assert in_flight.engine.annual_fee[0] == old_fee
+    assert in_flight.cards_data[0]["annual_fee"] == old_fee
+    assert not store.reload()
+
+
+def test_invalid_catalog_is_rejected(data_dir):
+    """Test that a broken file is logged and the previous snapshot stays active."""
+    store = CatalogStore(str(data_dir), interval=0)
+    version = store.snapshot.version
+
+    _edit_cards(data_dir, lambda cards: cards[0].pop("min_salary"))
+    assert not store.reload()
+    (data_dir / "card_service_mapping.json").write_text("{not json")
+    assert not store.reload()
+
+    assert store.snapshot.version == version
+
+
+def test_recommendations_report_catalog_version():
+    """Test that every recommendation result carries the version it was scored against."""
+    from app.agent import CardAdvisor
+
+    advisor = CardAdvisor()
+    result = next(advisor.recommend_batch([{"salary": 15000, "spend": {"online": 2000}}], explain=False))
+
+    assert result["catalog_version"] == advisor.catalog_version
@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.catalog_store import CatalogSnapshot
+from benchmarks.catalog_synth import DETAILED_CARDS_FILE, CatalogSynthesizer, main, measure_scale, write_catalog
+from benchmarks.run_benchmarks import synthetic_profiles
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def test_synthetic_catalog_loads_like_the_real_one(tmp_path):
+    """Test that a synthetic catalog validates, compiles and links co-brands and apply URLs."""
+    files = CatalogSynthesizer(seed=1).generate(500)
+    write_catalog(files, str(tmp_path))
+
+    snapshot = CatalogSnapshot.load(str(tmp_path))
+    names = [card["name"] for card in snapshot.cards_data]
+
+    assert len(set(names)) == 500
+    assert all(snapshot.apply_urls[name]["apply_url"].startswith("https://") for name in names)
+    assert len(snapshot.service_mapping["co_branded_cards"]) == 25
+    assert all(entry["card_name"] in names for entry in snapshot.service_mapping["co_branded_cards"].values())
+
+
+def test_detailed_records_match_the_real_schema():
+    """Test that detailed records carry every top-level field of uae_cards_detailed.json."""
+    with open(os.path.join(DATA_DIR, DETAILED_CARDS_FILE)) as f:
+        real = json.load(f)
+    required = set.intersection(*(set(card) for card in real))
+
+    detailed = CatalogSynthesizer(seed=2).generate(50)[DETAILED_CARDS_FILE]
+
+    for card in detailed:
+        assert required <= set(card)
+        assert set(card["eligibility"]) == set(real[0]["eligibility"])
+        assert set(card["rewards_conditions"]["bonus_categories"]) <= set(card["rewards"])
+
+
+def test_same_seed_same_catalog():
+    """Test that a seed fully determines the catalog."""
+    assert CatalogSynthesizer(seed=3).generate(100) == CatalogSynthesizer(seed=3).generate(100)
+    assert CatalogSynthesizer(seed=3).generate(100) != CatalogSynthesizer(seed=4).generate(100)
+
+
+def test_scale_mode_reports_build_memory_and_latency(tmp_path):
+    """Test a tiny scaling run end to end with the stub LLM and retriever."""
+    result = measure_scale(200, synthetic_profiles(5, 1), seed=1, iterations=3)
+
+    assert result["cards"] == 200
+    assert result["build_ms"] > 0 and result["snapshot_peak_mb"] > 0 and result["recommend_p50_ms"] > 0
+
+    path = str(tmp_path / "scaling.json")
+    assert main(["--scale", "100", "--iterations", "2", "--profiles", "5", "--save", path]) == 0
+    with open(path) as f:
+        assert json.load(f)["results"][0]["cards"] == 100
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.components import ComponentRegistry
+
+
+def test_component_is_built_once_on_first_use():
+    """Test that concurrent first calls share a single factory call."""
+    calls = []
+    registry = ComponentRegistry()
+    registry.register("model", lambda: calls.append(1) or object())
+
+    assert not registry.is_ready("model")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert registry.status()["model"]["ready"]
+
+
+def test_failed_component_reports_error_and_retries():
+    """Test that a failing factory is reported by status() and retried on the next use."""
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ImportError("No module named 'langchain_groq'")
+        return "client"
+
+    registry = ComponentRegistry()
+    registry.register("llm", factory)
+
+    registry.warm_up()
+    assert registry.status()["llm"] == {"ready": False, "error": "No module named 'langchain_groq'"}
+    assert registry.get("llm") == "client"
+    assert registry.is_ready()
+
+
+def test_scoring_tier_does_not_import_langchain():
+    """Test that building CardAdvisor leaves the retriever and LLM tiers unloaded."""
+    from app.agent import CardAdvisor
+
+    advisor = CardAdvisor()
+    health = advisor.health()
+
+    assert health["scoring"] == {"ready": True}
+    assert not any(tier["ready"] for name, tier in health.items() if name != "scoring")
+    assert list(advisor.recommend_batch([{"salary": 15000, "spend": {"online": 2000}}], explain=False))[0]["recommendations"]
+
+
+def test_forked_worker_rebuilds_the_retriever_only():
+    """Test a master warm-up of just the embeddings, then a reset retriever rebuilt by the worker."""
+    builds = []
+    registry = ComponentRegistry()
+    registry.register("retriever", lambda: builds.append("retriever") or object())
+    registry.register("embeddings", lambda: builds.append("embeddings") or object())
+
+    registry.warm_up(["embeddings"])
+    assert builds == ["embeddings"] and not registry.is_ready("retriever")
+
+    inherited = registry.get("retriever")
+    registry.reset("retriever")
+    assert not registry.is_ready("retriever") and registry.is_ready("embeddings")
+    assert registry.get("retriever") is not inherited
+    assert builds == ["embeddings", "retriever", "retriever"]
@@ -0,0 +1,112 @@
+import copy
+import json
+import os
+import random
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from app.agent import CardAdvisor
+from app.catalog_store import DATA_DIR, DETAILED_CARDS_FILE, CatalogSnapshot
+from benchmarks.catalog_synth import CatalogSynthesizer, write_catalog
+from test_scoring import random_profile
+
+EMPLOYMENT_TYPES = [None, "salaried", "self_employed", "student"]
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("catalog")
+    files = CatalogSynthesizer(seed=5).generate(600)
+    write_catalog(files, str(data_dir))
+    rules = {record["name"]: record["eligibility"] for record in files[DETAILED_CARDS_FILE]}
+    return CatalogSnapshot.load(str(data_dir)), rules
+
+
+def _applicant(seed: int) -> dict:
+    rng = random.Random(seed)
+    profile = random_profile(seed)
+    profile["salary"] = rng.choice([0, 4999, 5000, 8000, 12500, 20000, 60000])
+    if rng.random() < 0.7:
+        profile["age"] = rng.choice([18, 20, 21, 40, 60, 66, 70])
+    employment_type = rng.choice(EMPLOYMENT_TYPES)
+    if employment_type:
+        profile["employment_type"] = employment_type
+    return profile
+
+
+def test_salary_prefix_and_bitsets_match_a_full_scan(synthetic):
+    """Test the binary-searched salary prefix and the age / employment bitsets against a per-card check."""
+    snapshot, rules = synthetic
+    catalog = snapshot.catalog
+    with open(os.path.join(DATA_DIR, DETAILED_CARDS_FILE)) as f:
+        assert set(json.load(f)[0]["eligibility"]) >= {"age_min", "age_max", "employment_type"}
+
+    for seed in range(80):
+        profile = _applicant(seed)
+        age, employment_type = profile.get("age"), profile.get("employment_type")
+        expected = []
+        for card in snapshot.cards_data:
+            rule = rules[card["name"]]
+            expected.append(card["min_salary"] <= profile["salary"]
+                            and (age is None or rule["age_min"] <= age <= rule["age_max"])
+                            and (employment_type is None or employment_type in rule["employment_type"]))
+        assert catalog.eligible(profile["salary"], age, employment_type).tolist() == expected
+        assert catalog.salary_prefix(profile["salary"]) == sum(c["min_salary"] <= profile["salary"] for c in snapshot.cards_data)
+
+
+def test_prefix_scoring_matches_full_scoring_on_eligible_cards(synthetic):
+    """Test that scoring only the salary prefix gives the full-width scores for every candidate."""
+    engine = synthetic[0].engine
+    profiles = [_applicant(seed) for seed in range(120)]
+    for start in range(0, len(profiles), 23):
+        batch = profiles[start:start + 23]
+        full = engine.score_batch(copy.deepcopy(batch), all_cards=True)
+        for (goal, spending, values), (full_goal, full_spending, full_values) in zip(engine.score_batch(batch), full):
+            assert np.array_equal(goal["candidates"], full_goal["candidates"])
+            assert np.array_equal(spending["candidates"], full_spending["candidates"])
+            assert goal["lifestyle_match"] == full_goal["lifestyle_match"]
+            eligible = spending["candidates"]
+            assert np.array_equal(goal["score"][eligible], full_goal["score"][eligible])
+            assert np.array_equal(spending["score"][eligible], full_spending["score"][eligible])
+            for key in ("total_rewards", "excluded_spend"):
+                assert np.array_equal(values[key][eligible], full_values[key][eligible])
+
+
+def test_recommend_respects_age_and_employment_rules():
+    """Test that cards with detailed eligibility rules drop out for applicants outside them."""
+    advisor = CardAdvisor()
+    restricted = {i for i, card in enumerate(advisor.cards_data) if advisor.catalog.age_max[i] < np.inf}
+    assert restricted
+
+    base = {"salary": 30000, "spend": {"dining": 2000, "online": 1500}, "goals": ["cashback"], "lifestyle": {}}
+    _, spending, _ = advisor.engine.score_batch([base])[0]
+    assert all(spending["candidates"][i] for i in restricted)
+
+    for applicant in (dict(base, age=70), dict(base, age=19), dict(base, employment_type="student")):
+        goal, spending, _ = advisor.engine.score_batch([applicant])[0]
+        assert not any(spending["candidates"][i] or goal["candidates"][i] for i in restricted)
+        names = {card["card_name"] for card in advisor.recommend(applicant, defer_explanations=True)["recommendations"]}
+        assert not names & {advisor.cards_data[i]["name"] for i in restricted}
+
+
+def test_api_normalizes_and_validates_eligibility_fields(monkeypatch):
+    """Test that numeric-string ages and capitalized employment types are accepted, and bad values get a 400."""
+    from app import api
+    monkeypatch.setattr(api.advisor.explainer, "start", lambda cards, profile: "job")
+    client = api.app.test_client()
+    base = {"salary": 30000, "spend": {"dining": 2000, "online": 1500}, "goals": ["cashback"]}
+
+    assert api.build_profile(dict(base, age="30", employment_type="Self-Employed"))["age"] == 30
+    assert api.build_profile(dict(base, employment_type=" Salaried "))["employment_type"] == "salaried"
+    response = client.post("/api/recommend?explanations=deferred", json=dict(base, age="30", employment_type="Salaried"))
+    assert response.status_code == 200
+
+    for invalid in ({"age": "thirty"}, {"age": 30.5}, {"age": True}, {"age": -1}, {"employment_type": "astronaut"}):
+        assert client.post("/api/recommend", json=dict(base, **invalid)).status_code == 400, invalid
+        assert client.post("/api/generate-questions", json=dict(base, **invalid)).status_code == 400, invalid
+
+    lines = client.post("/api/recommend/batch?explain=false", json=[dict(base, age="abc"), dict(base, age="41")]).data
+    results = [json.loads(line) for line in lines.decode().splitlines()]
+    assert results[0] == {"index": 0, "error": "Invalid input"} and "recommendations" in results[1]
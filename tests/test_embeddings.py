@@ -0,0 +1,37 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.embeddings import CachedEmbeddings, get_shared_embeddings
+
+
+class CountingModel:
+    """Stands in for the HuggingFace model and counts the texts it embeds."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 0.5, 0.25] for text in texts]
+
+
+def test_shared_embeddings_is_a_singleton():
+    """Test that every caller gets the same provider."""
+    assert get_shared_embeddings() is get_shared_embeddings()
+
+
+def test_cached_vectors_skip_the_model_across_restarts(tmp_path):
+    """Test that repeated texts are served from the on-disk cache without loading the model."""
+    cache_path = str(tmp_path / "embeddings.sqlite")
+    embeddings = CachedEmbeddings(cache_path=cache_path)
+    embeddings._model = CountingModel()
+
+    first = embeddings.embed_documents(["card a", "card b", "card a"])
+    assert embeddings._model.embedded == ["card a", "card b"]
+    assert embeddings.embed_query("card b") == first[1]
+    assert embeddings.stats()["hits"] == 1
+
+    restarted = CachedEmbeddings(cache_path=cache_path)
+    assert restarted.embed_documents(["card a", "card b"]) == first[:2]
+    assert restarted.stats() == {"model_loaded": False, "hits": 2, "misses": 0}
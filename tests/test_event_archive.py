@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.analytics import RollingAggregates
+from app.event_archive import EventArchive
+
+DAY = 86400
+SEPT_1 = 1788220800  # 2026-09-01 00:00 UTC
+
+
+def _recommend(ts, session_id, salary, goals, cards, top_choices, latency_ms=10.0):
+    return {"ts": ts, "type": "recommend", "session_id": session_id, "latency_ms": latency_ms,
+            "salary": salary, "goals": goals, "spend": {"travel": 3000, "dining": 1000},
+            "cards": cards, "top_choices": top_choices}
+
+
+EVENTS = [
+    _recommend(SEPT_1 + 100, "s1", 12000, ["travel"], ["Sky", "Miles", "Cash"], ["Sky"]),
+    _recommend(SEPT_1 + 200, "s2", 14000, ["travel", "dining"], ["Sky", "Cash"], ["Sky", "Cash"]),
+    _recommend(SEPT_1 + DAY, "s3", 30000, ["travel"], ["Miles", "Sky"], ["Miles"]),
+    _recommend(SEPT_1 + 2 * DAY, "s4", 11000, ["cashback"], ["Cash"], ["Cash"]),
+    {"ts": SEPT_1 + 300, "type": "apply_click", "session_id": "s1", "latency_ms": None, "card_name": "Sky"},
+    {"ts": SEPT_1 + 400, "type": "chat", "session_id": "s1", "latency_ms": 50.0, "message_length": 12},
+    {"ts": SEPT_1 + 500, "type": "chat", "session_id": None, "latency_ms": 40.0, "message_length": 8},
+    {"ts": SEPT_1 + 600, "type": "filter", "session_id": None, "latency_ms": 5.0, "filter_type": "annual_fee"},
+    _recommend(SEPT_1 + 40 * DAY, "s5", 12000, ["travel"], ["Miles"], ["Miles"]),
+]
+
+
+def _write(path, events):
+    with open(path, "a") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def _archive(tmp_path, events=EVENTS):
+    log = str(tmp_path / "events.ndjson")
+    _write(log, events)
+    archive = EventArchive(str(tmp_path / "archive"), rollup_interval=0)
+    assert archive.roll_up(log) == len(events)
+    return archive, log
+
+
+def test_rollup_partitions_by_day_and_is_incremental(tmp_path):
+    """Test that each UTC day gets its own partition and only new log lines are archived."""
+    archive, log = _archive(tmp_path)
+
+    days = sorted(name for name in os.listdir(archive.root) if name.startswith("day="))
+    assert days == ["day=2026-09-01", "day=2026-09-02", "day=2026-09-03", "day=2026-10-11"]
+    assert archive.roll_up(log) == 0
+
+    # A partial trailing line waits for the next roll-up; a late event for a sealed day is compacted in
+    with open(log, "a") as f:
+        f.write(json.dumps(_recommend(SEPT_1 + 500, "s6", 12000, ["travel"], ["Sky"], ["Sky"])) + "\n")
+        f.write('{"ts": ')
+    assert archive.roll_up(log) == 1
+    assert len(archive._part_paths("2026-09-01")) == 1
+    assert archive.query(start="2026-09-01", end="2026-09-01", group_by="day") == [
+        {"day": "2026-09-01", "count": 6, "events": 3}
+    ]
+
+
+def test_query_filters_and_groups(tmp_path):
+    """Test "top choices for salary 10-15k with travel goals in September"."""
+    archive, _ = _archive(tmp_path)
+
+    rows = archive.query(start="2026-09-01", end="2026-09-30", salary=(10000, 15000), goals=["travel"],
+                         top_choice=True, group_by="card")
+    assert rows == [{"card": "Sky", "count": 2, "events": 2}, {"card": "Cash", "count": 1, "events": 1}]
+
+    rows = archive.query(group_by=["goal", "salary_band"])
+    assert {"goal": "travel", "salary_band": "10000-15000", "count": 6, "events": 3} in rows
+    assert {"goal": "dining", "salary_band": "10000-15000", "count": 2, "events": 1} in rows
+    assert {"goal": "travel", "salary_band": "30000-50000", "count": 2, "events": 1} in rows
+
+    assert archive.query(cards=["Miles"], group_by="top_spend") == [{"top_spend": "travel", "count": 3, "events": 3}]
+    assert archive.query(goals=["lounge"]) == []
+
+
+def test_dashboard_metrics_match_rolling_aggregates(tmp_path):
+    """Test that the archive answers the dashboard panels like the in-memory aggregates."""
+    archive, _ = _archive(tmp_path)
+    aggregates = RollingAggregates()
+    for event in EVENTS:
+        aggregates.apply(event)
+    expected = aggregates.metrics()
+
+    metrics = EventArchive(archive.root).dashboard_metrics()
+
+    for key in ("total_sessions", "conversion_rate", "avg_recommendations", "total_apply_clicks",
+                "top_cards", "goal_frequencies", "events"):
+        assert metrics[key] == expected[key], key
+    assert metrics["total_sessions"] == 5 and metrics["conversion_rate"] == 20.0
+    assert metrics["recent_sessions"][0] == expected["recent_sessions"][0]
+    assert abs(metrics["latency_ms"]["recommend"]["p50"] - 10.0) < 1
@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.explanation_cache import ExplanationCache, profile_fingerprint
+from app.explanations import ExplanationService, fallback_explanation
+
+CARDS = [
+    {"card_name": f"Card {i}", "fit_score": 0.8, "recommendation_type": "goal", "annual_fee": 0}
+    for i in range(3)
+]
+
+
+class SlowAgent:
+    """Stands in for LLMAgent with a fixed per-call latency."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_card_explanation(self, card, user_profile):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delays[card["card_name"]])
+        with self.lock:
+            self.active -= 1
+        return f"LLM: {card['card_name']}"
+
+
+def test_explanations_run_concurrently():
+    """Test that the top cards are explained in parallel, not one after another."""
+    agent = SlowAgent({card["card_name"]: 0.2 for card in CARDS})
+    service = ExplanationService(agent, deadline=5)
+
+    start = time.time()
+    explanations = service.explain(CARDS, {})
+
+    assert explanations == [f"LLM: {card['card_name']}" for card in CARDS]
+    assert agent.peak == 3
+    assert time.time() - start < 0.5
+
+
+def test_deadline_falls_back_to_template():
+    """Test that cards still pending at the deadline get the template explanation."""
+    agent = SlowAgent({"Card 0": 0, "Card 1": 2, "Card 2": 0})
+    service = ExplanationService(agent, deadline=0.3)
+
+    start = time.time()
+    explanations = service.explain(CARDS, {})
+
+    assert time.time() - start < 1
+    assert explanations == ["LLM: Card 0", fallback_explanation(CARDS[1]), "LLM: Card 2"]
+
+
+def test_deferred_job_is_polled_until_complete():
+    """Test that a deferred job reports pending, then complete with every explanation."""
+    agent = SlowAgent({card["card_name"]: 0.2 for card in CARDS})
+    service = ExplanationService(agent, deadline=5)
+
+    job_id = service.start(CARDS, {})
+    first = service.poll(job_id)
+    assert first["status"] == "pending"
+
+    done = service.poll(job_id, timeout=2)
+    assert done["status"] == "complete"
+    assert [e["ai_explanation"] for e in done["explanations"]] == [f"LLM: {card['card_name']}" for card in CARDS]
+    assert service.poll("missing") is None
+
+
+def test_cache_serves_similar_profiles_and_invalidates_on_card_change(tmp_path):
+    """Test that bucketed profiles share entries, survive restarts via SQLite, and miss when the card changes."""
+    db_path = str(tmp_path / "explanations.db")
+    agent = SlowAgent({card["card_name"]: 0 for card in CARDS})
+    hashes = {card["card_name"]: "v1" for card in CARDS}
+    service = ExplanationService(agent, cache=ExplanationCache(db_path=db_path), card_hash=hashes.get, deadline=5)
+
+    profile = {"spend": {"online": 2100, "dining": 600}, "goals": ["travel", "cashback"]}
+    similar = {"spend": {"online": 2900, "dining": 700}, "goals": ["cashback", "travel"]}
+    service.explain(CARDS[:1], profile)
+    service.explain(CARDS[:1], similar)
+    assert service.cache.stats()["hits"] == 1
+
+    restarted = ExplanationService(agent, cache=ExplanationCache(db_path=db_path), card_hash=hashes.get, deadline=5)
+    restarted.explain(CARDS[:1], similar)
+    assert restarted.cache.stats()["disk_hits"] == 1
+
+    hashes["Card 0"] = "v2"
+    restarted.explain(CARDS[:1], similar)
+    assert restarted.cache.stats()["misses"] == 1
+
+
+def test_profile_fingerprint_buckets_spend_and_sorts_goals():
+    """Test that the fingerprint ignores goal order and small spend differences."""
+    a = profile_fingerprint({"spend": {"online": 2100, "groceries": 800}, "goals": ["b", "a"]})
+    b = profile_fingerprint({"spend": {"groceries": 900, "online": 2500}, "goals": ["a", "b", "a"]})
+    c = profile_fingerprint({"spend": {"online": 6000, "groceries": 800}, "goals": ["a", "b"]})
+
+    assert a == b
+    assert a != c
+
+
+def test_explanation_prompt_only_uses_the_fingerprint():
+    """Test that profiles sharing a cache key get the same prompt, with no exact amounts or scores."""
+    from app.llm_agent import LLMAgent
+
+    class RecordingLLM:
+        def __init__(self):
+            self.prompts = []
+
+        def invoke(self, messages):
+            self.prompts.append(messages[-1].content)
+            return type("Response", (), {"content": "ok"})()
+
+    agent = LLMAgent.__new__(LLMAgent)
+    agent.llm = RecordingLLM()
+    card = {"card_name": "Card 0", "annual_fee": 0, "rewards": {"online": 5}, "best_for": ["online"], "notes": ""}
+    agent.generate_card_explanation(dict(card, fit_score=0.91, estimated_annual_value="approx. 2100 AED"),
+                                    {"spend": {"online": 2100, "groceries": 800}, "goals": ["online", "cashback"]})
+    agent.generate_card_explanation(dict(card, fit_score=0.74, estimated_annual_value="approx. 2600 AED"),
+                                    {"spend": {"groceries": 900, "online": 2500}, "goals": ["cashback", "online"]})
+
+    first, second = agent.llm.prompts
+    assert first == second
+    assert "2000-3000 AED/month" in first and "2100" not in first and "0.91" not in first
@@ -0,0 +1,62 @@
+import copy
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from app.agent import CardAdvisor
+from test_scoring import random_profile
+from two_pass_scoring import TwoPassEngine
+
+
+@pytest.fixture(scope="module")
+def engines():
+    advisor = CardAdvisor()
+    return advisor.engine, TwoPassEngine(advisor.catalog)
+
+
+def _assert_same(fused: dict, two_pass: dict, cards: list):
+    assert fused.keys() == two_pass.keys()
+    for key, expected in two_pass.items():
+        actual = fused[key]
+        if isinstance(expected, np.ndarray):
+            assert actual.dtype == expected.dtype and np.array_equal(actual, expected), key
+        elif key == "matches":
+            assert [(hit.tolist(), [build(card) for card in cards]) for hit, build in actual] == \
+                   [(hit.tolist(), [build(card) for card in cards]) for hit, build in expected]
+        else:
+            assert actual == expected, key
+
+
+def test_fused_scores_match_the_two_pass_engine(engines):
+    """Test goal scores, spending scores and values bit for bit against the separate passes."""
+    fused, two_pass = engines
+    profiles = [random_profile(seed) for seed in range(400)]
+    # Batches mix profiles with different goal, spend and lifestyle lengths
+    for start in range(0, len(profiles), 37):
+        batch = profiles[start:start + 37]
+        expected = zip(two_pass.goal_scores_batch(copy.deepcopy(batch)),
+                       two_pass.spending_scores_batch(copy.deepcopy(batch)),
+                       two_pass.estimate_values_batch(copy.deepcopy(batch)))
+        for scored, reference in zip(fused.score_batch(copy.deepcopy(batch), all_cards=True), expected):
+            for part, reference_part in zip(scored, reference):
+                _assert_same(part, reference_part, fused.cards)
+
+
+def test_profile_is_parsed_once_into_shared_fields(engines):
+    """Test the compact form: string and dict lifestyle entries, Amazon Fresh usage and spend weights."""
+    fused, _ = engines
+    parsed = fused.parse_profile({
+        "salary": 9000,
+        "spend": {"groceries": 3000, "miscellaneous": 1000, "online": 0},
+        "goals": ["cashback", "cashback"],
+        "lifestyle": {"groceries": ["carrefour", {"service": "amazon_fresh", "usage_percent": 70},
+                                    {"service": "amazon_fresh"}]}
+    })
+
+    assert parsed["goal_set"] == ["cashback"] and parsed["goals"] == ["cashback", "cashback"]
+    assert parsed["lifestyle"] == [("carrefour", 50), ("amazon_fresh", 70), ("amazon_fresh", 50)]
+    assert parsed["services"] == {"groceries": ["carrefour", "amazon_fresh", "amazon_fresh"]}
+    assert parsed["amazon_fresh"] == [70]
+    assert parsed["total_spend"] == 4000 and parsed["weighted_spend"] == [("groceries", 0.75)]
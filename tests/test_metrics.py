@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.metrics import MetricsRegistry
+
+
+def test_per_thread_shards_sum_exactly_on_scrape():
+    """Test that concurrent lock-free increments from many threads are all counted."""
+    registry = MetricsRegistry(directory="")
+    requests = registry.counter("requests_total", "Requests", ("endpoint",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    def work():
+        child = requests.labels("/api/recommend")
+        for _ in range(10000):
+            child.inc()
+            latency.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    text = registry.render()
+    assert 'requests_total{endpoint="/api/recommend"} 80000' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 80000' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 80000' in text
+    assert "latency_seconds_sum 40000" in text and "latency_seconds_count 80000" in text
+
+
+def test_worker_shards_aggregate_and_drop_gauges_of_exited_workers(tmp_path):
+    """Test that a scrape merges other processes' shard files; gauges only from live ones."""
+    registry = MetricsRegistry(directory=str(tmp_path))
+    requests = registry.counter("requests_total", "Requests")
+    in_flight = registry.gauge("in_flight", "In flight")
+    requests.inc(2)
+    in_flight.inc()
+
+    live_pid = os.getppid()
+    dead_pid = 2 ** 22 + 12345
+    for pid in (live_pid, dead_pid):
+        with open(tmp_path / f"{pid}.json", "w") as f:
+            json.dump({"pid": pid, "metrics": {"requests_total": [[[], [5]]], "in_flight": [[[], [3]]]}}, f)
+
+    text = registry.render()
+    assert "requests_total 12" in text
+    assert "in_flight 4" in text
+
+
+def test_callbacks_max_aggregation_and_ratios(tmp_path):
+    """Test callback metrics, info-gauge max merging and hit ratios from aggregated counters."""
+    registry = MetricsRegistry(directory=str(tmp_path))
+    registry.callback("catalog_info", "Catalog", "gauge", ("version",), lambda: {("abc",): 1}, aggregate="max")
+    registry.callback("hits_total", "Hits", "counter", ("cache",), lambda: {("retrieval",): 3})
+    registry.callback("misses_total", "Misses", "counter", ("cache",), lambda: {("retrieval",): 1})
+    registry.ratio("hit_ratio", "Hit ratio", "hits_total", "misses_total")
+    registry.flush()
+    other = os.getppid()
+    with open(tmp_path / f"{other}.json", "w") as f:
+        json.dump({"pid": other, "metrics": {"catalog_info": [[["abc"], [1]]], "hits_total": [[["retrieval"], [1]]],
+                                             "misses_total": [[["retrieval"], [3]]]}}, f)
+
+    text = registry.render()
+    assert 'catalog_info{version="abc"} 1\n' in text
+    assert 'hits_total{cache="retrieval"} 4' in text
+    assert 'hit_ratio{cache="retrieval"} 0.5' in text
+
+
+def test_reset_after_fork_starts_from_zero(tmp_path):
+    """Test that a forked worker doesn't re-report the parent's counts."""
+    registry = MetricsRegistry(directory=str(tmp_path), flush_interval=60)
+    requests = registry.counter("requests_total", "Requests", ("endpoint",))
+    requests.labels("/health").inc(7)
+
+    registry.reset_after_fork()
+    requests.labels("/health").inc()
+    registry.flush()
+
+    with open(tmp_path / f"{os.getpid()}.json") as f:
+        assert json.load(f)["metrics"]["requests_total"] == [[["/health"], [1.0]]]
+    registry.stop()
@@ -0,0 +1,96 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import Document
+from app.rag_pipeline import (Chroma, create_documents, get_embeddings, load_manifest, plan_query,
+                              retrieve_documents, sync_vectorstore)
+
+
+def test_sync_only_embeds_changed_chunks(tmp_path):
+    """Test that a re-sync embeds nothing, and an edit only touches the edited and deleted cards."""
+    persist_directory = str(tmp_path / "chroma")
+    vectorstore = Chroma(persist_directory=persist_directory, embedding_function=get_embeddings())
+    documents = create_documents()
+
+    first = sync_vectorstore(vectorstore, persist_directory, documents)
+    assert first["added"] == len(load_manifest(persist_directory))
+    assert first["updated"] == first["removed"] == 0
+
+    again = sync_vectorstore(vectorstore, persist_directory, documents)
+    assert again["added"] == again["updated"] == again["removed"] == 0
+
+    edited = Document(page_content=documents[0].page_content + "\nNew perk", metadata=documents[0].metadata)
+    after = sync_vectorstore(vectorstore, persist_directory, [edited] + documents[2:])
+    assert after["added"] == 0
+    assert after["updated"] == 1
+    assert after["removed"] == 1
+    assert len(vectorstore.get(include=[])["ids"]) == len(load_manifest(persist_directory))
+
+
+def test_plan_query_extracts_metadata_filters():
+    """Test that salary, no-fee and bank constraints become Chroma metadata filters."""
+    where = plan_query("Any no annual fee card from ENBD or Mashreq?", {"salary": 12000})
+    card_filter = where["$or"][1]
+
+    assert where["$or"][0] == {"type": {"$eq": "reference"}}
+    assert {"min_salary": {"$lte": 12000}} in card_filter["$and"]
+    assert {"annual_fee": {"$eq": 0}} in card_filter["$and"]
+    assert {"bank": {"$in": ["Emirates NBD", "Mashreq"]}} in card_filter["$and"]
+
+    assert plan_query("I earn 8k a month, what can I get?")["$or"][1] == {"min_salary": {"$lte": 8000.0}}
+    assert plan_query("Which card has lounge access?") is None
+
+
+def test_plan_query_only_reads_plausible_salaries():
+    """Test that reward rates and counts next to "earn" / "make" are not taken for a salary."""
+    for message in ("Which card lets me earn 5% cashback?", "I make 2 trips a year", "Where can I earn 10x points?",
+                    "I want to earn 50% more miles"):
+        assert plan_query(message) is None, message
+
+    assert plan_query("My salary is 12,000 AED.")["$or"][1] == {"min_salary": {"$lte": 12000.0}}
+    # The profile salary wins over a number in the message
+    assert plan_query("I earn 30k now", {"salary": 9000})["$or"][1] == {"min_salary": {"$lte": 9000}}
+
+
+def test_plan_query_accepts_unvalidated_profile_salaries():
+    """Test that the chat profile's salary is coerced, and non-numeric values fall back to the message."""
+    assert plan_query("Any good card?", {"salary": "15000"})["$or"][1] == {"min_salary": {"$lte": 15000.0}}
+    assert plan_query("I earn 8k", {"salary": "n/a"})["$or"][1] == {"min_salary": {"$lte": 8000.0}}
+    for salary in ("abc", None, [], {}, "-5", 0):
+        assert plan_query("Any good card?", {"salary": salary}) is None, salary
+
+
+def test_retrieval_falls_back_when_only_reference_chunks_match():
+    """Test the unfiltered fallback when a filter excludes every card but still passes reference chunks."""
+    class Doc:
+        def __init__(self, kind):
+            self.metadata = {"type": kind}
+
+    class VectorStore:
+        def similarity_search(self, message, k, filter):
+            return [Doc("reference")]
+
+    class Retriever:
+        search_kwargs = {"k": 5}
+        vectorstore = VectorStore()
+
+        def get_relevant_documents(self, message):
+            return [Doc("card"), Doc("reference")]
+
+    docs = retrieve_documents(Retriever(), "card", where={"$or": [{"type": {"$eq": "reference"}}, {"min_salary": {"$lte": 1}}]})
+    assert [doc.metadata["type"] for doc in docs] == ["card", "reference"]
+
+
+def test_filtered_retrieval_only_returns_eligible_cards(tmp_path):
+    """Test that the pushed-down filter drops cards the user is not eligible for."""
+    persist_directory = str(tmp_path / "chroma")
+    vectorstore = Chroma(persist_directory=persist_directory, embedding_function=get_embeddings())
+    sync_vectorstore(vectorstore, persist_directory, create_documents())
+    retriever = vectorstore.as_retriever(search_kwargs={"k": 50})
+
+    docs = retrieve_documents(retriever, "free card for low salary", where=plan_query("no fee card", {"salary": 5000}))
+    cards = [doc for doc in docs if doc.metadata.get("type") == "card"]
+
+    assert cards
+    assert all(doc.metadata["annual_fee"] == 0 and doc.metadata["min_salary"] <= 5000 for doc in cards)
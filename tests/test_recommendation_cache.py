@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent import CardAdvisor
+from app.profiles import canonical_profile, profile_hash
+from app.recommendation_cache import RecommendationCache
+
+PROFILE = {
+    "salary": 20000,
+    "spend": {"groceries": 3000, "dining": 1500, "online": 2000},
+    "goals": ["cashback", "noAnnualFee"],
+    "lifestyle": {"groceries": ["carrefour", {"service": "amazon_fresh", "usage_percent": 70}], "fuel_stations": ["adnoc"]}
+}
+EQUIVALENT = {
+    "lifestyle": {"groceries": [{"service": "carrefour"}, {"usage_percent": 70, "service": "amazon_fresh"}],
+                  "fuel_stations": [{"service": "adnoc", "usage_percent": 50}]},
+    "goals": ["no_fee", "cashback"],
+    "spend": {"groceries": 3000, "dining": 1500, "online": 2000},
+    "salary": 20000
+}
+
+
+def test_equivalent_profiles_share_a_hash():
+    """Test goal order and casing and string vs dict lifestyle entries; spend order and Amazon Fresh form are kept."""
+    assert canonical_profile(PROFILE) == canonical_profile(EQUIVALENT)
+    assert profile_hash(PROFILE) == profile_hash(EQUIVALENT)
+    assert canonical_profile(canonical_profile(PROFILE)) == canonical_profile(PROFILE)
+    assert PROFILE["lifestyle"]["fuel_stations"] == ["adnoc"]
+
+    different_usage = dict(EQUIVALENT, lifestyle={"groceries": EQUIVALENT["lifestyle"]["groceries"],
+                                                 "fuel_stations": [{"service": "adnoc", "usage_percent": 90}]})
+    amazon_fresh_string = dict(PROFILE, lifestyle={"groceries": ["carrefour", "amazon_fresh"], "fuel_stations": ["adnoc"]})
+    amazon_fresh_dict = dict(PROFILE, lifestyle={"groceries": ["carrefour", {"service": "amazon_fresh"}], "fuel_stations": ["adnoc"]})
+    reordered_spend = dict(PROFILE, spend={"online": 2000, "dining": 1500, "groceries": 3000})
+    for different in (different_usage, amazon_fresh_string, reordered_spend,
+                      dict(PROFILE, goals=["cashback", "cashback", "no_fee"])):
+        assert profile_hash(different) != profile_hash(PROFILE)
+    assert profile_hash(amazon_fresh_string) != profile_hash(amazon_fresh_dict)
+
+
+def test_lifestyle_entry_forms_score_the_same():
+    """Test that string and dict lifestyle entries that share a hash get the same recommendations."""
+    advisor = CardAdvisor()
+    strings = dict(PROFILE, goals=["cashback", "no_fee"])
+    dicts = dict(EQUIVALENT, goals=["cashback", "no_fee"])
+    assert profile_hash(strings) == profile_hash(dicts)
+    assert advisor._recommend_chunk([strings], explain=False) == advisor._recommend_chunk([dicts], explain=False)
+
+
+def test_recommend_is_memoized_per_catalog_version(monkeypatch):
+    """Test that an equivalent profile is served from the cache and a new catalog version is not."""
+    advisor = CardAdvisor()
+    monkeypatch.setattr(advisor.explainer, "start", lambda cards, profile: "job")
+    calls = []
+    score_chunk = advisor._score_chunk
+    monkeypatch.setattr(advisor, "_score_chunk", lambda *args: calls.append(1) or score_chunk(*args))
+
+    first = advisor.recommend(PROFILE, defer_explanations=True)
+    first["recommendations"][0]["fit_score"] = -1
+    second = advisor.recommend(EQUIVALENT, defer_explanations=True)
+
+    assert len(calls) == 1
+    assert second["recommendations"][0]["fit_score"] != -1
+    assert second["result_id"] != first["result_id"]
+    assert advisor.recommendation_cache.stats()["hits"] == 1
+
+    monkeypatch.setattr(advisor.catalog_store.snapshot, "version", "next")
+    advisor.recommend(PROFILE, defer_explanations=True)
+    assert len(calls) == 2
+
+
+def test_cache_eviction_and_expiry_stats():
+    """Test the LRU bound, the TTL and the counters the API reports."""
+    cache = RecommendationCache(max_size=2, ttl=0.2)
+    cache.set(("a", "v1"), 1)
+    cache.set(("b", "v1"), 2)
+    assert cache.get(("a", "v1")) == 1
+    cache.set(("c", "v1"), 3)
+
+    assert cache.get(("b", "v1")) is None
+    time.sleep(0.25)
+    assert cache.get(("a", "v1")) is None
+    assert cache.stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 2, "evictions": 1,
+                             "expirations": 1, "hit_rate": 0.3333}
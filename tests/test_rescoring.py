@@ -0,0 +1,110 @@
+import copy
+import os
+import random
+import sys
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent import CardAdvisor
+from app.question_generator import enrich_profile_with_answers
+from app.rescoring import ProfileTerms
+
+CATEGORIES = ["dining", "groceries", "online", "fuel", "entertainment", "international_travel",
+              "domestic_transport", "miscellaneous", "utilities"]
+GOALS = ["travel", "cashback", "no_fee", "online", "dining", "premium", "entertainment", "international", "transport"]
+ANSWERS = {
+    "online_shopping": ["amazon", "noon", "namshi"],
+    "grocery_shopping": ["amazon_fresh", "carrefour", "lulu"],
+    "fuel_stations": ["adnoc", "enoc"],
+    "transport_type": ["careem", "rta"],
+    "dining_habits": ["talabat", "deliveroo"],
+    "entertainment_type": ["vox", "reel"],
+}
+BASE = {"salary": 25000, "spend": {"dining": 2500, "groceries": 3000, "online": 1800, "miscellaneous": 1200},
+        "goals": ["cashback", "travel"], "lifestyle": {"dining": [{"service": "talabat", "usage_percent": 60}]}}
+
+
+def _assert_same(batch: dict, incremental: dict, engine):
+    assert batch.keys() == incremental.keys()
+    for key, expected in batch.items():
+        actual = incremental[key]
+        if isinstance(expected, np.ndarray):
+            assert np.array_equal(expected, actual), key
+        elif key == "matches":
+            assert [(hit.tolist(), [build(card) for card in engine.cards]) for hit, build in expected] == \
+                   [(hit.tolist(), [build(card) for card in engine.cards]) for hit, build in actual]
+        else:
+            assert expected == actual, key
+
+
+def test_incremental_scores_match_the_batch_engine_exactly():
+    """Test random profiles refined by random answer sequences against a full rescore of the salary prefix."""
+    engine = CardAdvisor().snapshot.engine
+    rng = random.Random(7)
+    for _ in range(60):
+        profile = {
+            "salary": rng.choice([5000, 12000, 30000, 60000]),
+            "spend": {c: rng.choice([0, 500, 1600, 2500, 3500]) for c in rng.sample(CATEGORIES, rng.randint(1, 6))},
+            "goals": rng.sample(GOALS, rng.randint(0, 3)),
+            "lifestyle": {}
+        }
+        terms = ProfileTerms(engine)
+        for _ in range(3):
+            for expected, actual in zip(engine.score_batch([profile])[0], terms.score(profile)):
+                _assert_same(expected, actual, engine)
+
+            answers = {q: rng.sample(ANSWERS[q], rng.randint(1, 2)) for q in rng.sample(list(ANSWERS), 2)}
+            if rng.random() < 0.3:
+                answers["priority"] = {rng.choice(GOALS): 1, rng.choice(GOALS): 2}
+            profile = enrich_profile_with_answers(copy.deepcopy(profile), answers)
+
+
+def test_answers_only_recompute_the_terms_they_touch():
+    """Test that a groceries answer recomputes the groceries lifestyle and value terms and reuses the rest."""
+    engine = CardAdvisor().snapshot.engine
+    terms = ProfileTerms(engine)
+    terms.score(copy.deepcopy(BASE))
+    total = terms.computed
+
+    refined = enrich_profile_with_answers(copy.deepcopy(BASE), {"grocery_shopping": ["carrefour"]})
+    terms.score(refined)
+
+    assert terms.computed == 3  # goal lifestyle steps, spending lifestyle steps, groceries value
+    assert terms.reused == total - 1  # the groceries value term without lifestyle data is dropped
+
+    terms.score(refined)
+    assert terms.computed == 0
+
+
+def test_recommend_with_a_primed_session_matches_a_cold_recommend(monkeypatch):
+    """Test the questionnaire round-trip: prime with the base profile, then recommend the refined one."""
+    advisor = CardAdvisor()
+    monkeypatch.setattr(advisor.explainer, "start", lambda cards, profile: "job")
+    refined = enrich_profile_with_answers(copy.deepcopy(BASE), {"transport_type": ["careem"], "priority": {"online": 1}})
+
+    expected = advisor.recommend(refined, defer_explanations=True)
+    advisor.recommendation_cache.clear()
+    advisor.prime_session("s1", BASE)
+    result = advisor.recommend(refined, defer_explanations=True, session_id="s1")
+
+    for key in ("recommendations", "goal_based", "spending_based", "top_choices", "follow_up_questions"):
+        assert result[key] == expected[key]
+    stats = advisor.session_scores.stats()
+    assert stats["hits"] == 1 and stats["terms_reused"] > 0
+
+
+def test_recommend_endpoint_uses_the_session_path_only_for_client_sessions(monkeypatch):
+    """Test that an anonymous /api/recommend is batch scored and leaves no session state behind."""
+    from app import api
+    monkeypatch.setattr(api.advisor.explainer, "start", lambda cards, profile: "job")
+    client = api.app.test_client()
+    before = api.advisor.session_scores.stats()
+
+    response = client.post("/api/recommend?explanations=deferred", json=dict(BASE, salary=25001))
+    assert response.status_code == 200 and response.get_json()["session_id"]
+    assert api.advisor.session_scores.stats() == before
+
+    response = client.post("/api/generate-questions", json=dict(BASE, salary=25002))
+    session_id = response.get_json()["session_id"]
+    client.post("/api/recommend?explanations=deferred", json=dict(BASE, salary=25002, session_id=session_id))
+    assert api.advisor.session_scores.stats()["hits"] == before["hits"] + 1
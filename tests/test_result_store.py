@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agent import CardAdvisor
+from app.result_store import ResultStore
+
+CANDIDATES = [{"card_name": f"Card {i}", "annual_fee": 0 if i % 2 else 300} for i in range(4)]
+
+
+def test_store_evicts_least_recent_and_expires():
+    """Test the size bound (LRU) and the TTL."""
+    store = ResultStore(max_size=2, ttl=0.2)
+    first = store.put(CANDIDATES)
+    second = store.put(CANDIDATES[:1], catalog_version="v1")
+    assert store.get(first)["candidates"] == CANDIDATES
+    store.put(CANDIDATES)
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    time.sleep(0.25)
+    assert store.get(first) is None
+    assert store.stats()["misses"] == 2
+
+
+def test_sqlite_tier_is_shared_between_processes(tmp_path):
+    """Test that a result stored by one worker can be read by another."""
+    path = str(tmp_path / "results.sqlite")
+    worker_a = ResultStore(db_path=path)
+    worker_b = ResultStore(db_path=path)
+
+    result_id = worker_a.put(CANDIDATES, catalog_version="v1")
+
+    assert worker_b.get(result_id) == {"candidates": CANDIDATES, "catalog_version": "v1"}
+    assert worker_b.stats()["disk_hits"] == 1
+
+
+def test_filter_ranks_every_eligible_card_lazily(monkeypatch):
+    """Test that filters see every eligible card, not just the six shown, in full-sort order."""
+    advisor = CardAdvisor()
+    monkeypatch.setattr(advisor.explainer, "start", lambda cards, profile: "job")
+    profile = {"salary": 30000, "spend": {"dining": 2000, "groceries": 3000, "online": 1500},
+               "goals": ["cashback", "travel"], "lifestyle": {}}
+    result = advisor.recommend(profile, defer_explanations=True)
+    entry = advisor.result_store.get(result["result_id"])
+    assert entry["candidates"] == result["recommendations"]
+
+    # Every eligible card as a result dict, ordered the way the store used to keep them
+    scores = advisor._stored_scores(entry)
+    snapshot = scores["snapshot"]
+    every = (advisor._goal_based_cards(scores["goal"], scores["values"], snapshot, limit=None) +
+             advisor._spending_based_cards(scores["profile"], scores["spending"], scores["values"], snapshot, limit=None))
+    seen = {card["card_name"] for card in result["recommendations"]}
+    rest = []
+    for card in every:
+        if card["card_name"] not in seen:
+            seen.add(card["card_name"])
+            rest.append(card)
+    rest.sort(key=lambda x: x["fit_score"], reverse=True)
+    candidates = result["recommendations"] + rest
+
+    advisor.recommendation_cache.clear()  # as on a worker that didn't score the result
+    for filter_type, choice in [("annual_fee", "No annual fee preferred"), ("annual_fee", "Open to annual fees"),
+                                ("premium_benefits", "Yes"), ("brand_loyalty", "No")]:
+        keep = advisor._filter_predicate(filter_type, choice)
+        assert advisor.filter_result(result["result_id"], filter_type, choice) == [c for c in candidates if keep(c)][:6]
+    assert advisor.filter_result(result["result_id"], "unknown", "x") == candidates[:3]
+    assert advisor.filter_result("missing", "annual_fee", "No annual fee preferred") is None
@@ -0,0 +1,66 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.retrieval_cache import RetrievalCache, normalize_query
+
+
+class Retriever:
+    """Counts retrievals and returns the query as its only document."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query):
+        self.calls.append(query)
+        return [query]
+
+
+class KeywordEmbeddings:
+    """Bag-of-keywords vectors, so paraphrases with the same keywords are near-identical."""
+
+    WORDS = ["lounge", "access", "fee", "cashback", "card"]
+
+    def embed_query(self, text):
+        return [float(word in text.split()) for word in self.WORDS]
+
+
+def test_normalized_queries_share_an_entry():
+    """Test that case, punctuation and spacing differences hit the same entry."""
+    retriever = Retriever()
+    cache = RetrievalCache()
+
+    cache.get_or_retrieve("Which card has lounge access?", retriever)
+    cache.get_or_retrieve("which card  has LOUNGE access", retriever)
+
+    assert retriever.calls == ["Which card has lounge access?"]
+    assert normalize_query("Best no-fee card!") == "best no fee card"
+    assert cache.stats()["hits"] == 1
+
+
+def test_index_rebuild_invalidates_cache():
+    """Test that a new index version drops cached results."""
+    version = ["v1"]
+    retriever = Retriever()
+    cache = RetrievalCache(index_version=lambda: version[0])
+
+    cache.get_or_retrieve("best no fee card", retriever)
+    version[0] = "v2"
+    cache.get_or_retrieve("best no fee card", retriever)
+
+    assert len(retriever.calls) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_semantic_lookup_reuses_paraphrases():
+    """Test that a paraphrase above the similarity threshold reuses the earlier retrieval."""
+    retriever = Retriever()
+    cache = RetrievalCache(embeddings=KeywordEmbeddings(), similarity=0.95)
+
+    cache.get_or_retrieve("which card has lounge access", retriever)
+    docs = cache.get_or_retrieve("lounge access on which card", retriever)
+    cache.get_or_retrieve("cashback card", retriever)
+
+    assert docs == ["which card has lounge access"]
+    assert cache.stats()["semantic_hits"] == 1
+    assert len(retriever.calls) == 2
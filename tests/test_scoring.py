@@ -0,0 +1,151 @@
+import copy
+import os
+import random
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from app.agent import CardAdvisor
+from app.scoring import top_k
+from legacy_scoring import LegacyScorer
+
+SPEND_CATEGORIES = ["groceries", "international_travel", "domestic_transport", "fuel", "online",
+                    "dining", "miscellaneous", "utilities", "remittances", "entertainment", "education"]
+GOALS = ["travel", "miles", "cashback", "premium", "luxury", "no_fee", "careem", "nol", "transport",
+         "international", "entertainment", "dining", "online", "fuel", "airport_lounge", "Dining", "shopping"]
+SERVICES = {
+    "online_shopping": ["amazon_ae", "noon", "namshi"],
+    "groceries": ["carrefour", "lulu", "amazon_fresh", "noon_daily"],
+    "fuel_stations": ["adnoc", "enoc"],
+    "airlines": ["emirates", "etihad", "flydubai"],
+    "entertainment": ["vox_cinemas", "reel_cinemas"],
+    "retail_malls": ["dubai_mall", "city_centre"]
+}
+
+
+def random_profile(seed):
+    """Build a random profile mixing string and dict lifestyle entries."""
+    rng = random.Random(seed)
+    spend = {c: rng.choice([0, 500, 801, 1501, 2001, 3001, 5000]) for c in rng.sample(SPEND_CATEGORIES, rng.randint(0, 8))}
+    lifestyle = {}
+    for key in rng.sample(list(SERVICES), rng.randint(0, 3)):
+        lifestyle[key] = [
+            svc if rng.random() < 0.4 else {"service": svc, "usage_percent": rng.choice([10, 50, 100])}
+            for svc in rng.sample(SERVICES[key], rng.randint(1, len(SERVICES[key])))
+        ]
+    return {
+        "salary": rng.choice([3000, 6000, 10000, 15000, 30000, 50000]),
+        "spend": spend,
+        "goals": [rng.choice(GOALS) for _ in range(rng.randint(0, 4))],
+        "lifestyle": lifestyle
+    }
+
+
+@pytest.fixture(scope="module")
+def advisor():
+    return CardAdvisor()
+
+
+def test_engine_compiles_catalog(advisor):
+    """Test that the catalog is compiled into card-aligned arrays."""
+    engine = advisor.engine
+
+    # One column per reward category plus the all-zero column for unknown categories
+    assert engine.reward_rates.shape == (len(advisor.cards_data), len(engine.categories) + 1)
+    assert engine.tag_matrix.shape == (len(advisor.cards_data), len(engine.tags))
+    assert engine.min_salary.tolist() == [card["min_salary"] for card in advisor.cards_data]
+
+
+def test_catalog_index_matches_raw_data(advisor):
+    """Test that catalog lookups agree with scanning the raw JSON."""
+    catalog = advisor.catalog
+
+    for i, card in enumerate(advisor.cards_data):
+        assert catalog.apply_url[i] == advisor.apply_urls.get(card["name"], {}).get("apply_url", "")
+    for service, info in advisor.service_mapping.get("co_branded_cards", {}).items():
+        expected = [i for i, card in enumerate(advisor.cards_data) if card["name"] == info["card_name"]]
+        assert catalog.service_cards[service].tolist() == expected
+    for goal in GOALS:
+        expected = [i for i, card in enumerate(advisor.cards_data)
+                    if any(goal.lower() in tag.lower() for tag in card.get("best_for", []))]
+        assert catalog.cards_for_goal(goal).tolist() == expected
+
+
+def test_goal_lookups_stay_bounded():
+    """Test that unknown client goals are not memoized and known ones are capped by the LRU bound."""
+    catalog = CardAdvisor().catalog
+    catalog._goal_postings.max_size = 3
+    for k in range(50):
+        assert len(catalog.cards_for_goal(f"zz-unknown-{k}")) == 0
+    assert len(catalog._goal_postings) == 0
+
+    for goal in ["travel", "cashback", "dining", "online"]:
+        catalog.cards_for_goal(goal)
+    assert list(catalog._goal_postings.entries) == ["cashback", "dining", "online"]
+
+
+def test_engine_goal_masks_stay_bounded():
+    """Test that goal masks for unknown goals are shared, not stored per goal."""
+    engine = CardAdvisor().engine
+    for k in range(50):
+        assert not engine.goal_matches(f"zz-unknown-{k}").any()
+    assert len(engine._goal_matches) == 0
+    assert engine.goal_matches("travel").any() and len(engine._goal_matches) == 1
+
+    engine.score_batch([{"salary": 20000, "spend": {}, "goals": [f"zz-unknown-{k}" for k in range(50)]}])
+    assert len(engine._goal_matches_by_salary) == 0
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_goal_based_cards_match_legacy(advisor, seed):
+    """Test that vectorized goal scoring returns exactly what the per-card loop returned."""
+    profile = random_profile(seed)
+    legacy = LegacyScorer(advisor)
+
+    assert advisor._get_goal_based_cards(copy.deepcopy(profile)) == legacy._get_goal_based_cards(copy.deepcopy(profile))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_spending_based_cards_match_legacy(advisor, seed):
+    """Test that vectorized spending scoring returns exactly what the per-card loop returned."""
+    profile = random_profile(seed)
+    legacy = LegacyScorer(advisor)
+
+    assert advisor._get_spending_based_cards(copy.deepcopy(profile)) == legacy._get_spending_based_cards(copy.deepcopy(profile))
+
+
+def test_estimated_values_match_legacy(advisor):
+    """Test that vectorized value estimates format the same for every card."""
+    legacy = LegacyScorer(advisor)
+
+    for seed in range(50):
+        profile = random_profile(seed)
+        values = advisor.engine.estimate_values(profile)
+        for i, card in enumerate(advisor.cards_data):
+            assert advisor.engine.format_value(values, i) == legacy._estimate_value(card, profile)
+
+
+def test_batch_matches_single_profile_scoring(advisor):
+    """Test that batch scoring gives each profile the same result as scoring it alone."""
+    profiles = [random_profile(seed) for seed in range(60)]
+
+    batch = list(advisor.recommend_batch(copy.deepcopy(profiles), explain=False, chunk_size=7))
+    single = [advisor._recommend_chunk([copy.deepcopy(p)], explain=False)[0] for p in profiles]
+
+    assert batch == single
+    assert not any("ai_explanation" in card for result in batch for card in result["recommendations"])
+
+
+def test_top_k_matches_a_full_sort():
+    """Test argpartition top-k against sorting everything, with heavy ties after rounding."""
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        n = int(rng.integers(1, 400))
+        ids = np.sort(rng.choice(1000, n, replace=False))
+        scores = np.minimum(0.5 + rng.integers(0, 60, n) * 0.0099 + rng.random(n) * 1e-3, 1.0)
+        groups = rng.integers(0, 3, n)
+        full = sorted(range(n), key=lambda j: (int(groups[j]), round(float(scores[j]), 2)), reverse=True)
+        for k in (1, 3, 5, n + 1):
+            assert top_k(ids, scores, k, groups) == [int(ids[j]) for j in full[:k]]
+        assert top_k(ids, scores) == sorted(ids, key=lambda i: round(float(scores[np.searchsorted(ids, i)]), 2), reverse=True)
@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.explanations import ExplanationService
+from app.question_generator import enrich_profile_with_answers
+from app.tracing import NOOP_SPAN, TraceExporter, Tracer, current_trace, span
+from benchmarks.trace_collector import Collector, summarize
+
+
+class EchoAgent:
+    def generate_card_explanation(self, card, user_profile):
+        return f"LLM: {card['card_name']}"
+
+
+def test_span_is_a_noop_without_a_trace():
+    """Test that instrumented code records nothing outside a request trace."""
+    assert span("scoring.goals") is NOOP_SPAN
+    with span("scoring.goals") as s:
+        s.set_attribute("profiles", 1)
+    assert current_trace() is None
+
+
+def test_spans_nest_and_summarize_as_server_timing():
+    """Test parent links, per-stage totals and the Server-Timing header value."""
+    tracer = Tracer(enabled=True, export="")
+    trace = tracer.start_trace("POST /api/recommend")
+    with span("explanations") as parent:
+        with span("llm.explanation", card="A") as child:
+            pass
+    enrich_profile_with_answers({"goals": []}, {"online_shopping": ["noon"]})
+    tracer.finish(trace)
+
+    assert current_trace() is None
+    assert child.parent_id == parent.span_id and parent.parent_id == trace.root.span_id
+    assert list(trace.stage_durations()) == ["llm.explanation", "explanations", "enrich_profile_with_answers"]
+    header = trace.server_timing()
+    assert header.startswith("llm.explanation;dur=") and header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_trace_follows_explanations_into_worker_threads():
+    """Test that per-card LLM spans from the explanation pool land in the request's trace."""
+    tracer = Tracer(enabled=True, export="")
+    service = ExplanationService(EchoAgent(), deadline=5)
+    cards = [{"card_name": f"Card {i}", "fit_score": 0.8} for i in range(3)]
+
+    trace = tracer.start_trace("POST /api/recommend")
+    service.explain(cards, {})
+    tracer.finish(trace)
+
+    workers = [s for s in trace.spans if s.name == "llm.explanation"]
+    assert sorted(s.attributes["card"] for s in workers) == ["Card 0", "Card 1", "Card 2"]
+    assert all(s.parent_id == trace.root.span_id for s in workers)
+
+
+def test_exports_otlp_json_to_file_and_collector(tmp_path):
+    """Test the file exporter and the OTLP/HTTP exporter against the local collector."""
+    path = str(tmp_path / "traces.ndjson")
+    tracer = Tracer(enabled=True, export=path)
+    tracer.exporter.flush_interval = 0.01
+    trace = tracer.start_trace("GET /health")
+    with span("stage"):
+        pass
+    tracer.finish(trace)
+    tracer.exporter.flush()
+
+    with open(path) as f:
+        exports = [json.loads(line) for line in f]
+    spans = exports[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {s["name"] for s in spans} == {"stage", "GET /health"}
+    assert all(s["traceId"] == trace.trace_id for s in spans)
+
+    collector = Collector(("127.0.0.1", 0))
+    threading.Thread(target=collector.serve_forever, daemon=True).start()
+    try:
+        exporter = TraceExporter(f"http://127.0.0.1:{collector.server_port}/v1/traces", flush_interval=0.01)
+        exporter.submit(trace)
+        exporter.flush()
+    finally:
+        collector.shutdown()
+    assert summarize(collector.exports)["stage"]["count"] == 1
@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.profiles import normalize_goals
+from app.question_generator import generate_questions
+from benchmarks.load_driver import run
+from benchmarks.traffic import GOALS, TrafficGenerator, read_ndjson, write_ndjson
+
+
+def test_same_seed_same_stream():
+    """Test that a seed fully determines the event stream."""
+    first = list(TrafficGenerator(seed=7).events(200))
+    second = list(TrafficGenerator(seed=7).events(200))
+    other = list(TrafficGenerator(seed=8).events(200))
+
+    assert first == second
+    assert first != other
+
+
+def test_profiles_follow_configured_distributions():
+    """Test salary bands, known goals and Zipf-skewed service popularity."""
+    generator = TrafficGenerator(seed=1, salary_bands=[(8000, 9000, 1)], popularity_skew=2.0)
+    counts = {}
+    for profile in generator.profiles(500):
+        assert 8000 <= profile["salary"] <= 9000
+        assert set(normalize_goals(profile["goals"])) <= set(GOALS)
+        for entry in profile["lifestyle"].get("ride_hailing", []):
+            service = entry["service"] if isinstance(entry, dict) else entry
+            counts[service] = counts.get(service, 0) + 1
+
+    assert max(counts, key=counts.get) == generator.services["ride_hailing"][0]
+
+
+def test_answers_match_the_questions_asked():
+    """Test that answers only use question IDs and option values the app generates."""
+    generator = TrafficGenerator(seed=3)
+    for profile in generator.profiles(300):
+        goals = normalize_goals(profile["goals"])
+        questions = {q["id"]: q for q in generate_questions(
+            profile["salary"], profile["spend"], profile["lifestyle"], goals)["questions"]}
+        for question_id, answer in generator.answers(profile).items():
+            if question_id == "priority" or question_id.endswith("_custom"):
+                continue
+            values = {option["value"] for option in questions[question_id]["options"]}
+            assert set(answer if isinstance(answer, list) else [answer]) <= values
+
+
+def test_ndjson_round_trip_streams(tmp_path):
+    """Test writing and reading events as NDJSON."""
+    path = tmp_path / "traffic.ndjson"
+    with open(path, "w") as f:
+        assert write_ndjson(TrafficGenerator(seed=2).events(50), f) == 50
+
+    assert list(read_ndjson(str(path))) == list(TrafficGenerator(seed=2).events(50))
+
+
+def test_load_driver_reports_per_endpoint():
+    """Test the load driver against a throwaway local HTTP server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(500 if self.path == "/api/chat" else 200)
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        events = TrafficGenerator(seed=4).events(60)
+        report = run(f"http://127.0.0.1:{server.server_port}", events, concurrency=4)
+    finally:
+        server.shutdown()
+
+    assert sum(r["requests"] for r in report.values()) == 60
+    assert report["recommend"]["errors"] == 0
+    assert report["chat"]["errors"] == report["chat"]["requests"]
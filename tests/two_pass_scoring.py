@@ -0,0 +1,263 @@
+"""
+Two-pass vectorized scoring from before the fused scorer, kept verbatim as the
+reference for differential tests
+"""
+import numpy as np
+from app.scoring import GENERAL_SPEND_CATEGORIES, LIFESTYLE_CATEGORY_KEYS, ScoringEngine, _column, parse_lifestyle_entry
+
+
+class TwoPassEngine(ScoringEngine):
+    """ScoringEngine with goal, spending and value scoring as separate passes over each profile."""
+
+    def goal_scores_batch(self, profiles: list) -> list:
+        """Score every card against each profile's goals."""
+        salaries = [p.get("salary", 0) for p in profiles]
+        goal_lists = [list(set(p.get("goals", []))) for p in profiles]
+        spends = [p.get("spend", {}) for p in profiles]
+        salary = _column(salaries)
+
+        match_count = self._goal_match_counts(goal_lists)
+        candidates = self.eligible(salary) & (match_count > 0)
+
+        score = 0.5 + match_count * 0.15
+        score += np.where(self.zero_fee, 0.05, 0.0)
+
+        # Boost for international spenders
+        international = _column([s.get("international_travel", 0) > 2000 and "international" in g
+                                 for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(international & self.goal_international_cards, 0.2, 0.0)
+
+        # Boost for domestic transport users
+        transport = _column([s.get("domestic_transport", 0) > 800 and any(x in g for x in ["transport", "careem", "nol"])
+                             for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(transport & self.transport_cards, 0.15, 0.0)
+
+        # Boost for online shoppers
+        online = _column([s.get("online", 0) > 1500 and "online" in g for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(online, self.goal_online_boost, 0.0)
+
+        # Boost for entertainment seekers
+        entertainment = _column(["entertainment" in g for g in goal_lists], bool)
+        score += np.where(entertainment & self.goal_entertainment_cards, 0.2, 0.0)
+
+        # Premium card boost for high earners
+        premium = _column([s >= 50000 and any(x in g for x in ["premium", "luxury"])
+                           for s, g in zip(salaries, goal_lists)], bool)
+        score += np.where(premium & self.premium_cards, 0.25, 0.0)
+
+        # Strong boost for goal+spending alignment
+        online_aligned = _column(["online" in g and s.get("online", 0) > 2000 for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(online_aligned & self.high_online_cards, 0.3, 0.0)
+
+        dining_aligned = _column(["dining" in g and s.get("dining", 0) > 3000 for s, g in zip(spends, goal_lists)], bool)
+        score += np.where(dining_aligned & self.high_dining_cards, 0.3, 0.0)
+
+        # Boost for high travel reward rates
+        travel = _column(["travel" in g or "miles" in g for g in goal_lists], bool)
+        score += np.where(travel, self.travel_boost, 0.0)
+
+        # Entry-level card boost for low salary
+        entry = _column([s <= 6000 and "no_fee" in g for s, g in zip(salaries, goal_lists)], bool)
+        score += np.where(entry & self.entry_goal_cards, 0.15, 0.0)
+
+        # Lifestyle match on co-branded cards (last matching service names the match)
+        updates = []
+        lifestyle_matches = []
+        for p, profile in enumerate(profiles):
+            lifestyle_match = {}
+            step = 0
+            for category, services in profile.get("lifestyle", {}).items():
+                for service_data in services:
+                    service, usage_percent = parse_lifestyle_entry(service_data)
+                    ids = self.co_brand_cards.get(service)
+                    if ids is not None and len(ids):
+                        updates.append((step, p, ids, 0.3 * (usage_percent / 100)))
+                        for i in ids:
+                            lifestyle_match[int(i)] = service.replace("_", " ").title()
+                    step += 1
+            lifestyle_matches.append(lifestyle_match)
+        self._add_sparse(score, updates)
+
+        score = np.minimum(score, 1.0)
+        return [{
+            "goals": goal_lists[p],
+            "candidates": candidates[p],
+            "score": score[p],
+            "lifestyle_match": lifestyle_matches[p]
+        } for p in range(len(profiles))]
+
+    def spending_scores_batch(self, profiles: list) -> list:
+        """Score every card against each profile's spending and lifestyle.
+
+        Each match is recorded as (card mask, builder) so match dicts only get
+        built for the cards that are returned.
+        """
+        salaries = [p.get("salary", 0) for p in profiles]
+        spends = [p.get("spend", {}) for p in profiles]
+        totals = [sum(s.values()) or 1 for s in spends]
+        matches = [[] for _ in profiles]
+
+        score = np.full((len(profiles), self.size), 0.5)
+
+        updates = []
+        for p, profile in enumerate(profiles):
+            step = 0
+            for category, services in profile.get("lifestyle", {}).items():
+                for service_data in services:
+                    service, usage_percent = parse_lifestyle_entry(service_data)
+
+                    if service in self.co_brand_cards:
+                        updates.append((step, p, self.co_brand_cards[service], 0.3 * (usage_percent / 100)))
+                        matches[p].append((self.co_brand_masks[service], self._static_match({
+                            "type": "co_branded",
+                            "service": service,
+                            "usage": usage_percent,
+                            "benefit": self.co_brand_benefit[service]
+                        })))
+
+                    if service in self.partner_cards:
+                        updates.append((step + 1, p, self.partner_cards[service], 0.15 * (usage_percent / 100)))
+                        matches[p].append((self.partner_masks[service], self._static_match({
+                            "type": "partner",
+                            "service": service,
+                            "usage": usage_percent,
+                            "benefit": f"Special benefits at {service}"
+                        })))
+                    step += 2
+        self._add_sparse(score, updates)
+
+        high_online, international, transport, general = [], [], [], []
+        amazon_fresh_boosts = []
+        for p, spend in enumerate(spends):
+            total_spend = totals[p]
+            online_spend = spend.get("online", 0)
+            international_travel = spend.get("international_travel", 0)
+            domestic_transport = spend.get("domestic_transport", 0)
+            misc_spend = spend.get("miscellaneous", 0)
+
+            # Boost for high online spenders
+            high_online.append(online_spend > 1500)
+            if online_spend > 1500:
+                matches[p].append((self.high_online_cards, self._online_match(
+                    int((online_spend / total_spend) * 100), online_spend)))
+
+            # Boost for international travelers (flights, hotels, foreign spending)
+            international.append(international_travel > 2000)
+            if international_travel > 2000:
+                matches[p].append((self.international_travel_cards, self._static_match({
+                    "type": "international_travel",
+                    "service": "international_travel",
+                    "usage": int((international_travel / total_spend) * 100),
+                    "benefit": f"Enhanced rewards on international travel & foreign spending"
+                })))
+
+            # Boost for domestic transport users (Careem, RTA, etc)
+            transport.append(domestic_transport > 800)
+            if domestic_transport > 800:
+                matches[p].append((self.transport_cards, self._static_match({
+                    "type": "domestic_transport",
+                    "service": "ride_hailing_transport",
+                    "usage": int((domestic_transport / total_spend) * 100),
+                    "benefit": f"Benefits for ride-hailing and local transport"
+                })))
+
+            boosts = 0
+            for service_data in profiles[p].get("lifestyle", {}).get("groceries", []):
+                if isinstance(service_data, dict):
+                    service = service_data.get("service")
+                    usage = service_data.get("usage_percent", 0)
+                    if service == "amazon_fresh" and usage >= 50:
+                        boosts += 1
+                        matches[p].append((self.is_amazon_card, self._static_match({
+                            "type": "high_usage",
+                            "service": "amazon_fresh",
+                            "usage": usage,
+                            "benefit": f"You use Amazon Fresh {usage}% for groceries - 6% cashback applies!"
+                        })))
+            amazon_fresh_boosts.append(boosts)
+
+            general.append(misc_spend > 0 and misc_spend / total_spend > 0.3)
+            if general[-1]:
+                matches[p].append((self.general_reward_cards, self._general_match(
+                    int((misc_spend / total_spend) * 100), misc_spend)))
+
+        score += np.where(_column(high_online, bool) & self.high_online_cards, 0.2, 0.0)
+        score += np.where(_column(international, bool) & self.international_travel_cards, 0.15, 0.0)
+        score += np.where(_column(transport, bool) & self.transport_cards, 0.1, 0.0)
+
+        # Entry-level card boost
+        entry = _column([s <= 6000 for s in salaries], bool)
+        score += np.where(entry & self.entry_level_cards, 0.1, 0.0)
+
+        # Entertainment boost
+        entertainment = _column([s.get("dining", 0) + s.get("online", 0) > 2000 for s in spends], bool)
+        score += np.where(entertainment & self.entertainment_cards, 0.1, 0.0)
+
+        # Amazon Fresh heavy users, once per qualifying groceries entry
+        amazon_fresh = _column(amazon_fresh_boosts, int)
+        for t in range(max(amazon_fresh_boosts, default=0)):
+            score += np.where((amazon_fresh > t) & self.is_amazon_card, 0.2, 0.0)
+
+        score += np.where(_column(general, bool) & self.general_reward_cards, 0.25, 0.0)
+
+        # Category-weighted reward score, one profile x card step per spend position
+        spend_items = [[(c, a) for c, a in s.items() if a > 0 and c not in GENERAL_SPEND_CATEGORIES] for s in spends]
+        for j in range(max((len(items) for items in spend_items), default=0)):
+            categories = [items[j][0] if j < len(items) else None for items in spend_items]
+            weight = _column([items[j][1] / totals[p] if j < len(items) else 0.0
+                              for p, items in enumerate(spend_items)])
+            reward_rate = self.reward_rates[:, self._reward_columns(categories)].T
+            score += np.where(reward_rate > 0, weight * (reward_rate / 5) * 0.2, 0.0)
+
+        misc = _column([s.get("miscellaneous", 0) > 0 for s in spends], bool)
+        weight = _column([s.get("miscellaneous", 0) / totals[p] for p, s in enumerate(spends)])
+        score += np.where(misc & (self.misc_rate > 0), weight * (self.misc_rate / 5) * 0.2, 0.0)
+
+        goal_matches = self._goal_match_counts([p.get("goals", []) for p in profiles])
+        score += np.minimum(goal_matches * 0.1, 0.15)
+
+        score += np.where(self.zero_fee, 0.05, 0.0)
+
+        score = np.minimum(score, 1.0)
+        candidates = self.eligible(_column(salaries))
+        return [{
+            "candidates": candidates[p],
+            "score": score[p],
+            "matches": matches[p]
+        } for p in range(len(profiles))]
+
+    def estimate_values_batch(self, profiles: list) -> list:
+        """Annual reward totals for every card, excluding non-partner spend on co-branded cards."""
+        spend_items = [list(p.get("spend", {}).items()) for p in profiles]
+        lifestyles = [p.get("lifestyle", {}) for p in profiles]
+
+        total_rewards = np.zeros((len(profiles), self.size))
+        excluded_spend = np.zeros((len(profiles), self.size))
+
+        for j in range(max((len(items) for items in spend_items), default=0)):
+            categories = [items[j][0] if j < len(items) else None for items in spend_items]
+            amount = _column([items[j][1] if j < len(items) else 0 for items in spend_items])
+
+            # Only apply exclusion logic if user provided lifestyle data for this category
+            excluded = np.zeros((len(profiles), self.size), dtype=bool)
+            for p, category in enumerate(categories):
+                if category is None:
+                    continue
+                category_lifestyle = lifestyles[p].get(LIFESTYLE_CATEGORY_KEYS.get(category, ""), [])
+                if category_lifestyle:
+                    user_services = [s.get("service") if isinstance(s, dict) else s for s in category_lifestyle]
+                    excluded[p] = self._excluded_cards(user_services)
+            excluded_spend += np.where(excluded, amount, 0)
+
+            columns = self._reward_columns(categories)
+            has_rate = self.has_reward[:, columns].T
+            earned = np.where(has_rate, amount * 12 * self.reward_rates[:, columns].T / 100, 0.0)
+            general = _column([c in GENERAL_SPEND_CATEGORIES for c in categories], bool) & self.is_general_rewards & ~has_rate
+            earned = np.where(general, amount * 12 * self.general_rate / 100, earned)
+            total_rewards += np.where(excluded, 0.0, earned)
+
+        return [{
+            "total_rewards": total_rewards[p],
+            "excluded_spend": excluded_spend[p],
+            "has_lifestyle_data": len(lifestyles[p]) > 0
+        } for p in range(len(profiles))]